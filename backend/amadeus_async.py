@@ -0,0 +1,246 @@
+# ============================
+# amadeus_async.py - Non-blocking Amadeus client
+# ============================
+#
+# asyncio counterpart of the requests-based client in app.py (sections 6a-9a),
+# used by the ASGI serving mode (asgi.py). Waiting on Amadeus only suspends a
+# coroutine, so many upstream calls can be in flight on one event loop thread.
+#
+# Same policies as the sync client: keep-alive connection pool, connect/read
+# timeouts, retries on 429/5xx and transport errors with exponential backoff
+# + jitter (honoring Retry-After), a cached token refreshed shortly before it
+# expires, one retry with a fresh token on 401, and a token-bucket rate limit.
+# asgi.py passes in app.py's limiter and token cache (amadeus_shared.py), so
+# async and sync calls in one worker share both.
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from amadeus_shared import TokenBucket, TokenCache
+
+AMADEUS_BASE_URL = "https://test.api.amadeus.com"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class AsyncAmadeusClient:
+    """
+    Amadeus client on a shared httpx.AsyncClient. Must be used from a single
+    event loop (one per ASGI worker process).
+
+    `limiter` (anything with reserve(), see amadeus_shared.py) and `tokens`
+    (a TokenCache) default to private ones built from `rate`/`burst` and
+    `token_margin`; pass the sync client's to share them.
+    """
+
+    def __init__(self, api_key, api_secret, rate=10, burst=1, max_concurrency=3,
+                 pool_size=10, connect_timeout=5, read_timeout=20, max_retries=3,
+                 backoff_factor=0.5, token_margin=60, base_url=AMADEUS_BASE_URL, on_request=None,
+                 limiter=None, tokens=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = limiter or TokenBucket(rate, burst)
+        self.tokens = tokens or TokenCache(token_margin)
+        self.token_lock = asyncio.Lock()
+        self.http = None  # Created lazily inside the running loop
+        self.on_request = on_request  # Called with (url, seconds) after each request, e.g. for metrics
+
+    def _client(self):
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+            )
+        return self.http
+
+    async def aclose(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+    # ----------------------------
+    # 1. Transport: timeouts + retry/backoff
+    # ----------------------------
+    def _backoff(self, attempt, resp=None):
+        """Seconds to wait before retry `attempt` (0-based): Retry-After if given, else exponential + jitter."""
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return self.backoff_factor * (2 ** attempt) + random.uniform(0, self.backoff_factor)
+
+    async def request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying 429/5xx responses and connection/read errors
+        up to `max_retries` times. Returns the final response.
+        """
+        start = time.perf_counter()
+        try:
+            return await self._request(method, url, **kwargs)
+        finally:
+            if self.on_request is not None:
+                self.on_request(url, time.perf_counter() - start)
+
+    async def _request(self, method, url, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = await self._client().request(method, url, **kwargs)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return resp
+            await asyncio.sleep(self._backoff(attempt, resp))
+        return resp
+
+    # ----------------------------
+    # 2. Auth token
+    # ----------------------------
+    async def get_token(self):
+        """Returns a valid token; concurrent coroutines share one refresh."""
+        token = self.tokens.cached()
+        if token:
+            return token
+        async with self.token_lock:
+            token = self.tokens.cached()
+            if token:
+                return token
+            print("Requesting Amadeus access token...")
+            data = {'grant_type': 'client_credentials', 'client_id': self.api_key, 'client_secret': self.api_secret}
+            resp = await self.request("POST", "/v1/security/oauth2/token", data=data)
+            resp.raise_for_status()
+            body = resp.json()
+            token = body.get("access_token")
+            if not token:
+                raise Exception("Failed to get Amadeus access token")
+            print("Access token acquired")
+            token = token.strip()
+            self.tokens.store(token, int(body.get("expires_in", 1799)))
+            return token
+
+    def invalidate(self, token):
+        """Drops `token` (e.g. after a 401) so the next get_token() re-authenticates."""
+        self.tokens.invalidate(token)
+
+    async def throttle(self):
+        """Waits for a rate-limit token (a reservation is one short lock or SQLite transaction)."""
+        wait = self.limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def get(self, url, params):
+        """Rate-limited, authorized GET; retried once with a fresh token on 401. Returns decoded JSON."""
+        await self.throttle()
+        token = await self.get_token()
+        resp = await self.request("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params)
+        if resp.status_code == 401:
+            print("Amadeus token rejected, re-authenticating...")
+            self.invalidate(token)
+            token = await self.get_token()
+            resp = await self.request("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params)
+        resp.raise_for_status()
+        return resp.json()
+
+    # ----------------------------
+    # 3. Endpoints
+    # ----------------------------
+    async def get_hotel_list(self, city_code):
+        """Hotel directory (no prices) for an Amadeus city code."""
+        print(f"Fetching hotel list for city code: {city_code}")
+        data = await self.get("/v1/reference-data/locations/hotels/by-city", {"cityCode": city_code})
+        hotels = data.get("data", [])
+        print(f"Fetched {len(hotels)} hotels")
+        return hotels
+
+    async def get_hotel_offers_batch(self, hotel_ids, checkin, checkout, adults):
+        """Prices and availability for up to one batch of hotel IDs."""
+        print(f"Querying hotel offers batch size {len(hotel_ids)}")
+        params = {
+            "hotelIds": ",".join(hotel_ids),
+            "adults": adults,
+            "checkInDate": checkin,
+            "checkOutDate": checkout,
+        }
+        data = await self.get("/v3/shopping/hotel-offers", params)
+        print(f"Received {len(data.get('data', []))} offers")
+        return data
+
+    async def fetch_offers(self, hotel_ids, checkin, checkout, adults, batch_size=20):
+        """
+        Requests offers for all `hotel_ids` in concurrent batches (at most
+        `max_concurrency` in flight). Failed batches are logged and skipped;
+        only if every batch fails is the first error re-raised.
+        """
+        batches = [hotel_ids[i: i + batch_size] for i in range(0, len(hotel_ids), batch_size)]
+        if not batches:
+            return []
+
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch):
+            async with slots:
+                return await self.get_hotel_offers_batch(batch, checkin, checkout, adults)
+
+        results = await asyncio.gather(*(run(b) for b in batches), return_exceptions=True)
+        offers, errors = [], []
+        for result in results:
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                print(f"Offer batch failed: {result}")
+                errors.append(result)
+            else:
+                offers.extend(result.get('data', []))
+
+        if len(errors) == len(batches):
+            raise errors[0]
+        return offers
+
+    async def iter_offers(self, hotel_ids, checkin, checkout, adults, batch_size=20):
+        """
+        Streaming fetch_offers: yields each batch's offer entries as soon as it
+        completes. Closing the generator (or cancelling its consumer) cancels
+        the batches still queued or in flight.
+        """
+        batches = [hotel_ids[i: i + batch_size] for i in range(0, len(hotel_ids), batch_size)]
+        if not batches:
+            return
+
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch):
+            async with slots:
+                return await self.get_hotel_offers_batch(batch, checkin, checkout, adults)
+
+        tasks = [asyncio.ensure_future(run(b)) for b in batches]
+        errors = []
+        try:
+            for done in asyncio.as_completed(tasks):
+                try:
+                    result = await done
+                except Exception as e:
+                    print(f"Offer batch failed: {e}")
+                    errors.append(e)
+                    continue
+                yield result.get('data', [])
+            if len(errors) == len(batches):
+                raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
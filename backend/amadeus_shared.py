@@ -0,0 +1,144 @@
+# ============================
+# amadeus_shared.py - Rate limiting and token caching for both Amadeus clients
+# ============================
+#
+# The sync client (app.py sections 6a-9a) and the async one (amadeus_async.py)
+# run side by side in an ASGI worker: /live_recommend uses the async client,
+# while /batch_search, stale-while-revalidate refreshes and the prefetcher
+# use the sync one. Both take their rate-limit tokens from one limiter and
+# their access token from one TokenCache per process, so the worker neither
+# exceeds its rate nor fetches a second access token.
+#
+# Limiters hand out reservations (`reserve()` returns how long to wait), so a
+# thread can time.sleep and a coroutine can asyncio.sleep on the same bucket.
+
+import os
+import sqlite3
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for one process. Callers never exceed `rate`
+    requests/second (with bursts up to `capacity`).
+
+    `reserve()` takes a token right away and returns how long the caller must
+    wait before using it (the bucket goes negative while callers queue), so
+    waiting needs no lock and can be a coroutine's asyncio.sleep.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token; returns the seconds to wait before sending."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate) - 1
+            self.updated = now
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        """Blocks until the caller may send one request."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def close(self):
+        pass
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process on the host: its state is one row of
+    a SQLite database, updated in a write transaction per reservation, so N
+    gunicorn workers together stay under `rate` instead of sending N x rate.
+    Times are wall-clock (time.time), which all processes agree on.
+
+    If the database can't be used, it falls back to limiting this process
+    alone (at the full rate) rather than failing the request.
+    """
+
+    def __init__(self, path, rate, capacity=1, name="amadeus"):
+        super().__init__(rate, capacity)
+        self.path = path
+        self.name = name
+        self.local = threading.local()
+        self.warned = False
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets "
+                         "(name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def reserve(self):
+        try:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens = self.capacity if row is None else row[0] + max(0.0, now - row[1]) * self.rate
+                tokens = min(self.capacity, tokens) - 1
+                conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                             (self.name, tokens, now))
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return max(0.0, -tokens / self.rate)
+        except sqlite3.Error as e:
+            if not self.warned:
+                print(f"Shared rate limiter unavailable ({e}), limiting per process")
+                self.warned = True
+            return super().reserve()
+
+    def close(self):
+        """Closes this thread's connection (e.g. in a gunicorn master before it forks)."""
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+class TokenCache:
+    """
+    Thread-safe cache of one access token, treated as expired `margin`
+    seconds before the upstream says it is. Fetching a new token is left to
+    the client; `refresh_lock` lets sync callers share one refresh.
+    """
+
+    def __init__(self, margin=60):
+        self.margin = margin
+        self.token = None
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+
+    def cached(self):
+        """The token if it is still valid, else None."""
+        with self.lock:
+            if self.token and time.monotonic() < self.expires_at:
+                return self.token
+            return None
+
+    def store(self, token, expires_in):
+        with self.lock:
+            self.token = token
+            self.expires_at = time.monotonic() + max(0, expires_in - self.margin)
+
+    def invalidate(self, token):
+        """Drops `token` (e.g. after a 401) so the next fetch re-authenticates."""
+        with self.lock:
+            if self.token == token:
+                self.token = None
+                self.expires_at = 0.0
@@ -2,13 +2,45 @@
 # app.py - Flask Backend for Hotel Recommender
 # ============================
 
-from flask import Flask, request, jsonify       # Flask web framework and helpers
+import time                                      # First, so the import time below covers every import
+IMPORT_STARTED = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response, g  # Flask web framework and helpers
 from flask_cors import CORS                     # To allow Cross-Origin requests from frontend
-import pandas as pd                              # For handling CSV data
-import requests                                  # For making HTTP requests (Amadeus API)
 import os                                        # For environment variables and file operations
 from dotenv import load_dotenv                   # For loading .env file variables
-import time, csv, random, math, glob             # Misc utilities
+# Imported on first use, off the startup path: requests (Amadeus session),
+# similarity and geo_index (scikit-learn/SciPy), and pandas, NumPy and pyarrow
+# (data loading, rating and ranking)
+from suggest_index import SuggestIndex            # Prefix + trigram typeahead index
+from hotel_schema import (                       # Typed binary (Feather) hotel tables
+    OYO_SCHEMA, LIVE_SCHEMA, apply_schema, binary_path_for, read_table, write_table,
+)
+from fast_json import (                          # orjson encoding, gzip/brotli + ETags
+    OrjsonProvider, frame_to_records, negotiate, dumps as encode_json,
+)
+from sqlite_store import SQLiteOffersStore       # Live offers cache in SQLite (WAL)
+from amadeus_shared import (                     # Rate limiters + token cache shared by both Amadeus clients
+    SharedTokenBucket, TokenBucket, TokenCache,
+)
+from metrics import (                            # Prometheus histograms/counters + timing spans
+    MetricsRegistry, current_profile, server_timing, span as timed_span,
+)
+import random, math, json, re, zlib              # Misc utilities
+import tempfile                                  # Atomic cache file writes
+from contextlib import contextmanager, closing   # File lock helper; closing streamed generators
+try:
+    import fcntl                                 # POSIX file locks (gunicorn workers)
+except ImportError:                              # Windows dev servers: thread-level only
+    fcntl = None
+import threading                                 # Locks guarding shared in-memory caches
+import queue                                     # Streamed frames from producer threads
+import gc                                        # gc.freeze() before forking preloaded workers
+from collections import OrderedDict              # LRU ordering for the response cache
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Parallel Amadeus batches
+import contextvars                               # Attribute upstream calls to user vs prefetch
+import datetime                                  # Rolling prefetch date windows
+from collections import deque                    # Sliding window for the prefetch budget
 
 # ----------------------------
 # 1. Load environment variables
@@ -19,14 +51,16 @@ load_dotenv()  # Read variables from .env (like API keys) into environment
 # 2. Create Flask app and configure CORS
 # ----------------------------
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # jsonify → orjson
 # Only allow frontend on specified domain to make requests
-CORS(app, origins=["https://hotel-recommender.vercel.app"])
+CORS_ORIGINS = ["https://hotel-recommender.vercel.app"]
+CORS(app, origins=CORS_ORIGINS)
 
 # ----------------------------
 # 3. Constants & Globals
 # ----------------------------
 
-# Path to preprocessed local OYO hotels CSV
+# Path to preprocessed local OYO hotels CSV (the dataset's source of truth)
 OYO_CSV_PATH = 'OYO_HOTELS_792_transformed.csv'
 
 # Mapping of human-readable city names to Amadeus API city codes
@@ -37,8 +71,8 @@ CITY_CODES = {
     "allahabad": "IXD",
     "amritsar": "ATQ",
     "aurangabad": "IXU",
-    "bengaluru": "BLR",
     "bangalore": "BLR",
+    "bengaluru": "BLR",
     "bhopal": "BHO",
     "bhubaneswar": "BBI",
     "chandigarh": "IXC",
@@ -80,149 +114,994 @@ CITY_CODES = {
     "visakhapatnam": "VTZ",
 }
 
+# One canonical name per city code (its first CITY_CODES entry, which is the
+# OYO dataset's City where both exist). Live hotels are filed under it in the
+# similarity and typeahead indexes, whichever alias the search used
+CITY_NAMES = {code: name for name, code in reversed(CITY_CODES.items())}
+
+def canonical_city(city):
+    """Lower-cased city name, with aliases of a CITY_CODES city mapped to its CITY_NAMES name."""
+    city = (city or "").lower().strip()
+    return CITY_NAMES.get(CITY_CODES.get(city), city)
+
 # Amadeus API credentials from .env
 AMADEUS_API_KEY = os.getenv("AMADEUS_API_KEY")
 AMADEUS_API_SECRET = os.getenv("AMADEUS_API_SECRET")
 
-# Hold OYO dataset in memory after first load to speed up future requests
-oyo_hotels_df = None
+# Amadeus API root (override to point at a local fake server, see benchmarks/)
+AMADEUS_BASE_URL = os.getenv("AMADEUS_BASE_URL", "https://test.api.amadeus.com").rstrip("/")
+
+# Amadeus rate limiting / concurrency (test env quota is 10 TPS, 1 request per 100ms)
+AMADEUS_RATE_PER_SEC = float(os.getenv("AMADEUS_RATE_PER_SEC", "10"))
+AMADEUS_RATE_BURST = int(os.getenv("AMADEUS_RATE_BURST", "1"))
+AMADEUS_MAX_WORKERS = int(os.getenv("AMADEUS_MAX_WORKERS", "3"))
+
+# Amadeus HTTP client: pool size, timeouts (seconds) and retry policy
+AMADEUS_POOL_SIZE = int(os.getenv("AMADEUS_POOL_SIZE", "10"))
+AMADEUS_CONNECT_TIMEOUT = float(os.getenv("AMADEUS_CONNECT_TIMEOUT", "5"))
+AMADEUS_READ_TIMEOUT = float(os.getenv("AMADEUS_READ_TIMEOUT", "20"))
+AMADEUS_MAX_RETRIES = int(os.getenv("AMADEUS_MAX_RETRIES", "3"))
+AMADEUS_BACKOFF_FACTOR = float(os.getenv("AMADEUS_BACKOFF_FACTOR", "0.5"))
+
+# Two-tier live cache TTLs (seconds):
+#  - hotel directory per Amadeus city code barely changes → long TTL
+#  - offers per (city, dates, adults) carry prices → short TTL
+HOTEL_LIST_TTL = int(os.getenv("HOTEL_LIST_TTL", str(7 * 24 * 3600)))
+OFFERS_CACHE_TTL = int(os.getenv("OFFERS_CACHE_TTL", str(6 * 3600)))
+# Expired offers are still served for this long while a background refresh runs
+# (stale-while-revalidate); the sweeper deletes them after TTL + grace
+OFFERS_STALE_TTL = int(os.getenv("OFFERS_STALE_TTL", "3600"))
+
+# In-process LRU cache of final /live_recommend response bodies
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# JSON responses at least this large are gzip/brotli-compressed when the client
+# accepts it; compressed bodies are memoized by ETag within this byte budget
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESSED_CACHE_MAX_BYTES = int(os.getenv("COMPRESSED_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# Live cache store: directory, total disk budget (bytes) and sweeper interval (seconds)
+LIVE_CACHE_DIR = os.getenv("LIVE_CACHE_DIR", "live_cache")
+LIVE_CACHE_MAX_BYTES = int(os.getenv("LIVE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LIVE_CACHE_SWEEP_INTERVAL = int(os.getenv("LIVE_CACHE_SWEEP_INTERVAL", "300"))
+# Typed, memory-mappable binary copy of the OYO CSV, generated from it on load
+# (preferred while at least as new as the CSV). Kept out of the source tree, so
+# running the app never modifies tracked files
+OYO_DATA_PATH = os.getenv("OYO_DATA_PATH",
+                          os.path.join(LIVE_CACHE_DIR, os.path.basename(binary_path_for(OYO_CSV_PATH))))
+# Searches are serialized across workers on this many lock files (by hash of the
+# search key), so lock files don't pile up with one per search ever made
+OFFERS_LOCK_STRIPES = max(1, int(os.getenv("OFFERS_LOCK_STRIPES", "64")))
+
+# Where processed live offers are kept: "sqlite" (one WAL database, LIVE_CACHE_DB)
+# or "files" (one Feather file per search in LIVE_CACHE_DIR)
+LIVE_CACHE_BACKEND = os.getenv("LIVE_CACHE_BACKEND", "sqlite").lower()
+LIVE_CACHE_DB = os.getenv("LIVE_CACHE_DB", os.path.join(LIVE_CACHE_DIR, "offers.sqlite3"))
+
+# Where the Amadeus rate limit (AMADEUS_RATE_PER_SEC) is enforced:
+#  - "shared": one bucket for all workers on this host, in AMADEUS_RATE_DB
+#  - "process": each worker gets AMADEUS_RATE_PER_SEC / WEB_CONCURRENCY (set
+#    WEB_CONCURRENCY to the gunicorn worker count; gunicorn reads it too)
+AMADEUS_RATE_SCOPE = os.getenv("AMADEUS_RATE_SCOPE", "shared").lower()
+AMADEUS_RATE_DB = os.getenv("AMADEUS_RATE_DB", os.path.join(LIVE_CACHE_DIR, "amadeus_rate.sqlite3"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Background prefetch of hot searches (no PREFETCH_CITIES = off):
+#  - cities: CITY_CODES keys; windows: tonight, tomorrow, weekend, +N or +NxM
+#    (check-in in N days for M nights); adults: party sizes to warm
+#  - budget: upstream Amadeus calls the prefetcher may spend per minute
+#  - refresh ahead: re-fetch entries this many seconds before they expire
+PREFETCH_CITIES = [c.strip().lower() for c in os.getenv("PREFETCH_CITIES", "").split(",") if c.strip()]
+PREFETCH_WINDOWS = [w.strip().lower() for w in os.getenv("PREFETCH_WINDOWS", "tonight,weekend").split(",") if w.strip()]
+PREFETCH_ADULTS = [int(a) for a in os.getenv("PREFETCH_ADULTS", "1").split(",") if a.strip()]
+PREFETCH_BUDGET_PER_MIN = int(os.getenv("PREFETCH_BUDGET_PER_MIN", "30"))
+PREFETCH_REFRESH_AHEAD = int(os.getenv("PREFETCH_REFRESH_AHEAD", "900"))
+PREFETCH_INTERVAL = int(os.getenv("PREFETCH_INTERVAL", "60"))
+
+# /batch_search: most searches per request, and how many of them (across all
+# requests in this worker) may fetch upstream at once; Amadeus calls still go
+# through the shared rate limiter
+BATCH_SEARCH_MAX_QUERIES = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "12"))
+BATCH_SEARCH_WORKERS = int(os.getenv("BATCH_SEARCH_WORKERS", "6"))
+
+# Persisted similar-hotels index (<path>.npz: matrix and rows in one file),
+# saved in the background at most every N seconds after it changed
+SIMILAR_INDEX_PATH = os.path.join(LIVE_CACHE_DIR, "similar_index")
+SIMILAR_INDEX_SAVE_INTERVAL = int(os.getenv("SIMILAR_INDEX_SAVE_INTERVAL", "60"))
+
+# Every N seconds each worker reconciles the live hotels in its derived indexes
+# with the shared offers store (if it changed): adds hotels other workers
+# fetched, drops hotels whose cached offers all expired (0 = off)
+LIVE_INDEX_SYNC_INTERVAL = int(os.getenv("LIVE_INDEX_SYNC_INTERVAL", "30"))
+
+# In-memory copy of the hotel directory cache: city_code -> (fetched_at, hotels)
+hotel_list_cache = {}
+hotel_list_lock = threading.Lock()
+
+# Current OYO dataset snapshot, replaced atomically on (re)load:
+#   {"df": DataFrame, "stamp": (path, csv mtime, binary mtime), "cities": per-city index}
+# Readers take the dict once, so a request never mixes old and new data.
+oyo_snapshot = None
+oyo_reload_lock = threading.Lock()
+
+# Poll OYO dataset mtime every N seconds and hot-reload in the background (0 = off)
+OYO_WATCH_INTERVAL = int(os.getenv("OYO_WATCH_INTERVAL", "30"))
+
+# Set by gunicorn.conf.py when the app is preloaded in the gunicorn master: the
+# master warms the dataset and indexes before forking (workers share them
+# copy-on-write), so importing the app starts no threads; see section 14
+APP_PRELOAD = os.getenv("APP_PRELOAD", "false").lower() in ("1", "true", "yes")
+
+# Startup timings and readiness of this process, reported by /ready
+startup = {
+    "pid": os.getpid(),
+    "preloaded": APP_PRELOAD,
+    "started": IMPORT_STARTED,        # perf_counter at import (or fork, in a worker)
+    "import_seconds": None,
+    "warmup_seconds": None,
+    "first_response_seconds": None,
+    "ready": False,
+}
+
+# Shared secret for /admin/* endpoints (unset = admin endpoints disabled)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# /metrics: each worker writes a snapshot here every N seconds (0 = only its own
+# metrics are reported) and any worker's /metrics merges them
+METRICS_DIR = os.path.join(LIVE_CACHE_DIR, "metrics")
+METRICS_FLUSH_INTERVAL = int(os.getenv("METRICS_FLUSH_INTERVAL", "15"))
+
+# Per-request profiling: "X-Profile: 1" (or ?profile=1) returns stage timings in a
+# Server-Timing header; allowed for everyone when enabled, else admin-token holders
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Similar-hotels index over OYO + cached live hotels
+similarity_index = None
+similarity_lock = threading.Lock()
+
+# Per-city spatial index over OYO + cached live hotels with coordinates
+geo_index = None
+geo_lock = threading.Lock()
+
+# Typeahead index over city names, OYO hotels and cached live hotels
+suggest_index = None
+suggest_lock = threading.Lock()
+
+# Values filled into OYO responses where the dataset has none
+# (missing numeric fields are null, other missing strings "")
+OYO_DEFAULTS = {"Property_type": "hotel", "Currency": "INR"}
 
 # ----------------------------
-# 4. Helper: Load OYO CSV
+# 4. Helper: Load OYO Dataset
 # ----------------------------
+def file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def oyo_data_stamp():
+    """
+    Returns (path to serve, CSV mtime, binary mtime), or None if neither file
+    exists. The CSV is the source of truth: the typed binary file is served
+    only while it is at least as new as the CSV. Both mtimes are part of the
+    stamp, so editing either file triggers a reload.
+    """
+    csv_mtime, binary_mtime = file_mtime(OYO_CSV_PATH), file_mtime(OYO_DATA_PATH)
+    if csv_mtime is None and binary_mtime is None:
+        return None
+    if binary_mtime is not None and (csv_mtime is None or binary_mtime >= csv_mtime):
+        return OYO_DATA_PATH, csv_mtime, binary_mtime
+    return OYO_CSV_PATH, csv_mtime, binary_mtime
+
+def rebuild_oyo_binary():
+    """
+    Imports the CSV when it is newer than the binary file, or there is none yet
+    (first start). Returns the new stamp, or None if the binary could not be
+    written (the CSV is then read directly).
+    """
+    import pandas as pd
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(OYO_DATA_PATH)), exist_ok=True)
+        write_table(apply_schema(pd.read_csv(OYO_CSV_PATH), OYO_SCHEMA), OYO_DATA_PATH, OYO_SCHEMA)
+    except Exception as e:
+        print(f"Could not rebuild {OYO_DATA_PATH} from {OYO_CSV_PATH}: {e}")
+        return None
+    print(f"Rebuilt {OYO_DATA_PATH} from {OYO_CSV_PATH}.")
+    return oyo_data_stamp()
+
+def read_oyo_dataset(path):
+    """Reads the OYO dataset (memory-mapped binary, or CSV coerced to the same schema)."""
+    if path == OYO_DATA_PATH:
+        return read_table(path)
+    import pandas as pd
+    return apply_schema(pd.read_csv(path), OYO_SCHEMA)
+
+def get_oyo_snapshot():
+    """Returns the current dataset snapshot, loading it on first use."""
+    snapshot = oyo_snapshot
+    if snapshot is None:
+        reload_oyo_dataset()
+        snapshot = oyo_snapshot
+    return snapshot
+
 def load_oyo_hotels():
     """
-    Loads the local transformed OYO hotels dataset into memory (pandas DataFrame).
-    Uses caching so the CSV is read only once per server run.
+    Returns the local transformed OYO hotels dataset (pandas DataFrame).
+    Prefers the typed binary file (memory-mapped, pages shared between workers)
+    and falls back to the CSV. The file is read once; later changes on disk
+    are picked up by the background watcher (see reload_oyo_dataset).
 
     Returns:
         pd.DataFrame: OYO hotels dataset
     """
-    global oyo_hotels_df
-    if oyo_hotels_df is None:
-        if not os.path.exists(OYO_CSV_PATH):
-            raise FileNotFoundError(f"{OYO_CSV_PATH} not found.")
-        print(f"Loading OYO dataset from {OYO_CSV_PATH}...")
-        oyo_hotels_df = pd.read_csv(OYO_CSV_PATH)
-        print(f"Loaded {len(oyo_hotels_df)} hotels from static dataset.")
-    return oyo_hotels_df
+    return get_oyo_snapshot()["df"]
+
+# ----------------------------
+# 4a. Helper: Per-city OYO Index
+# ----------------------------
+def build_city_entry(group):
+    """Builds one city's index entry from its rows of the OYO DataFrame."""
+    hotels = frame_to_records(group, string_fill="", defaults=OYO_DEFAULTS)
+    payload = {"hotel_count": len(hotels), "hotels": hotels}
+    return {
+        "hotel_count": len(hotels),
+        "hotels": hotels,
+        "body": encode_json(payload),
+        "columns": build_rank_columns(hotels),
+    }
+
+def build_oyo_city_index(df, cities=None, base=None):
+    """
+    Groups the OYO dataset by lower-cased city once and pre-encodes the
+    JSON response body for each city, so a lookup is a single dict hit.
+
+    Also keeps NumPy ranking columns per city for /recommend.
+
+    With `cities` and `base`, only those cities are rebuilt and every other
+    entry is reused from the `base` index (incremental reload).
+
+    Returns:
+        dict: normalized city -> {"hotel_count", "hotels", "body", "columns"}
+    """
+    city_keys = df['City'].str.lower()
+    if cities is None or base is None:
+        index = {key: build_city_entry(group) for key, group in df.groupby(city_keys, sort=False)}
+        print(f"Built OYO city index for {len(index)} cities.")
+        return index
+
+    index = {key: entry for key, entry in base.items() if key not in cities}
+    subset = df[city_keys.isin(cities)]
+    for key, group in subset.groupby(city_keys[subset.index], sort=False):
+        index[key] = build_city_entry(group)
+    print(f"Rebuilt OYO city index for {len(cities)} changed cities.")
+    return index
+
+def get_oyo_city_index():
+    """Returns the per-city OYO index of the current dataset snapshot."""
+    return get_oyo_snapshot()["cities"]
+
+# ----------------------------
+# 4b. Helper: Similar-hotels Index
+# ----------------------------
+def get_similarity_index():
+    """
+    Returns the similar-hotels index, loading the persisted copy on first use
+    and upserting the OYO dataset into it. Only hotels that are new or changed
+    get re-vectorized; the index is saved if anything changed. Later dataset
+    reloads are applied by update_derived_indexes, live hotels by
+    add_live_to_similarity and sync_live_indexes.
+    """
+    global similarity_index
+    if similarity_index is not None:
+        return similarity_index
+    get_oyo_snapshot()  # Outside the locks: may trigger the first dataset load
+    # Under the reload lock, so a reload can't swap in another snapshot between
+    # reading its cities and publishing the index (its delta would be lost)
+    with oyo_reload_lock, similarity_lock:
+        if similarity_index is None:
+            cities = oyo_snapshot["cities"]
+            from similarity import SimilarityIndex
+            index = SimilarityIndex.load(SIMILAR_INDEX_PATH)
+            changed = sum(index.upsert(entry["hotels"], city_key)
+                          for city_key, entry in cities.items())
+            if changed:
+                print(f"Similarity index: updated {changed} hotels ({len(index)} total)")
+                index.save(SIMILAR_INDEX_PATH)
+            similarity_index = index
+        return similarity_index
+
+def add_live_to_similarity(city, hotels):
+    """Upserts freshly fetched live hotels into the similarity index."""
+    index = get_similarity_index()
+    with similarity_lock:
+        if index.upsert(hotels, city):
+            schedule_similarity_save()
+
+# Set when the index changed since it was last saved (see section 4g)
+similarity_save_pending = threading.Event()
+
+def schedule_similarity_save():
+    """Marks the similarity index for saving by the index maintenance thread."""
+    similarity_save_pending.set()
+
+def save_similarity_index():
+    """Saves the similarity index now if it has unsaved changes."""
+    if similarity_save_pending.is_set() and similarity_index is not None:
+        similarity_save_pending.clear()
+        similarity_index.save(SIMILAR_INDEX_PATH)
+
+# ----------------------------
+# 4c. Helper: Geospatial Index
+# ----------------------------
+def geo_city_key(city):
+    """Groups hotels by Amadeus city code where known, else by lower-cased city name."""
+    city = (city or "").lower().strip()
+    return CITY_CODES.get(city, city)
+
+def get_geo_index():
+    """
+    Returns the spatial index. On first use it is seeded from every cached live
+    offer in the offers store and the OYO rows with coordinates. Later
+    dataset reloads are applied by update_derived_indexes, live hotels by
+    add_live_to_geo and sync_live_indexes.
+    """
+    global geo_index
+    if geo_index is not None:
+        return geo_index
+    get_oyo_snapshot()  # Outside the locks: may trigger the first dataset load
+    # Under the reload lock, so a reload can't swap in another snapshot between
+    # reading its cities and publishing the index (its delta would be lost)
+    with oyo_reload_lock, geo_lock:
+        if geo_index is None:
+            cities = oyo_snapshot["cities"]
+            from geo_index import GeoIndex
+            index = GeoIndex()
+            for city_code in offers_store.cities():
+                try:
+                    index.upsert(offers_store.city_offers(city_code), city_code)
+                except Exception as e:
+                    print(f"Skipping cached {city_code} offers for geo index: {e}")
+            for city_key, entry in cities.items():
+                index.upsert(entry["hotels"], geo_city_key(city_key))
+            print(f"Geo index holds {len(index)} hotels with coordinates.")
+            geo_index = index
+        return geo_index
+
+def add_live_to_geo(city, hotels):
+    """Adds freshly fetched live hotels to the spatial index."""
+    get_geo_index().upsert(hotels, geo_city_key(city))
+
+def update_derived_indexes(cities, affected, removed):
+    """
+    Applies an OYO dataset delta to the similarity, geo and typeahead indexes,
+    if they have been built: re-upserts hotels of `affected` cities (only changed rows
+    get re-vectorized) and drops `removed` hotelIds.
+    """
+    with similarity_lock:
+        if similarity_index is not None:
+            changed = similarity_index.remove(removed)
+            for city_key in affected:
+                if city_key in cities:
+                    changed += similarity_index.upsert(cities[city_key]["hotels"], city_key)
+            if changed:
+                schedule_similarity_save()
+    with geo_lock:
+        if geo_index is not None:
+            geo_index.remove(removed)
+            for city_key in affected:
+                if city_key in cities:
+                    geo_index.upsert(cities[city_key]["hotels"], geo_city_key(city_key))
+    with suggest_lock:
+        if suggest_index is not None:
+            suggest_index.remove(removed)
+            for city_key in affected:
+                if city_key in cities:
+                    suggest_index.upsert(cities[city_key]["hotels"], city_key, "oyo")
+            suggest_index.upsert_cities(suggest_city_info(cities, affected))
+            suggest_index.remove(f"city:{c}" for c in affected if c not in cities and c not in CITY_CODES)
 
 # ----------------------------
-# 5. Helper: Recursive Data Cleaner
+# 4d. Helper: OYO Hot Reload
 # ----------------------------
-def recursively_clean(obj):
+def diff_oyo_datasets(old_df, new_df):
+    """
+    Compares two dataset versions keyed by hotelId.
+
+    Returns:
+        tuple: (changed_ids, removed_ids, affected_cities) or None when hotelId
+        is not a unique key (caller then does a full rebuild)
     """
-    Recursively clean data structures to make them JSON-safe.
-    Replaces NaN and Infinity float values with None.
+    if not (old_df['hotelId'].is_unique and new_df['hotelId'].is_unique):
+        return None
+    old = old_df.set_index('hotelId')
+    new = new_df.set_index('hotelId').reindex(columns=old.columns)
+    removed = old.index.difference(new.index)
+    added = new.index.difference(old.index)
+    common = old.index.intersection(new.index)
+    o, n = old.loc[common], new.loc[common]
+    differs = (o != n) & ~(o.isna() & n.isna())  # Missing on both sides is equal
+    updated = common[differs.any(axis=1).to_numpy()]
+
+    changed = added.union(updated)
+    cities = set(old.loc[removed.union(updated), 'City'].dropna().str.lower())
+    cities |= set(new.loc[changed, 'City'].dropna().str.lower())
+    return set(changed), set(removed), cities
+
+def reload_oyo_dataset(force=False):
+    """
+    Loads the OYO dataset if it changed on disk (or `force`), applies the delta
+    to every derived index, then swaps in the new snapshot in one assignment.
+    Requests already running keep using the snapshot they started with.
+
+    Returns:
+        dict: reload summary, or None when nothing changed
     """
-    if isinstance(obj, dict):
-        return {k: recursively_clean(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [recursively_clean(v) for v in obj]
-    elif isinstance(obj, float):
-        if math.isnan(obj) or math.isinf(obj):
+    global oyo_snapshot
+    with oyo_reload_lock:
+        stamp = oyo_data_stamp()
+        current = oyo_snapshot
+        if stamp is None:
+            if current is not None:
+                return None  # File vanished - keep serving what we have
+            raise FileNotFoundError(f"{OYO_CSV_PATH} not found.")
+        if current is not None and current["stamp"] == stamp and not force:
             return None
-        return obj
-    else:
-        return obj
+
+        started = time.perf_counter()
+        if stamp[0] == OYO_CSV_PATH:
+            stamp = rebuild_oyo_binary() or stamp
+        print(f"Loading OYO dataset from {stamp[0]}...")
+        df = read_oyo_dataset(stamp[0])
+        print(f"Loaded {len(df)} hotels from static dataset.")
+
+        delta = diff_oyo_datasets(current["df"], df) if current is not None else None
+        if delta is None:
+            cities = build_oyo_city_index(df)
+            summary = {"mode": "full", "hotels": len(df)}
+            affected, removed = set(cities), set()
+        else:
+            changed, removed, affected = delta
+            cities = build_oyo_city_index(df, affected, current["cities"])
+            summary = {"mode": "delta", "hotels": len(df), "changed": len(changed),
+                       "removed": len(removed), "cities": sorted(affected)}
+
+        # Bring already-built derived indexes up to date before the swap
+        update_derived_indexes(cities, affected, removed)
+
+        oyo_snapshot = {"df": df, "stamp": stamp, "cities": cities}
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        print(f"OYO dataset swapped in: {summary}")
+        return summary
+
+def start_oyo_watcher(interval):
+    """
+    Starts a daemon thread that warms the dataset and its indexes right away
+    (unless a preloading master already did), then polls the file's mtime
+    every `interval` seconds and hot-reloads it.
+    """
+    def run():
+        while True:
+            try:
+                if startup["ready"]:
+                    reload_oyo_dataset()
+                else:
+                    warm_up()
+            except Exception as e:
+                print(f"OYO dataset reload failed: {e}")
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    threading.Thread(target=run, name="oyo-watcher", daemon=True).start()
+
+# ----------------------------
+# 4e. Helper: Typeahead Index
+# ----------------------------
+def suggest_city_info(cities, only=None):
+    """
+    City entries for the typeahead: every searchable CITY_CODES name and every
+    OYO city, flagged with live support and the OYO hotel count.
+    """
+    names = set(CITY_CODES) | set(cities) if only is None else {c for c in only if c in cities or c in CITY_CODES}
+    return {
+        name: {"live": name in CITY_CODES, "hotel_count": cities[name]["hotel_count"] if name in cities else 0}
+        for name in names
+    }
+
+def get_suggest_index():
+    """
+    Returns the typeahead index. On first use it is built from the city
+    names, the OYO dataset and every cached live offer in the offers store.
+    Later dataset reloads are applied by update_derived_indexes, live hotels
+    by add_live_to_suggest and sync_live_indexes.
+    """
+    global suggest_index
+    if suggest_index is not None:
+        return suggest_index
+    get_oyo_snapshot()  # Outside the locks: may trigger the first dataset load
+    # Under the reload lock, so a reload can't swap in another snapshot between
+    # reading its cities and publishing the index (its delta would be lost)
+    with oyo_reload_lock, suggest_lock:
+        if suggest_index is None:
+            cities = oyo_snapshot["cities"]
+            started = time.perf_counter()
+            index = SuggestIndex()
+            index.upsert_cities(suggest_city_info(cities))
+            for city_key, entry in cities.items():
+                index.upsert(entry["hotels"], city_key, "oyo")
+            # Cached offers are stored by city code; suggest them under its canonical name
+            for city_code in offers_store.cities():
+                try:
+                    index.upsert(offers_store.city_offers(city_code), CITY_NAMES.get(city_code, city_code), "live")
+                except Exception as e:
+                    print(f"Skipping cached {city_code} offers for typeahead index: {e}")
+            print(f"Typeahead index holds {len(index)} entries "
+                  f"(built in {time.perf_counter() - started:.3f}s).")
+            suggest_index = index
+        return suggest_index
+
+def add_live_to_suggest(city, hotels):
+    """Adds freshly fetched live hotels to the typeahead index."""
+    get_suggest_index().upsert(hotels, city, "live")
+
+# ----------------------------
+# 4f. Helper: Warm-up & Readiness
+# ----------------------------
+def warm_up():
+    """
+    Loads the OYO dataset and builds every derived index (similarity, geo,
+    typeahead), then marks this process ready for /ready. Runs in the
+    preloading gunicorn master before it forks, else in the watcher thread.
+    """
+    started = time.perf_counter()
+    reload_oyo_dataset()
+    get_similarity_index()
+    get_geo_index()
+    get_suggest_index()
+    startup["warmup_seconds"] = round(time.perf_counter() - started, 4)
+    startup["ready"] = True
+    print(f"Warm-up done in {startup['warmup_seconds']}s (pid {os.getpid()}).")
+
+# ----------------------------
+# 4g. Helper: Live Hotels in the Derived Indexes
+# ----------------------------
+# The worker that fetches a search adds its hotels to the indexes right away
+# (save_live_hotels). Every worker also reconciles its indexes with the
+# shared offers store whenever the store's version changes, so hotels other
+# workers fetched show up and hotels whose cached offers all expired go away.
+live_index_version = None
+index_maintenance = None
+index_maintenance_lock = threading.Lock()
+
+def live_offers_by_city():
+    """{city name: one row per hotelId} over every unexpired cached search."""
+    result = {}
+    for city_code in offers_store.cities():
+        rows = {}
+        for row in offers_store.city_offers(city_code):
+            if row.get("hotelId"):
+                rows[row["hotelId"]] = row
+        result[CITY_NAMES.get(city_code, city_code.lower())] = list(rows.values())
+    return result
+
+def sync_live_indexes(force=False):
+    """
+    Brings the live hotels in the similarity, geo and typeahead indexes in
+    line with the offers store, if the store changed since the last sync:
+    hotels no longer in any unexpired search (and not OYO hotels) are dropped,
+    the rest upserted. Returns True if it ran.
+    """
+    global live_index_version
+    version = offers_store.version()
+    if version == live_index_version and not force:
+        return False
+    live = live_offers_by_city()
+    keep = {h["hotelId"] for rows in live.values() for h in rows}
+
+    # Under the reload lock, so a dataset reload can't add OYO hotels missing from `keep`
+    with oyo_reload_lock:
+        if oyo_snapshot is not None:
+            keep.update(h["hotelId"] for entry in oyo_snapshot["cities"].values() for h in entry["hotels"])
+        with similarity_lock:
+            if similarity_index is not None:
+                changed = similarity_index.remove([hid for hid in similarity_index.hotel_ids() if hid not in keep])
+                for city, rows in live.items():
+                    changed += similarity_index.upsert(rows, city)
+                if changed:
+                    schedule_similarity_save()
+        with geo_lock:
+            if geo_index is not None:
+                geo_index.remove({hid for hid in geo_index.hotel_ids() if hid not in keep})
+                for city, rows in live.items():
+                    geo_index.upsert(rows, geo_city_key(city))
+        with suggest_lock:
+            if suggest_index is not None:
+                suggest_index.remove([hid for hid in suggest_index.hotel_ids("live") if hid not in keep])
+                for city, rows in live.items():
+                    suggest_index.upsert(rows, city, "live")
+    live_index_version = version
+    return True
+
+def start_index_maintenance():
+    """
+    Starts this worker's index threads (once per worker process): the live
+    sync every LIVE_INDEX_SYNC_INTERVAL seconds, and the similarity saver,
+    which writes the index at most once per SIMILAR_INDEX_SAVE_INTERVAL after
+    it changed, so live fetches and dataset reloads never wait on the file.
+    """
+    global index_maintenance
+    if index_maintenance is not None:
+        return
+    with index_maintenance_lock:
+        if index_maintenance is not None:
+            return
+        index_maintenance = []
+
+        def sync():
+            while True:
+                time.sleep(LIVE_INDEX_SYNC_INTERVAL)
+                try:
+                    if startup["ready"]:
+                        sync_live_indexes()
+                except Exception as e:
+                    print(f"Live index sync failed: {e}")
+
+        def save():
+            while True:
+                similarity_save_pending.wait()
+                time.sleep(SIMILAR_INDEX_SAVE_INTERVAL)
+                try:
+                    save_similarity_index()
+                except Exception as e:
+                    print(f"Saving similarity index failed: {e}")
+
+        for name, target, interval in (("live-index-sync", sync, LIVE_INDEX_SYNC_INTERVAL),
+                                       ("similarity-saver", save, SIMILAR_INDEX_SAVE_INTERVAL)):
+            if interval > 0:
+                thread = threading.Thread(target=target, name=name, daemon=True)
+                thread.start()
+                index_maintenance.append(thread)
+
+# ----------------------------
+# 5. Metrics & Timing Spans
+# ----------------------------
+metrics_registry = MetricsRegistry(METRICS_DIR)
+
+HTTP_REQUESTS = metrics_registry.counter(
+    "hotel_http_requests_total", "HTTP requests by route, method and status.", ("route", "method", "status"))
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "hotel_http_request_duration_seconds", "HTTP request latency by route.", ("route",))
+HTTP_RESPONSE_BYTES = metrics_registry.counter(
+    "hotel_http_response_bytes_total", "Response body bytes sent (after compression) by route.", ("route",))
+STAGE_SECONDS = metrics_registry.histogram(
+    "hotel_stage_duration_seconds", "Time spent in each fetch/serve stage.", ("stage",))
+UPSTREAM_CALLS = metrics_registry.counter(
+    "hotel_upstream_calls_total", "Amadeus API requests by caller and endpoint.", ("caller", "endpoint"))
+UPSTREAM_SECONDS = metrics_registry.histogram(
+    "hotel_upstream_duration_seconds", "Amadeus API request latency by endpoint.", ("endpoint",))
+CACHE_LOOKUPS = metrics_registry.counter(
+    "hotel_cache_lookups_total", "Cache lookups by cache and result (hit, stale, miss).", ("cache", "result"))
+
+def span(stage):
+    """Times a stage into hotel_stage_duration_seconds and the request's profile."""
+    return timed_span(STAGE_SECONDS, stage)
+
+def observe_request(route, method, status, seconds, nbytes):
+    """Records one served request (shared by the Flask and ASGI servers)."""
+    HTTP_REQUESTS.inc(route=route, method=method, status=status)
+    HTTP_REQUEST_SECONDS.observe(seconds, route=route)
+    HTTP_RESPONSE_BYTES.inc(nbytes, route=route)
+    if startup["first_response_seconds"] is None:
+        startup["first_response_seconds"] = round(time.perf_counter() - startup["started"], 4)
+
+def count_streamed_bytes(chunks, record):
+    """
+    Yields a streamed body's chunks, then calls record(bytes sent) once it
+    ends, fails or the client goes away (closing the inner iterator too).
+    """
+    sent = 0
+    try:
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+        record(sent)
+
+def profiling_requested(flag, admin_token):
+    """
+    True if a request asked for a Server-Timing profile (X-Profile header or
+    ?profile= value `flag`) and may have one.
+    """
+    if flag not in ("1", "true"):
+        return False
+    return PROFILING_ENABLED or bool(ADMIN_TOKEN and admin_token == ADMIN_TOKEN)
 
 # ----------------------------
 # 6. Helper: Calculate Final Rating
 # ----------------------------
-def calculate_final_rating(raw_rating, property_type, hotel_name=None):
+# Luxury brands that get a small rating boost (matched anywhere in the name)
+POPULAR_BRANDS = [
+    "taj", "oberoi", "leela", "ritz carlton", "conrad", "fairmont",
+    "marriott", "hilton", "hyatt", "novotel", "holiday inn", "intercontinental",
+    "crowne plaza", "westin", "jw marriott"
+]
+BRAND_PATTERN = "|".join(re.escape(b) for b in POPULAR_BRANDS)  # One alternation, run by Arrow's RE2
+
+# Fallback rating when the hotel has no usable 0-5 rating
+PROPERTY_TYPE_RATINGS = {
+    'hotel': 4.0,
+    'apartment': 3.5,
+    'hostel': 2.5,
+    'resort': 4.5,
+    'villa': 4.0
+}
+DEFAULT_PROPERTY_RATING = 3.0
+BRAND_BOOST = 0.2
+NOISE_AMPLITUDE = 0.1
+
+def as_string_array(values):
+    """Converts a column (list, Series or Arrow array) to a null-free Arrow string array."""
+    import pandas as pd
+    import pyarrow as pa
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if not isinstance(values, pa.Array):
+        series = pd.Series(values, dtype=object)
+        try:
+            values = pa.array(series, type=pa.string(), from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            values = pa.array([v if v is None else str(v) for v in series.where(series.notna(), None)],
+                              type=pa.string())
+    return values.cast(pa.string()).fill_null("")
+
+def hash_strings(values):
+    """
+    64-bit FNV-1a hash of each string in a null-free Arrow string array, the
+    same in every process. Vectorized over the array's UTF-8 buffer: one
+    NumPy pass per character position instead of a Python call per string.
     """
-    Generates a consistent 0-5 scale 'Final_rating' for each hotel.
+    import numpy as np
+    import pyarrow as pa
+    values = values.cast(pa.large_string())  # 64-bit offsets
+    _, offsets, data = values.buffers()
+    starts = np.frombuffer(offsets, dtype=np.int64, count=len(values) + 1, offset=values.offset * 8)
+    lengths = np.diff(starts)
+    data = np.frombuffer(data, dtype=np.uint8) if data is not None and data.size else np.zeros(1, np.uint8)
+    last = len(data) - 1
+    hashes = np.full(len(values), 0xcbf29ce484222325, dtype=np.uint64)
+    prime = np.uint64(0x100000001b3)
+    with np.errstate(over="ignore"):
+        for i in range(int(lengths.max(initial=0))):
+            step = (hashes ^ data.take(np.minimum(starts[:-1] + i, last))) * prime
+            hashes = np.where(lengths > i, step, hashes)
+    return hashes
+
+def calculate_final_ratings(raw_ratings, property_types, hotel_names, hotel_ids):
+    """
+    Vectorized 0-5 scale 'Final_rating' for whole columns of hotels.
 
     Steps:
         - Use given rating if already 0-5
         - Else assign default rating per property_type
-        - Boost score slightly for popular luxury brands
-        - Add tiny randomness to avoid ties
+        - Boost score slightly for popular luxury brands (one regex over the column)
+        - Add tiny tie-break noise seeded from hotelId, so the same hotel
+          always gets the same score in every worker and cache
+        - Clamp to 0-5
+
+    Returns:
+        np.ndarray: final ratings (float64, 2 decimals)
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow.compute as pc
+    raw = pd.to_numeric(pd.Series(raw_ratings), errors="coerce").to_numpy(dtype="float64")
+    valid = (raw >= 0) & (raw <= 5)
+
+    # Fallback per property type: look up each distinct type once
+    prop = pc.utf8_lower(as_string_array(property_types)).dictionary_encode()
+    type_scores = np.array([PROPERTY_TYPE_RATINGS.get(t, DEFAULT_PROPERTY_RATING)
+                            for t in prop.dictionary.to_pylist()] or [0.0])
+    base = np.where(valid, raw, type_scores[prop.indices.to_numpy(zero_copy_only=False)])
+
+    is_brand = pc.match_substring_regex(as_string_array(hotel_names), BRAND_PATTERN, ignore_case=True).to_numpy(zero_copy_only=False)
+    boost = np.where(is_brand, BRAND_BOOST, 0.0)
+
+    # Stable hash of each hotelId → uniform noise in [-NOISE_AMPLITUDE, NOISE_AMPLITUDE)
+    hashes = hash_strings(as_string_array(hotel_ids))
+    noise = (hashes / 2.0 ** 64 * 2 - 1) * NOISE_AMPLITUDE
+
+    return np.round(np.clip(base + boost + noise, 0, 5), 2)
+
+def calculate_final_rating(raw_rating, property_type, hotel_name=None, hotel_id=None):
+    """
+    Single-hotel wrapper around calculate_final_ratings.
+    Noise is seeded from `hotel_id` (or the name when no ID is given).
 
     Returns:
         float: final rating between 0 and 5
     """
-    popular_brands = [
-        "taj", "oberoi", "leela", "ritz carlton", "conrad", "fairmont",
-        "marriott", "hilton", "hyatt", "novotel", "holiday inn", "intercontinental",
-        "crowne plaza", "westin", "jw marriott"
-    ]
+    seed = hotel_id if hotel_id is not None else (hotel_name or "")
+    return float(calculate_final_ratings([raw_rating], [property_type], [hotel_name], [seed])[0])
+
+# ----------------------------
+# 6a. Amadeus API: Pooled HTTP Session
+# ----------------------------
+def create_amadeus_session():
+    """
+    Builds a requests.Session shared by all Amadeus calls.
 
+    - Keep-alive connection pool sized by AMADEUS_POOL_SIZE (no TLS handshake per call)
+    - Retries on 429/5xx with exponential backoff + jitter, honoring Retry-After
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=AMADEUS_MAX_RETRIES,
+        connect=AMADEUS_MAX_RETRIES,
+        read=AMADEUS_MAX_RETRIES,
+        status=AMADEUS_MAX_RETRIES,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],  # Token POST is safe to repeat
+        backoff_factor=AMADEUS_BACKOFF_FACTOR,
+        backoff_jitter=AMADEUS_BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the final response back so raise_for_status() reports it
+    )
+    adapter = HTTPAdapter(pool_connections=AMADEUS_POOL_SIZE, pool_maxsize=AMADEUS_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# Created on the first Amadeus call, and again in a forked worker: pooled
+# connections must never be shared between processes
+amadeus_session = None
+amadeus_session_pid = None
+amadeus_session_lock = threading.Lock()
+
+def get_amadeus_session():
+    global amadeus_session, amadeus_session_pid
+    with amadeus_session_lock:
+        if amadeus_session is None or amadeus_session_pid != os.getpid():
+            amadeus_session, amadeus_session_pid = create_amadeus_session(), os.getpid()
+        return amadeus_session
+
+# Upstream calls are counted per caller ("user", "prefetch", "revalidate"). The caller
+# is a context variable so offer batches running in the thread pool inherit it.
+upstream_caller = contextvars.ContextVar("upstream_caller", default="user")
+
+def upstream_endpoint(url):
+    """Metric label for an Amadeus URL: its last path segment (token, by-city, hotel-offers)."""
+    return url.rsplit("/", 1)[-1]
+
+def upstream_call_counts():
+    """Upstream calls made by this worker, per caller."""
+    return UPSTREAM_CALLS.totals_by("caller")
+
+def observe_upstream(url, seconds):
+    """Records one Amadeus request (also called by the async client in asgi.py)."""
+    endpoint = upstream_endpoint(url)
+    UPSTREAM_CALLS.inc(caller=upstream_caller.get(), endpoint=endpoint)
+    UPSTREAM_SECONDS.observe(seconds, endpoint=endpoint)
+
+def amadeus_request(method, url, **kwargs):
+    """
+    Sends a request through the pooled Amadeus session with connect/read timeouts,
+    so a hung upstream can no longer tie up a worker indefinitely.
+    """
+    kwargs.setdefault("timeout", (AMADEUS_CONNECT_TIMEOUT, AMADEUS_READ_TIMEOUT))
+    start = time.perf_counter()
     try:
-        rating = float(raw_rating)
-        if 0 <= rating <= 5:
-            base = rating
-        else:
-            base = None
-    except Exception:
-        base = None
-
-    # Fallback rating based on property type
-    if base is None:
-        prop_score_map = {
-            'hotel': 4.0,
-            'apartment': 3.5,
-            'hostel': 2.5,
-            'resort': 4.5,
-            'villa': 4.0
-        }
-        base = prop_score_map.get((property_type or "").lower(), 3.0)
-
-    # Add brand boost
-    boost = 0.0
-    if hotel_name:
-        name = hotel_name.lower()
-        for brand in popular_brands:
-            if brand in name:
-                boost = 0.2
-                break
-
-    # Add tiny random noise
-    noise = random.uniform(-0.1, 0.1)
-
-    final_rating = base + boost + noise
-    # Clamp between 0 and 5
-    final_rating = max(0, min(5, final_rating))
-
-    return round(final_rating, 2)
+        return get_amadeus_session().request(method, url, **kwargs)
+    finally:
+        observe_upstream(url, time.perf_counter() - start)
 
 # ----------------------------
 # 7. Amadeus API: Auth Token
 # ----------------------------
-def get_amadeus_access_token(api_key, api_secret):
+AMADEUS_TOKEN_URL = f"{AMADEUS_BASE_URL}/v1/security/oauth2/token"
+
+# Refresh the cached token this many seconds before Amadeus says it expires
+AMADEUS_TOKEN_REFRESH_MARGIN = int(os.getenv("AMADEUS_TOKEN_REFRESH_MARGIN", "60"))
+
+def request_amadeus_token(api_key, api_secret):
     """
-    Requests an access token from Amadeus API using OAuth2 client credentials.
-    The returned token is required for all further Amadeus requests.
+    Requests a new access token from Amadeus API using OAuth2 client credentials.
+
+    Returns:
+        tuple: (token, expires_in seconds)
     """
     print("Requesting Amadeus access token...")
-    url = "https://test.api.amadeus.com/v1/security/oauth2/token"
     data = {'grant_type': 'client_credentials', 'client_id': api_key, 'client_secret': api_secret}
 
-    resp = requests.post(url, data=data)
+    resp = amadeus_request("POST", AMADEUS_TOKEN_URL, data=data)
     resp.raise_for_status()
 
-    token = resp.json().get("access_token")
+    body = resp.json()
+    token = body.get("access_token")
     if not token:
         raise Exception("Failed to get Amadeus access token")
     print("Access token acquired")
-    return token.strip()
+    return token.strip(), int(body.get("expires_in", 1799))
+
+class AmadeusTokenManager(TokenCache):
+    """
+    Caches the Amadeus access token per process and refreshes it shortly
+    before it expires. Refreshes happen under a lock, so concurrent callers
+    share one in-flight token request instead of each fetching their own.
+    The async client (asgi.py) reads and refreshes the same cache.
+    """
+
+    def __init__(self, api_key, api_secret, margin=AMADEUS_TOKEN_REFRESH_MARGIN):
+        super().__init__(margin)
+        self.api_key = api_key
+        self.api_secret = api_secret
+
+    def get_token(self):
+        """Returns a valid token, fetching a new one only if needed."""
+        token = self.cached()
+        if token:
+            return token
+        with self.refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            token = self.cached()
+            if token:
+                return token
+            token, expires_in = request_amadeus_token(self.api_key, self.api_secret)
+            self.store(token, expires_in)
+            return token
+
+amadeus_tokens = AmadeusTokenManager(AMADEUS_API_KEY, AMADEUS_API_SECRET)
+
+def get_amadeus_access_token():
+    """
+    Returns the process-wide cached Amadeus access token.
+    The returned token is required for all further Amadeus requests.
+    """
+    return amadeus_tokens.get_token()
+
+# ----------------------------
+# 7a. Amadeus API: Authorized GET
+# ----------------------------
+def amadeus_get(url, params, token):
+    """
+    GETs an Amadeus endpoint with a bearer token. On a 401 the token is
+    invalidated and the request is retried once with a fresh token.
+
+    Returns:
+        dict: decoded JSON response
+    """
+    token = token or amadeus_tokens.get_token()
+    resp = amadeus_request("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    if resp.status_code == 401:
+        print("Amadeus token rejected, re-authenticating...")
+        amadeus_tokens.invalidate(token)
+        token = amadeus_tokens.get_token()
+        resp = amadeus_request("GET", url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    resp.raise_for_status()
+    return resp.json()
 
 # ----------------------------
 # 8. Amadeus API: Get Hotels List
 # ----------------------------
-def get_hotel_list(city_code, token):
+def get_hotel_list(city_code, token=None):
     """
     Fetches a list of hotels in a given city from Amadeus API.
     Returns basic metadata like name, address, coordinates, but no prices.
     """
     print(f"Fetching hotel list for city code: {city_code}")
-    url = "https://test.api.amadeus.com/v1/reference-data/locations/hotels/by-city"
-    headers = {"Authorization": f"Bearer {token}"}
+    url = f"{AMADEUS_BASE_URL}/v1/reference-data/locations/hotels/by-city"
     params = {"cityCode": city_code}
 
-    resp = requests.get(url, headers=headers, params=params)
-    resp.raise_for_status()
-    data = resp.json()
+    amadeus_limiter.acquire()  # Shared Amadeus rate limit (see section 9a)
+    data = amadeus_get(url, params, token)
     hotels = data.get("data", [])
     print(f"Fetched {len(hotels)} hotels")
     return hotels
@@ -235,8 +1114,7 @@ def get_hotel_offers_batch(hotel_ids, checkin, checkout, token, adults):
     Fetches prices and availability for multiple hotels by their IDs in one API call.
     """
     print(f"Querying hotel offers batch size {len(hotel_ids)}")
-    url = "https://test.api.amadeus.com/v3/shopping/hotel-offers"
-    headers = {"Authorization": f"Bearer {token}"}
+    url = f"{AMADEUS_BASE_URL}/v3/shopping/hotel-offers"
     params = {
         "hotelIds": ",".join(hotel_ids),
         "adults": adults,
@@ -244,12 +1122,169 @@ def get_hotel_offers_batch(hotel_ids, checkin, checkout, token, adults):
         "checkOutDate": checkout,
     }
 
-    resp = requests.get(url, headers=headers, params=params)
-    resp.raise_for_status()
-    data = resp.json()
+    data = amadeus_get(url, params, token)
     print(f"Received {len(data.get('data', []))} offers")
     return data
 
+# ----------------------------
+# 9a. Amadeus Rate Limiter (Token Bucket)
+# ----------------------------
+def make_amadeus_limiter():
+    """The limiter for AMADEUS_RATE_SCOPE (see section 3)."""
+    if AMADEUS_RATE_SCOPE == "process":
+        return TokenBucket(AMADEUS_RATE_PER_SEC / max(1, WEB_CONCURRENCY), AMADEUS_RATE_BURST)
+    return SharedTokenBucket(AMADEUS_RATE_DB, AMADEUS_RATE_PER_SEC, AMADEUS_RATE_BURST)
+
+# One limiter per process, shared by every Amadeus call (sync and async clients)
+amadeus_limiter = make_amadeus_limiter()
+
+def iter_offer_batches(hotel_ids, checkin, checkout, token, adults, batch_size=20):
+    """
+    Requests offers for all `hotel_ids` in batches of `batch_size`, sending the
+    batches concurrently through a thread pool under the shared rate limiter,
+    and yields each batch's offer entries (its 'data' array) as it completes.
+
+    A failed batch is logged and skipped so the other batches still return;
+    only if every batch fails is the first error re-raised. Closing the
+    generator early (e.g. a streaming client went away) stops batches that
+    have not been sent yet; requests already in flight finish and are dropped.
+    """
+    batches = [hotel_ids[i: i + batch_size] for i in range(0, len(hotel_ids), batch_size)]
+    if not batches:
+        return
+    cancelled = threading.Event()
+
+    def run(batch):
+        amadeus_limiter.acquire()
+        if cancelled.is_set():
+            return {}
+        with span("offer_batch"):
+            return get_hotel_offers_batch(batch, checkin, checkout, token, adults)
+
+    errors = []
+    pool = ThreadPoolExecutor(max_workers=min(AMADEUS_MAX_WORKERS, len(batches)))
+    try:
+        futures = [pool.submit(contextvars.copy_context().run, run, b) for b in batches]
+        for fut in as_completed(futures):
+            try:
+                data = fut.result().get('data', [])
+            except Exception as e:
+                print(f"Offer batch failed: {e}")
+                errors.append(e)
+                continue
+            yield data
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if len(errors) == len(batches):
+        raise errors[0]
+
+def fetch_offers_parallel(hotel_ids, checkin, checkout, token, adults, batch_size=20):
+    """
+    Collects iter_offer_batches into one list.
+
+    Returns:
+        list: offer entries (the 'data' arrays of all successful batches)
+    """
+    offers = []
+    for data in iter_offer_batches(hotel_ids, checkin, checkout, token, adults, batch_size):
+        offers.extend(data)
+    return offers
+
+# ----------------------------
+# 9b. Two-tier Live Cache: Hotel Directory + Offers
+# ----------------------------
+def hotel_list_cache_path(city_code):
+    """On-disk location of the long-TTL hotel directory for a city code."""
+    return cache_store.path(f'hotel_list_{city_code}.json')
+
+def offers_lock_path(key):
+    """
+    Lock file serializing fetches of one search (city code, dates, adults) across
+    workers. One of OFFERS_LOCK_STRIPES fixed files, picked by a stable hash of
+    the key; two searches on the same stripe just wait for each other.
+    """
+    stripe = zlib.crc32("_".join(map(str, key)).encode("utf-8")) % OFFERS_LOCK_STRIPES
+    return cache_store.lock_path(f"offers_{stripe}")
+
+def is_fresh(path, ttl):
+    """True if `path` exists and was written less than `ttl` seconds ago."""
+    try:
+        return time.time() - os.path.getmtime(path) < ttl
+    except OSError:
+        return False
+
+def write_file_atomic(path, write, binary=False):
+    """
+    Writes a file via a temp file + rename so readers (other workers included)
+    never see a half-written cache file. `write` receives the open file
+    (text by default, bytes if `binary`).
+    """
+    dir_name = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_name, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        if binary:
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', newline='', encoding='utf-8')
+        with f:
+            write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def read_cached_hotel_list(city_code):
+    """
+    Returns the hotel directory for `city_code` from memory or the shared JSON
+    file if it is younger than HOTEL_LIST_TTL, else None.
+    """
+    now = time.time()
+    with hotel_list_lock:
+        entry = hotel_list_cache.get(city_code)
+    if entry and now - entry[0] < HOTEL_LIST_TTL:
+        return entry[1]
+
+    path = hotel_list_cache_path(city_code)
+    if is_fresh(path, HOTEL_LIST_TTL):
+        try:
+            with open(path, encoding='utf-8') as f:
+                hotels = json.load(f)
+            cache_store.touch(path)
+            with hotel_list_lock:
+                hotel_list_cache[city_code] = (os.path.getmtime(path), hotels)
+            print(f"Loaded cached hotel list for {city_code} ({len(hotels)} hotels)")
+            return hotels
+        except Exception as e:
+            print(f"Failed to read hotel list cache {path}: {e}")
+    return None
+
+def store_hotel_list(city_code, hotels):
+    """Saves a freshly fetched hotel directory to the JSON file and memory."""
+    if not hotels:
+        return
+    path = hotel_list_cache_path(city_code)
+    write_file_atomic(path, lambda f: json.dump(hotels, f))
+    cache_store.record(path, f"hotel_list:{city_code}", HOTEL_LIST_TTL)
+    with hotel_list_lock:
+        hotel_list_cache[city_code] = (time.time(), hotels)
+
+def get_cached_hotel_list(city_code, token=None):
+    """
+    Returns the Amadeus hotel directory for `city_code`, served from memory,
+    then from the shared JSON file, and only fetched upstream when both are
+    older than HOTEL_LIST_TTL.
+    """
+    hotels = read_cached_hotel_list(city_code)
+    CACHE_LOOKUPS.inc(cache="hotel_list", result="miss" if hotels is None else "hit")
+    if hotels is not None:
+        return hotels
+    hotels = get_hotel_list(city_code, token)
+    store_hotel_list(city_code, hotels)
+    return hotels
+
 # ----------------------------
 # 10. Pick a Random Subset of Hotels
 # ----------------------------
@@ -265,75 +1300,227 @@ def pick_hotels(all_hotels, sample_size=60):
     return sampled
 
 # ----------------------------
-# 11. Delete Old Cache CSVs
+# 11. Live Cache Store (Manifest + Background Eviction)
 # ----------------------------
-def delete_old_csvs(city_code, current_checkin, current_checkout):
+@contextmanager
+def file_lock(path):
     """
-    Deletes previously cached CSV files for the same city but with different date ranges.
+    Exclusive advisory lock on `path`, shared by all gunicorn workers on the host.
+    Falls back to no cross-process locking where fcntl is unavailable.
     """
-    pattern = f'hotels_{city_code}_*.csv'
-    csv_files = glob.glob(pattern)
-    for file in csv_files:
-        parts = file.rstrip('.csv').split('_')
-        if len(parts) < 4:
-            continue
-        file_checkin = parts[-2]
-        file_checkout = parts[-1]
-        if file_checkin != current_checkin or file_checkout != current_checkout:
-            try:
-                os.remove(file)
-                print(f"Deleted old CSV file: {file}")
-            except Exception as e:
-                print(f"Failed to delete {file}: {e}")
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
 
-# ============================
-# 12. Main Fetch-Orchestrator
-# ============================
-def fetch_and_cache_hotels(city, checkin_date, checkout_date, adults):
+class CacheStore:
     """
-    Orchestrates fetching live hotel data from Amadeus for a city and date range.
+    Directory of live cache files with a JSON manifest that indexes each file
+    by name: cache key, size, created time, TTL and last access.
 
-    Steps:
-        1. Convert city name to Amadeus city code.
-        2. Get short-lived access token.
-        3. Fetch complete hotel list for city.
-        4. Randomly pick up to 60 hotels.
-        5. Request offers (prices/availability) in batches (20 at a time).
-        6. Merge "hotel info" + "offers" into single data structure.
-        7. Clean invalid values (NaN, inf → None).
-        8. Calculate a consistent 0-5 'Final_rating'.
-        9. Save processed list to a CSV cache for reuse.
-        10. Return the processed list.
+    Eviction never runs on the request path. A background sweeper drops
+    expired entries, then evicts least-recently-used ones until the total
+    size fits in `max_bytes`. Last-access times are kept in memory per
+    worker and merged into the manifest on each sweep.
     """
-    city_code = CITY_CODES[city]  # Map city to Amadeus code
 
-    # 1. Authenticate to Amadeus
-    token = get_amadeus_access_token(AMADEUS_API_KEY, AMADEUS_API_SECRET)
+    MANIFEST = 'manifest.json'
 
-    # 2. Fetch base hotel list (no prices yet)
-    hotels = get_hotel_list(city_code, token)
-    if not hotels:
-        raise Exception(f"No hotels found for city '{city}'.")
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.accessed = {}  # name -> last access time (this worker, not yet flushed)
+        self.lock = threading.Lock()
+        self.sweeper = None
+        os.makedirs(root, exist_ok=True)
 
-    # 3. Pick max 60 hotels randomly to reduce API calls
-    selected = pick_hotels(hotels, sample_size=60)
-    hotel_ids = [h['hotelId'] for h in selected if 'hotelId' in h]
+    def path(self, name):
+        return os.path.join(self.root, name)
 
-    # Batch config for offers requests
-    batch_size = 20   # API call will contain max 20 hotel IDs
-    offers = []       # List to store offers data
-    idx = 0
-    max_ids = 60
-    hotel_ids = hotel_ids[:max_ids]  # Safety cap
+    def lock_path(self, name):
+        return os.path.join(self.root, f'.{os.path.basename(name)}.lock')
+
+    def _load_manifest(self):
+        try:
+            with open(self.path(self.MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        write_file_atomic(self.path(self.MANIFEST), lambda f: json.dump(manifest, f))
+
+    def record(self, path, key, ttl):
+        """Adds or replaces the manifest entry for a freshly written cache file."""
+        name = os.path.basename(path)
+        now = time.time()
+        with file_lock(self.lock_path(self.MANIFEST)):
+            manifest = self._load_manifest()
+            manifest[name] = {
+                "key": key,
+                "size": os.path.getsize(path),
+                "created": now,
+                "ttl": ttl,
+                "last_access": now,
+            }
+            self._save_manifest(manifest)
+
+    def entries(self, key_prefix=""):
+        """Lists (path, key) for indexed files whose cache key starts with `key_prefix`."""
+        return [(self.path(name), e["key"]) for name, e in self._load_manifest().items()
+                if e["key"].startswith(key_prefix) and os.path.exists(self.path(name))]
+
+    def version(self, key_prefix=""):
+        """
+        Changes whenever an entry under `key_prefix` is written, expires or is
+        removed: (count, summed created time) of the unexpired entries.
+        """
+        now = time.time()
+        live = [e["created"] for e in self._load_manifest().values()
+                if e["key"].startswith(key_prefix) and now - e["created"] < e["ttl"]]
+        return len(live), round(sum(live), 6)
+
+    def touch(self, path):
+        """Notes a cache hit; flushed to the manifest by the next sweep."""
+        with self.lock:
+            self.accessed[os.path.basename(path)] = time.time()
+
+    def sweep(self):
+        """
+        Drops expired/missing entries, then evicts LRU entries until the
+        store fits in the disk budget. Returns the number of files removed.
+        """
+        with self.lock:
+            accessed, self.accessed = self.accessed, {}
+        now = time.time()
+        removed = []
+        with file_lock(self.lock_path(self.MANIFEST)):
+            manifest = self._load_manifest()
+            for name, ts in accessed.items():
+                if name in manifest:
+                    manifest[name]["last_access"] = max(manifest[name]["last_access"], ts)
+
+            for name, entry in list(manifest.items()):
+                if not os.path.exists(self.path(name)) or now - entry["created"] >= entry["ttl"]:
+                    removed.append(name)
+                    del manifest[name]
+
+            total = sum(e["size"] for e in manifest.values())
+            for name in sorted(manifest, key=lambda n: manifest[n]["last_access"]):
+                if total <= self.max_bytes:
+                    break
+                total -= manifest[name]["size"]
+                removed.append(name)
+                del manifest[name]
+
+            for name in removed:
+                try:
+                    os.remove(self.path(name))
+                    print(f"Evicted cache file: {name}")
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"Failed to delete {name}: {e}")
+            self._save_manifest(manifest)
+        return len(removed)
+
+    def start_sweeper(self, interval):
+        """Starts the background eviction thread (once per worker process)."""
+        with self.lock:
+            if self.sweeper is not None or interval <= 0:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.sweep()
+                    except Exception as e:
+                        print(f"Cache sweep failed: {e}")
+
+            self.sweeper = threading.Thread(target=run, name="cache-sweeper", daemon=True)
+            self.sweeper.start()
+
+cache_store = CacheStore(LIVE_CACHE_DIR, LIVE_CACHE_MAX_BYTES)
+
+# ----------------------------
+# 11a. Live Offers Store (pluggable backend)
+# ----------------------------
+# Processed offers per search, keyed by (city_code, checkin, checkout, adults).
+# Backends provide: read(key, max_age) → (rows, written_at) | None,
+# written_at(key), write(key, df, ttl) (atomic), cities(), city_offers(city_code),
+# version() (changes whenever a search is written, expires or is evicted) and
+# start_sweeper(interval). SQLiteOffersStore lives in sqlite_store.py.
+class FileOffersStore:
+    """One typed Feather file per search in the CacheStore directory, indexed by its manifest."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def path(self, key):
+        city_code, checkin, checkout, adults = key
+        return self.store.path(f'hotels_{city_code}_{checkin}_{checkout}_{adults}.feather')
+
+    def written_at(self, key):
+        try:
+            return os.path.getmtime(self.path(key))
+        except OSError:
+            return None
+
+    def read(self, key, max_age=None):
+        path = self.path(key)
+        written_at = self.written_at(key)
+        if written_at is None or (max_age is not None and time.time() - written_at >= max_age):
+            return None
+        self.store.touch(path)
+        return frame_to_records(read_table(path)), written_at
+
+    def write(self, key, df, ttl):
+        path = self.path(key)
+        write_file_atomic(path, lambda f: write_table(df, f, LIVE_SCHEMA), binary=True)
+        self.store.record(path, "offers:" + ":".join(map(str, key)), ttl)
+
+    def cities(self):
+        return sorted({key.split(":")[1] for _, key in self.store.entries("offers:")})
 
-    # 4. Fetch offers in batches
-    while idx < len(hotel_ids):
-        batch = hotel_ids[idx: idx + batch_size]
-        data = get_hotel_offers_batch(batch, checkin_date, checkout_date, token, adults)
-        offers.extend(data.get('data', []))
-        idx += batch_size
-        time.sleep(1.0)  # Pause to avoid hitting API rate limits
+    def version(self):
+        return self.store.version("offers:")
 
+    def city_offers(self, city_code):
+        rows = []
+        for path, key in self.store.entries(f"offers:{city_code}:"):
+            _, _, checkin, checkout, adults = key.split(":")
+            extra = {"checkin_date": checkin, "checkout_date": checkout, "adults": int(adults)}
+            rows.extend(dict(extra, **r) for r in frame_to_records(read_table(path)))
+        return rows
+
+    def start_sweeper(self, interval):
+        pass  # The files are swept with the rest of the CacheStore
+
+    def close(self):
+        pass  # No open handles between calls
+
+def create_offers_store(backend):
+    if backend == "files":
+        return FileOffersStore(cache_store)
+    if backend == "sqlite":
+        return SQLiteOffersStore(LIVE_CACHE_DB, LIVE_CACHE_MAX_BYTES)
+    raise ValueError(f"Unknown LIVE_CACHE_BACKEND '{backend}' (use 'sqlite' or 'files')")
+
+offers_store = create_offers_store(LIVE_CACHE_BACKEND)
+
+# ============================
+# 12. Main Fetch-Orchestrator
+# ============================
+def merge_hotel_offers(hotels, offers):
+    """
+    Merges the hotel directory (`hotels`) with Amadeus offer entries into one
+    dict per hotel with an offer. Shared by the sync and async fetch paths.
+    """
     # 5. Map hotelId → hotel info from base list for quick lookup
     hotel_map = {h['hotelId']: h for h in hotels}
 
@@ -376,95 +1563,1146 @@ def fetch_and_cache_hotels(city, checkin_date, checkout_date, adults):
             merged[hid]["Price"] = price_info.get("total")
             merged[hid]["Currency"] = price_info.get("currency")
 
-    # 7. Convert to list for cleaning and rating calculation
-    hotel_list = list(merged.values())
-    hotel_list = recursively_clean(hotel_list)  # Clean NaN, Inf
-
-    # 8. Calculate consistent 0–5 final rating for each hotel
-    for h in hotel_list:
-        h["Final_rating"] = calculate_final_rating(h.get("Rating"), h.get("Property_type"), h.get("Hotel_name"))
-
-    # 9. Save processed data to CSV cache
-    csv_filename = f'hotels_{city_code}_{checkin_date}_{checkout_date}.csv'
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            'hotelId', 'Hotel_name', 'Address', 'Latitude', 'Longitude',
-            'Property_type', 'Room_status', 'Price', 'Currency',
-            'Rating', 'Final_rating'
-        ])
-        writer.writeheader()
-        writer.writerows(hotel_list)
+    return list(merged.values())
 
-    # 10. Return to caller
-    return hotel_list
+def score_live_hotels(merged):
+    """
+    Types merged hotel dicts into LIVE_SCHEMA columns and adds Final_rating.
+    Scores are per hotel, so batches can be scored separately (streaming).
+    """
+    import pandas as pd
+    with span("scoring"):
+        # 7. Convert to typed columns (parses Price/Rating/coords, invalid → NaN)
+        df = apply_schema(pd.DataFrame(merged), LIVE_SCHEMA)
 
+        # 8. Calculate consistent 0–5 final rating for all hotels in one vectorized pass
+        df["Final_rating"] = calculate_final_ratings(df["Rating"], df["Property_type"], df["Hotel_name"], df["hotelId"])
+    return df
 
-# ============================
-# 13. ROUTES
-# ============================
+def combine_scored(frames):
+    """One frame from per-batch score_live_hotels results (empty frame if none)."""
+    import pandas as pd
+    return pd.concat(frames, ignore_index=True) if frames else score_live_hotels([])
 
-@app.route('/live_recommend', methods=['POST'])
-def live_recommend():
+def store_live_hotels(city, checkin_date, checkout_date, adults, merged):
     """
-    Live hotel recommendations.
-    - Checks for cached results (city+dates CSV)
-    - If found → returns cached
-    - If not → fetches from Amadeus, caches, and returns
+    Types and scores merged hotels, writes them to the offers cache and adds
+    them to the similarity/geo/typeahead indexes. Returns the typed rows a
+    cache hit would return. CPU-bound; the async server runs it in a worker
+    thread.
     """
-    data = request.get_json()
-    print(f"live_recommend called with data: {data}")
-    if not data:
-        return jsonify({"error": "No JSON body received"}), 400
-
-    # Extract required fields
-    city = data.get("city")
-    checkin = data.get("checkin_date")
-    checkout = data.get("checkout_date")
-    adults = data.get("adults", 1)
-
-    # City validation
-    if not city or city.lower() not in CITY_CODES:
-        return jsonify({"error": "Invalid or unsupported city"}), 400
-    if not checkin or not checkout:
-        return jsonify({"error": "Please provide valid 'checkin_date' and 'checkout_date'"}), 400
+    return save_live_hotels(city, checkin_date, checkout_date, adults, score_live_hotels(merged))
 
-    city = city.lower()
-    adults = int(adults)
+def save_live_hotels(city, checkin_date, checkout_date, adults, df):
+    """Writes scored hotels (score_live_hotels) to the offers cache and indexes; returns their rows."""
     city_code = CITY_CODES[city]
 
-    # Clean up old cache files for city with other dates
-    try:
-        delete_old_csvs(city_code, checkin, checkout)
-    except Exception as e:
-        print(f"Error cleaning cache files: {e}")
+    # 9. Save processed data to the offers store (atomic replace)
+    with span("cache_write"):
+        offers_store.write((city_code, checkin_date, checkout_date, adults), df, OFFERS_CACHE_TTL + OFFERS_STALE_TTL)
+
+    # Return the same typed rows a cache hit would return
+    hotel_list = frame_to_records(df)
 
-    # Check cache
-    csv_filename = f'hotels_{city_code}_{checkin}_{checkout}.csv'
-    if os.path.exists(csv_filename):
+    # Make the new hotels available to /similar_hotels, the nearby search and /suggest
+    with span("index_update"):
         try:
-            df = pd.read_csv(csv_filename)
-            df = df.where(pd.notnull(df), None)    # Replace NaN with None
-            hotels = df.to_dict(orient='records')
-            hotels = recursively_clean(hotels)
-            return jsonify({
-                "message": "Loaded cached data",
-                "hotel_count": len(hotels),
-                "hotels": hotels,
-                "from_cache": True,
-            })
+            city_name = CITY_NAMES[city_code]
+            add_live_to_similarity(city_name, hotel_list)
+            add_live_to_geo(city_name, hotel_list)
+            add_live_to_suggest(city_name, hotel_list)
         except Exception as e:
-            print(f"Failed to read cache file: {e}")
+            print(f"Failed to update hotel indexes: {e}")
 
-    # No cache → fetch fresh
-    try:
-        hotel_list = fetch_and_cache_hotels(city, checkin, checkout, adults)
-        return jsonify({
-            "message": f"Found {len(hotel_list)} hotels with offers.",
-            "hotel_count": len(hotel_list),
-            "hotels": hotel_list,
-            "from_cache": False,
-        })
-    except Exception as exc:
+    return hotel_list
+
+def fetch_and_cache_hotels(city, checkin_date, checkout_date, adults):
+    """
+    Orchestrates fetching live hotel data from Amadeus for a city and date range.
+
+    Steps:
+        1. Convert city name to Amadeus city code.
+        2. Get access token (cached, refreshed before expiry).
+        3. Fetch complete hotel list for city (long-TTL directory cache).
+        4. Randomly pick up to 60 hotels.
+        5. Request offers (prices/availability) in parallel batches (20 at a time).
+        6. Merge "hotel info" + "offers" into single data structure.
+        7. Clean invalid values (NaN, inf → None).
+        8. Calculate a consistent 0-5 'Final_rating' (vectorized, deterministic).
+        9. Save processed list to a short-TTL binary cache (city, dates, adults).
+        10. Return the processed list.
+    """
+    city_code = CITY_CODES[city]  # Map city to Amadeus code
+
+    # 1. Authenticate to Amadeus (cached per process until shortly before expiry)
+    with span("token"):
+        token = get_amadeus_access_token()
+
+    # 2. Fetch base hotel list (no prices yet) - long-TTL cache per city code
+    with span("hotel_list"):
+        hotels = get_cached_hotel_list(city_code, token)
+    if not hotels:
+        raise Exception(f"No hotels found for city '{city}'.")
+
+    # 3. Pick max 60 hotels randomly to reduce API calls
+    selected = pick_hotels(hotels, sample_size=60)
+    hotel_ids = [h['hotelId'] for h in selected if 'hotelId' in h]
+
+    # Batch config for offers requests
+    batch_size = 20   # API call will contain max 20 hotel IDs
+    max_ids = 60
+    hotel_ids = hotel_ids[:max_ids]  # Safety cap
+
+    # 4. Fetch offers in parallel batches (rate limited, partial results on failure)
+    with span("offers"):
+        offers = fetch_offers_parallel(hotel_ids, checkin_date, checkout_date, token, adults, batch_size)
+
+    # 5-6. Merge base info + offers, 7-9. type, score and cache them
+    with span("merge"):
+        merged = merge_hotel_offers(hotels, offers)
+    hotel_list = store_live_hotels(city, checkin_date, checkout_date, adults, merged)
+
+    # 10. Return to caller
+    return hotel_list
+
+
+# ----------------------------
+# 12a. In-memory LRU + TTL Response Cache
+# ----------------------------
+class LRUCache:
+    """
+    Thread-safe LRU cache of encoded response bodies with TTL expiry.
+
+    Evicts least-recently-used entries when either `max_entries` or the total
+    `max_bytes` of stored values is exceeded. Tracks hit/miss/eviction counters.
+    """
+
+    def __init__(self, ttl, max_entries, max_bytes):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (expires_at, value, size)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, size=None):
+        """Stores `value`; `size` (bytes) defaults to len(value)."""
+        size = len(value) if size is None else size
+        if size > self.max_bytes:
+            return  # Never cache a single value larger than the whole budget
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, value, size)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.total_bytes -= size
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+live_response_cache = LRUCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES)
+
+# Compressed response bodies keyed by ETag (content hash + encoding), so a
+# cached body is compressed once rather than on every request
+compressed_response_cache = LRUCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES, COMPRESSED_CACHE_MAX_BYTES)
+
+# Live searches' hotels with their /recommend ranking columns, built once when the
+# results are cached (like the OYO city index) instead of on every ranked request
+live_rank_cache = LRUCache(RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_MAX_BYTES)
+
+def cache_live_response(key, hotels):
+    """
+    Encodes the cache-hit form of a /live_recommend response once and stores it
+    in the LRU cache, next to the search's ranking columns. Returns the encoded body.
+    """
+    with span("serialize"):
+        body = encode_json({
+            "message": "Loaded cached data",
+            "hotel_count": len(hotels),
+            "hotels": hotels,
+            "from_cache": True,
+        })
+    live_response_cache.put(key, body)
+    cache_live_ranking(key, hotels, len(body))
+    return body
+
+def cache_live_ranking(key, hotels, size=None):
+    """
+    Stores a search's hotels with their build_rank_columns in live_rank_cache.
+    `size` approximates the hotels' bytes (their encoded length). Returns the entry.
+    """
+    columns = build_rank_columns(hotels)
+    if size is None:
+        size = len(encode_json(hotels))
+    entry = {"hotels": hotels, "columns": columns}
+    live_rank_cache.put(key, entry, size + sum(column.nbytes for column in columns.values()))
+    return entry
+
+
+# ----------------------------
+# 12b. Single-flight Live Fetches
+# ----------------------------
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key inside one process: the first
+    caller runs the function, the others wait and receive its result (or error).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> {"event", "result", "error"}
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self.calls[key] = call
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call["event"].set()
+
+live_fetches = SingleFlight()
+
+def read_cached_hotels(key, written_after=None):
+    """
+    JSON-safe hotel dicts of a cached search if written less than
+    OFFERS_CACHE_TTL ago (and not before `written_after`), else None.
+    """
+    entry = offers_store.read(key, OFFERS_CACHE_TTL)
+    if entry is None or (written_after is not None and entry[1] < written_after):
+        return None
+    return entry[0]
+
+def fetch_live_hotels(city, checkin, checkout, adults, force=False):
+    """
+    Single-flight wrapper around fetch_and_cache_hotels.
+
+    Only one fetch per (city code, dates, adults) runs at a time: threads in this
+    worker share the in-flight call, and other workers wait on a file lock and
+    then reuse the cache entry written by whoever held it. With `force` (/refresh)
+    the entry is only reused if it was written after this call started.
+
+    Returns:
+        tuple: (hotel_list, from_cache); from_cache is False only for the
+        caller whose own call fetched from Amadeus, not threads that shared it
+    """
+    city_code = CITY_CODES[city]
+    key = (city_code, checkin, checkout, adults)
+    started = time.time()
+    leader = False
+
+    def load():
+        nonlocal leader
+        leader = True
+        with file_lock(offers_lock_path(key)):
+            # Another worker may have finished the same fetch while we waited
+            try:
+                hotels = read_cached_hotels(key, written_after=started if force else None)
+                if hotels is not None:
+                    return hotels, True
+            except Exception as e:
+                print(f"Failed to read cached offers: {e}")
+            return fetch_and_cache_hotels(city, checkin, checkout, adults), False
+
+    hotels, from_cache = live_fetches.do((city_code, checkin, checkout, adults, force), load)
+    return hotels, from_cache or not leader
+
+
+# Background refreshes of stale searches: search key -> in flight (per worker)
+revalidate_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="revalidate")
+revalidating = set()
+revalidating_lock = threading.Lock()
+
+def revalidate_in_background(city, checkin, checkout, adults):
+    """
+    Queues a refresh of a stale search unless one is already queued in this
+    worker. The fetch is single-flight, so other workers reuse its file.
+    """
+    key = (CITY_CODES[city], checkin, checkout, adults)
+    with revalidating_lock:
+        if key in revalidating:
+            return
+        revalidating.add(key)
+
+    def run():
+        token = upstream_caller.set("revalidate")
+        try:
+            hotels, _ = fetch_live_hotels(city, checkin, checkout, adults)
+            cache_live_response(key, hotels)
+        except Exception as e:
+            print(f"Background refresh of {key} failed: {e}")
+        finally:
+            upstream_caller.reset(token)
+            with revalidating_lock:
+                revalidating.discard(key)
+
+    revalidate_pool.submit(run)
+
+def read_live_cache_entry(city, checkin, checkout, adults):
+    """
+    Reads a search's cached offers if fresh, or if stale (stale-while-revalidate:
+    returned as-is while a background refresh runs).
+
+    Returns:
+        tuple: (hotels, stale), or None if missing/unreadable
+    """
+    try:
+        entry = offers_store.read((CITY_CODES[city], checkin, checkout, adults), OFFERS_CACHE_TTL + OFFERS_STALE_TTL)
+    except Exception as e:
+        print(f"Failed to read cached offers: {e}")
+        entry = None
+    if entry is None:
+        CACHE_LOOKUPS.inc(cache="offers", result="miss")
+        return None
+    hotels, written_at = entry
+    stale = time.time() - written_at >= OFFERS_CACHE_TTL
+    CACHE_LOOKUPS.inc(cache="offers", result="stale" if stale else "hit")
+    if stale:
+        revalidate_in_background(city, checkin, checkout, adults)
+    return hotels, stale
+
+def read_live_cache_file(city, checkin, checkout, adults):
+    """Cached hotels of a search (fresh or stale, see read_live_cache_entry), else None."""
+    entry = read_live_cache_entry(city, checkin, checkout, adults)
+    return entry[0] if entry is not None else None
+
+def get_live_hotels(city, checkin, checkout, adults):
+    """
+    Returns live hotels for a search from the on-disk cache when fresh (or
+    stale and being revalidated), otherwise via the single-flight fetch.
+
+    Returns:
+        tuple: (hotel_list, from_cache)
+    """
+    hotels = read_live_cache_file(city, checkin, checkout, adults)
+    if hotels is not None:
+        return hotels, True
+    return fetch_live_hotels(city, checkin, checkout, adults)
+
+def parse_live_search(data):
+    """
+    Validates a /live_recommend, /refresh or live /recommend request body.
+
+    Returns:
+        tuple: (city, checkin, checkout, adults)
+    Raises:
+        ValueError: with the message to send back as a 400
+    """
+    if not data:
+        raise ValueError("No JSON body received")
+
+    city = data.get("city")
+    checkin = data.get("checkin_date")
+    checkout = data.get("checkout_date")
+    if not isinstance(city, str) or city.lower() not in CITY_CODES:
+        raise ValueError("Invalid or unsupported city")
+    if not checkin or not checkout:
+        raise ValueError("Please provide valid 'checkin_date' and 'checkout_date'")
+    try:
+        adults = int(data.get("adults", 1))
+    except (TypeError, ValueError):
+        raise ValueError("'adults' must be an integer")
+    return city.lower(), checkin, checkout, adults
+
+def read_cached_live_body(city, checkin, checkout, adults):
+    """
+    Returns the encoded cache-hit response for a search from the in-memory
+    response cache, else from fresh (or stale) cached offers, else None.
+    """
+    cache_key = (CITY_CODES[city], checkin, checkout, adults)
+    body = live_response_cache.get(cache_key)
+    CACHE_LOOKUPS.inc(cache="response", result="miss" if body is None else "hit")
+    if body is None:
+        hotels = read_live_cache_file(city, checkin, checkout, adults)
+        if hotels is not None:
+            body = cache_live_response(cache_key, hotels)
+    prefetcher.note_lookup(cache_key, body is not None)
+    return body
+
+def live_result(hotel_list):
+    """Response payload for a /live_recommend answered by an upstream fetch."""
+    return {
+        "message": f"Found {len(hotel_list)} hotels with offers.",
+        "hotel_count": len(hotel_list),
+        "hotels": hotel_list,
+        "from_cache": False,
+    }
+
+def refresh_result(hotel_list):
+    """Response payload for /refresh."""
+    return {
+        "message": f"Refreshed data with {len(hotel_list)} hotels.",
+        "hotel_count": len(hotel_list),
+        "hotels": hotel_list,
+        "refreshed": True,
+    }
+
+# ----------------------------
+# 12c. Ranked Top-K Recommendations
+# ----------------------------
+RANK_SORT_KEYS = ["Final_rating", "Price", "Rating"]
+RANK_DEFAULT_LIMIT = 20
+RANK_MAX_LIMIT = 100
+
+def build_rank_columns(hotels):
+    """
+    Precomputes the columns used to filter and rank a list of hotel dicts:
+    float arrays for the sort keys (NaN when missing) and lower-cased property types.
+    """
+    import numpy as np
+    import pandas as pd
+    columns = {
+        key: pd.to_numeric(pd.Series([h.get(key) for h in hotels], dtype=object), errors="coerce")
+                .to_numpy(dtype="float64")
+        for key in RANK_SORT_KEYS
+    }
+    columns["Property_type"] = np.array([(h.get("Property_type") or "").lower() for h in hotels], dtype=object)
+    return columns
+
+def parse_rank_params(data):
+    """
+    Validates /recommend filter, sort and paging parameters.
+    Raises ValueError with a user-facing message on bad input.
+    """
+    def number(name):
+        value = data.get(name)
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}' must be a number")
+
+    sort_by = data.get("sort_by", "Final_rating")
+    if sort_by not in RANK_SORT_KEYS:
+        raise ValueError(f"'sort_by' must be one of {RANK_SORT_KEYS}")
+    order = data.get("order", "asc" if sort_by == "Price" else "desc")
+    if order not in ("asc", "desc"):
+        raise ValueError("'order' must be 'asc' or 'desc'")
+    try:
+        limit = int(data.get("limit", RANK_DEFAULT_LIMIT))
+        offset = int(data.get("cursor") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("'limit' and 'cursor' must be integers")
+    if limit < 1 or offset < 0:
+        raise ValueError("'limit' must be positive and 'cursor' non-negative")
+
+    return {
+        "min_price": number("min_price"),
+        "max_price": number("max_price"),
+        "min_rating": number("min_rating"),
+        "property_type": (data.get("property_type") or "").lower() or None,
+        "sort_by": sort_by,
+        "order": order,
+        "limit": min(limit, RANK_MAX_LIMIT),
+        "offset": offset,
+    }
+
+def rank_hotels(hotels, columns, params):
+    """
+    Filters hotels on the precomputed columns and returns one ranked page.
+
+    Only the first `offset + limit` matches are ordered: np.argpartition finds the
+    cut-off key in O(n), and just the hotels up to it are sorted (hotels missing
+    the sort key go last, ties keep dataset order).
+
+    Returns:
+        tuple: (page of hotel dicts, total matches, next cursor or None)
+    """
+    import numpy as np
+    mask = np.ones(len(hotels), dtype=bool)
+    price, rating = columns["Price"], columns["Final_rating"]
+    if params["min_price"] is not None:
+        mask &= price >= params["min_price"]
+    if params["max_price"] is not None:
+        mask &= price <= params["max_price"]
+    if params["min_rating"] is not None:
+        mask &= rating >= params["min_rating"]
+    if params["property_type"] is not None:
+        mask &= columns["Property_type"] == params["property_type"]
+
+    idx = np.flatnonzero(mask)
+    total = len(idx)
+    offset, limit = params["offset"], params["limit"]
+    need = min(offset + limit, total)
+    if need <= offset:
+        return [], total, None
+
+    key = columns[params["sort_by"]][idx]
+    if params["order"] == "desc":
+        key = -key
+    key = np.where(np.isnan(key), np.inf, key)
+
+    if need < total:
+        # Keep everything up to the need-th smallest key (including ties) so the
+        # tie-break below is stable across pages
+        kth = key[np.argpartition(key, need - 1)[need - 1]]
+        top = np.flatnonzero(key <= kth)
+    else:
+        top = np.arange(total)
+    top = top[np.lexsort((idx[top], key[top]))]
+    page = [hotels[i] for i in idx[top[offset:need]]]
+    next_cursor = str(need) if need < total else None
+    return page, total, next_cursor
+
+
+# ----------------------------
+# 12d. Background Prefetch (Warm-up Scheduler)
+# ----------------------------
+# Upstream calls one search costs: 3 offer batches (60 hotels / 20), plus the
+# hotel directory when it isn't cached
+PREFETCH_CALLS_PER_SEARCH = 3
+
+def prefetch_window_dates(window, today):
+    """
+    Resolves a rolling window name to (checkin, checkout) dates:
+    tonight, tomorrow, weekend (the coming Friday → Sunday), +N / +NxM
+    (check-in in N days for M nights, default 1).
+    """
+    if window == "tonight":
+        return today, today + datetime.timedelta(days=1)
+    if window == "tomorrow":
+        return today + datetime.timedelta(days=1), today + datetime.timedelta(days=2)
+    if window == "weekend":
+        friday = today + datetime.timedelta(days=(4 - today.weekday()) % 7)
+        return friday, friday + datetime.timedelta(days=2)
+    match = re.fullmatch(r"\+(\d+)(?:x(\d+))?", window)
+    if not match:
+        raise ValueError(f"Unknown prefetch window '{window}'")
+    checkin = today + datetime.timedelta(days=int(match.group(1)))
+    return checkin, checkin + datetime.timedelta(days=int(match.group(2) or 1))
+
+class UpstreamBudget:
+    """Sliding one-minute window of upstream calls spent by the prefetcher."""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self.spent = deque()  # (time, calls)
+
+    def remaining(self):
+        cutoff = time.monotonic() - 60
+        while self.spent and self.spent[0][0] < cutoff:
+            self.spent.popleft()
+        return self.per_minute - sum(n for _, n in self.spent)
+
+    def spend(self, calls):
+        if calls:
+            self.spent.append((time.monotonic(), calls))
+
+class Prefetcher:
+    """
+    Keeps hot searches (cities x date windows x party sizes) in the live cache.
+
+    Each tick it fetches planned searches that are missing or expire within
+    `refresh_ahead` seconds, most urgent first, while the per-minute upstream
+    budget allows. Only one worker per host runs the schedule (file lock);
+    every worker counts how often a planned search was answered from cache.
+    """
+
+    def __init__(self, cities, windows, adults, budget_per_min, refresh_ahead):
+        self.cities = [c for c in cities if c in CITY_CODES]
+        self.windows = windows
+        self.adults = adults
+        self.refresh_ahead = refresh_ahead
+        self.budget = UpstreamBudget(budget_per_min)
+        self.planned = (None, {})  # (date, {search key: (city, checkin, checkout, adults)})
+        self.stats = {"runs": 0, "fetched": 0, "failed": 0, "deferred": 0,
+                      "upstream_calls": 0, "hits": 0, "misses": 0}
+        self.lock = threading.Lock()
+        self.thread = None
+        for city in set(cities) - set(self.cities):
+            print(f"Ignoring unknown prefetch city '{city}'")
+
+    def plan(self):
+        """Today's planned searches, keyed like the response cache (deduped by city code)."""
+        today = datetime.date.today()
+        date, planned = self.planned
+        if date == today:
+            return planned
+        planned = {}
+        for city in self.cities:
+            for window in self.windows:
+                checkin, checkout = (d.isoformat() for d in prefetch_window_dates(window, today))
+                for adults in self.adults:
+                    planned.setdefault((CITY_CODES[city], checkin, checkout, adults), (city, checkin, checkout, adults))
+        self.planned = (today, planned)
+        return planned
+
+    def note_lookup(self, key, hit):
+        """Counts a /live_recommend cache lookup if it was for a planned search."""
+        if not self.cities or key not in self.plan():
+            return
+        with self.lock:
+            self.stats["hits" if hit else "misses"] += 1
+
+    def due(self):
+        """Planned searches to fetch now, most urgent (missing/soonest expiry) first."""
+        now = time.time()
+        due = []
+        for key, search in self.plan().items():
+            written_at = offers_store.written_at(key)
+            expires_in = -math.inf if written_at is None else OFFERS_CACHE_TTL - (now - written_at)
+            if expires_in <= self.refresh_ahead:
+                due.append((expires_in, search))
+        return [search for _, search in sorted(due, key=lambda d: d[0])]
+
+    def run_once(self):
+        """Fetches due searches within the budget. Returns the number fetched."""
+        fetched = 0
+        token = upstream_caller.set("prefetch")
+        try:
+            for city, checkin, checkout, adults in self.due():
+                cost = PREFETCH_CALLS_PER_SEARCH + (read_cached_hotel_list(CITY_CODES[city]) is None)
+                if self.budget.remaining() < cost:
+                    with self.lock:
+                        self.stats["deferred"] += 1
+                    break
+                before = upstream_call_counts().get("prefetch", 0)
+                try:
+                    hotels, _ = fetch_live_hotels(city, checkin, checkout, adults, force=True)
+                    cache_live_response((CITY_CODES[city], checkin, checkout, adults), hotels)
+                    fetched += 1
+                    outcome = "fetched"
+                except Exception as e:
+                    print(f"Prefetch of {city} {checkin}→{checkout} failed: {e}")
+                    outcome = "failed"
+                calls = upstream_call_counts().get("prefetch", 0) - before
+                self.budget.spend(calls)
+                with self.lock:
+                    self.stats[outcome] += 1
+                    self.stats["upstream_calls"] += calls
+        finally:
+            upstream_caller.reset(token)
+            with self.lock:
+                self.stats["runs"] += 1
+        return fetched
+
+    def start(self, interval):
+        """Starts the scheduler thread (once per worker; only the lock holder prefetches)."""
+        with self.lock:
+            if self.thread is not None or interval <= 0 or not self.cities:
+                return
+
+            def run():
+                lock_file = open(cache_store.lock_path("prefetch"), "a")
+                while fcntl is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except OSError:
+                        time.sleep(interval)  # Another worker is prefetching
+                print(f"Prefetching {len(self.plan())} searches every {interval}s")
+                while True:
+                    try:
+                        self.run_once()
+                    except Exception as e:
+                        print(f"Prefetch run failed: {e}")
+                    time.sleep(interval)
+
+            self.thread = threading.Thread(target=run, name="prefetcher", daemon=True)
+            self.thread.start()
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else None
+        stats["planned"] = len(self.plan()) if self.cities else 0
+        stats["budget_remaining"] = self.budget.remaining()
+        return stats
+
+prefetcher = Prefetcher(PREFETCH_CITIES, PREFETCH_WINDOWS, PREFETCH_ADULTS,
+                        PREFETCH_BUDGET_PER_MIN, PREFETCH_REFRESH_AHEAD)
+
+# ----------------------------
+# 12e. Streaming Live Search (NDJSON / SSE)
+# ----------------------------
+# /live_recommend can stream its result instead of sending one JSON document:
+# each offer batch is merged, scored and sent as soon as it lands, so the first
+# hotels arrive after one batch instead of after the slowest. Frames:
+#   meta   {city, checkin_date, checkout_date, adults}
+#   hotels {batch, hotels: [...]}      (one per offer batch; one in total on a cache hit)
+#   done   {message, hotel_count, from_cache}
+#   error  {error, details}            (instead of done, if the fetch fails)
+# NDJSON sends each frame as one JSON line with an "event" key; SSE as
+# "event: <name>" + "data: <json>".
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+def stream_format(accept, requested=None):
+    """
+    'ndjson' or 'sse' if the client asked for a streamed response (?stream=
+    value `requested`, else the Accept header), otherwise None.
+    """
+    if requested:
+        return requested if requested in STREAM_FORMATS else None
+    for fmt, mimetype in STREAM_FORMATS.items():
+        if mimetype in (accept or ""):
+            return fmt
+    return None
+
+def encode_event(fmt, event, payload):
+    """One stream frame in `fmt`."""
+    if fmt == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + encode_json(payload) + b"\n\n"
+    return encode_json(dict(payload, event=event)) + b"\n"
+
+def live_search_events(city, checkin, checkout, adults):
+    """
+    Generator form of get_live_hotels → fetch_and_cache_hotels, yielding
+    (event, payload) frames. A fresh (or stale) cache entry is sent as one batch.
+    Otherwise each offer batch is sent as it lands and the cache entry is
+    written from all of them at the end.
+
+    A cache miss is fetched by a producer thread (locked_search_events) that
+    holds the search's file lock, so identical searches in any worker wait and
+    then reuse the cache entry. Frames reach the client through a queue: the
+    lock is released as soon as the entry is stored, however slowly the
+    client reads. Closing the generator early (client disconnected) stops the
+    remaining batches and writes nothing.
+    """
+    city_code = CITY_CODES[city]
+    cache_key = (city_code, checkin, checkout, adults)
+    yield "meta", {"city": city, "checkin_date": checkin, "checkout_date": checkout, "adults": adults}
+
+    with span("cache_lookup"):
+        hotels = read_live_cache_file(city, checkin, checkout, adults)
+    prefetcher.note_lookup(cache_key, hotels is not None)
+    if hotels is None:
+        yield from produce_in_background(
+            lambda cancelled: locked_search_events(city, checkin, checkout, adults, cancelled))
+        return
+    yield from cached_search_events(hotels)
+
+def cached_search_events(hotels):
+    yield "hotels", {"batch": 0, "hotels": hotels}
+    yield "done", {"message": "Loaded cached data", "hotel_count": len(hotels), "from_cache": True}
+
+def locked_search_events(city, checkin, checkout, adults, cancelled):
+    """Frames for a cache miss, produced under the search's file lock; stops once `cancelled` is set."""
+    cache_key = (CITY_CODES[city], checkin, checkout, adults)
+    with file_lock(offers_lock_path(cache_key)):
+        # Another worker may have finished the same fetch while we waited
+        hotels = read_cached_hotels(cache_key)
+        if hotels is None:
+            with closing(stream_and_cache_hotels(city, checkin, checkout, adults)) as frames:
+                for frame in frames:
+                    if cancelled.is_set():
+                        return
+                    yield frame
+            return
+    yield from cached_search_events(hotels)
+
+# Ends a producer's frame queue
+STREAM_END = object()
+
+def produce_in_background(make_frames):
+    """
+    Runs the frame generator `make_frames(cancelled)` on its own thread and
+    yields its frames from a queue, re-raising its error if it fails. The
+    producer never waits on the consumer. Closing this generator sets
+    `cancelled`, which the producer checks between frames.
+    """
+    frames = queue.Queue()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for frame in make_frames(cancelled):
+                frames.put(frame)
+        except Exception as e:
+            frames.put(e)
+        finally:
+            frames.put(STREAM_END)
+
+    # Copy the context so the producer's upstream calls and spans count for this request
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,),
+                     name="stream-producer", daemon=True).start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is STREAM_END:
+                return
+            if isinstance(frame, Exception):
+                raise frame
+            yield frame
+    finally:
+        cancelled.set()
+
+def stream_and_cache_hotels(city, checkin, checkout, adults):
+    """fetch_and_cache_hotels, yielding each offer batch's scored hotels as it lands."""
+    city_code = CITY_CODES[city]
+    with span("token"):
+        token = get_amadeus_access_token()
+    with span("hotel_list"):
+        hotels = get_cached_hotel_list(city_code, token)
+    if not hotels:
+        raise Exception(f"No hotels found for city '{city}'.")
+    hotel_ids = [h['hotelId'] for h in pick_hotels(hotels, sample_size=60) if 'hotelId' in h][:60]
+
+    frames = []
+    with closing(iter_offer_batches(hotel_ids, checkin, checkout, token, adults)) as batches:
+        for offers in batches:
+            with span("merge"):
+                merged = merge_hotel_offers(hotels, offers)
+            df = score_live_hotels(merged)
+            frames.append(df)
+            yield "hotels", {"batch": len(frames) - 1, "hotels": frame_to_records(df)}
+
+    # Every batch has been sent: finalize the cache entry from all of them
+    hotel_list = save_live_hotels(city, checkin, checkout, adults, combine_scored(frames))
+    cache_live_response((city_code, checkin, checkout, adults), hotel_list)
+    yield "done", {"message": f"Found {len(hotel_list)} hotels with offers.",
+                   "hotel_count": len(hotel_list), "from_cache": False}
+
+def stream_headers(fmt):
+    """Response headers for a streamed search (no caching or proxy buffering)."""
+    return {"Content-Type": STREAM_FORMATS[fmt], "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def stream_live_response(fmt, city, checkin, checkout, adults):
+    """Streamed /live_recommend response; a failure mid-stream becomes an error frame."""
+    def generate():
+        with closing(live_search_events(city, checkin, checkout, adults)) as events:
+            try:
+                for event, payload in events:
+                    yield encode_event(fmt, event, payload)
+            except Exception as exc:
+                yield encode_event(fmt, "error", {"error": "Failed fetching hotels", "details": str(exc)})
+
+    return Response(generate(), headers=stream_headers(fmt))
+
+
+# ----------------------------
+# 12f. Batched Multi-search (multi-city / multi-date)
+# ----------------------------
+# Shared by every /batch_search request in this worker, so batches can't
+# multiply the number of concurrent upstream fetches
+batch_search_pool = ThreadPoolExecutor(max_workers=BATCH_SEARCH_WORKERS, thread_name_prefix="batch-search")
+
+def parse_batch_search(data):
+    """
+    Validates a /batch_search body: {"searches": [{city, checkin_date,
+    checkout_date, adults}, ...]}.
+
+    Returns:
+        list: (city, checkin, checkout, adults) per search, in request order
+    Raises:
+        ValueError: with the message to send back as a 400
+    """
+    searches = (data or {}).get("searches")
+    if not isinstance(searches, list) or not searches:
+        raise ValueError("Please provide a non-empty 'searches' list")
+    if len(searches) > BATCH_SEARCH_MAX_QUERIES:
+        raise ValueError(f"At most {BATCH_SEARCH_MAX_QUERIES} searches per request")
+    queries = []
+    for i, search in enumerate(searches):
+        try:
+            queries.append(parse_live_search(search if isinstance(search, dict) else None))
+        except ValueError as e:
+            raise ValueError(f"searches[{i}]: {e}")
+    return queries
+
+def submit_batch_task(fn, *args):
+    """Runs `fn` on the batch pool in the caller's context (spans, profile, upstream caller)."""
+    return batch_search_pool.submit(contextvars.copy_context().run, fn, *args)
+
+def timed_call(fn, *args):
+    """(result, seconds) of fn(*args)."""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+def warm_batch_upstream(city_codes):
+    """
+    Fetches the access token once and every distinct city's hotel directory
+    concurrently, so the searches fanned out next find both in memory.
+
+    Returns:
+        dict: city_code -> exception, for directories that could not be loaded
+    """
+    with span("token"):
+        token = get_amadeus_access_token()
+    failed = {}
+    with span("hotel_list"):
+        futures = {code: submit_batch_task(get_cached_hotel_list, code, token) for code in city_codes}
+        for code, fut in futures.items():
+            try:
+                if not fut.result():
+                    failed[code] = Exception(f"No hotels found for city code '{code}'.")
+            except Exception as e:
+                failed[code] = e
+    return failed
+
+def run_batch_search(queries):
+    """
+    Answers several live searches at once:
+        1. Identical searches (same city code, dates, adults) are run once.
+        2. Each distinct search is looked up in the offers cache.
+        3. For the misses, the token and each city's hotel directory are fetched
+           once, then the searches fan out concurrently (single-flight, so they
+           also coalesce with other requests and workers).
+
+    Returns:
+        dict: per-search results in request order, plus batch totals
+    """
+    started = time.perf_counter()
+    first_index = {}  # search key -> index of its first occurrence
+    outcomes = {}     # search key -> result fields
+    for i, (city, checkin, checkout, adults) in enumerate(queries):
+        first_index.setdefault((CITY_CODES[city], checkin, checkout, adults), i)
+
+    # 1-2. Cache lookups (fresh, or stale while a refresh runs in the background)
+    misses = []
+    with span("cache_lookup"):
+        for key, i in first_index.items():
+            city, checkin, checkout, adults = queries[i]
+            try:
+                entry, seconds = timed_call(read_live_cache_entry, city, checkin, checkout, adults)
+            except Exception as e:
+                print(f"Failed to read cached offers: {e}")
+                entry, seconds = None, 0.0
+            prefetcher.note_lookup(key, entry is not None)
+            if entry is None:
+                misses.append(key)
+            else:
+                outcomes[key] = {"cache": "stale" if entry[1] else "hit", "seconds": seconds, "hotels": entry[0]}
+
+    # 3. Shared upstream work once, then fan out the remaining searches
+    if misses:
+        try:
+            failed = warm_batch_upstream({key[0] for key in misses})
+        except Exception as e:
+            failed = {key[0]: e for key in misses}
+        futures = {}
+        for key in misses:
+            if key[0] in failed:
+                outcomes[key] = {"error": str(failed[key[0]])}
+                continue
+            futures[key] = submit_batch_task(timed_call, fetch_live_hotels, *queries[first_index[key]])
+        for key, fut in futures.items():
+            try:
+                (hotels, from_cache), seconds = fut.result()
+            except Exception as e:
+                outcomes[key] = {"error": str(e)}
+                continue
+            cache_live_response(key, hotels)
+            # from_cache: another request or worker fetched the same search meanwhile
+            outcomes[key] = {"cache": "coalesced" if from_cache else "miss", "seconds": seconds, "hotels": hotels}
+
+    results = []
+    for i, (city, checkin, checkout, adults) in enumerate(queries):
+        key = (CITY_CODES[city], checkin, checkout, adults)
+        result = {"city": city, "checkin_date": checkin, "checkout_date": checkout, "adults": adults}
+        outcome = outcomes[key]
+        if first_index[key] != i:
+            result["duplicate_of"] = first_index[key]
+        if "error" in outcome:
+            result["error"] = outcome["error"]
+        else:
+            result.update(cache=outcome["cache"], seconds=round(outcome["seconds"], 4),
+                          hotel_count=len(outcome["hotels"]), hotels=outcome["hotels"])
+        results.append(result)
+
+    return {
+        "search_count": len(queries),
+        "unique_searches": len(first_index),
+        "upstream_searches": len(misses),
+        "seconds": round(time.perf_counter() - started, 4),
+        "results": results,
+    }
+
+
+# ============================
+# 13. ROUTES
+# ============================
+
+@app.before_request
+def start_background_workers():
+    """Starts per-worker background threads lazily (safe with forking servers)."""
+    cache_store.start_sweeper(LIVE_CACHE_SWEEP_INTERVAL)
+    offers_store.start_sweeper(LIVE_CACHE_SWEEP_INTERVAL)
+    start_index_maintenance()
+    prefetcher.start(PREFETCH_INTERVAL)
+    metrics_registry.start_flusher(METRICS_FLUSH_INTERVAL)
+
+
+@app.before_request
+def start_request_timing():
+    """Notes the start time and, if requested, collects this request's stage spans."""
+    g.request_started = time.perf_counter()
+    flag = request.headers.get("X-Profile", request.args.get("profile"))
+    if profiling_requested(flag, request.headers.get("X-Admin-Token")):
+        g.profile_token = current_profile.set([])
+
+
+def compress_json_response(response):
+    """
+    Compresses 200 JSON responses (gzip/brotli per Accept-Encoding), tags them
+    with an ETag and answers a matching If-None-Match with 304.
+    """
+    if (response.status_code != 200 or response.mimetype != "application/json"
+            or response.is_streamed or "Content-Encoding" in response.headers):
+        return response
+    with span("compress"):
+        status, body, etag, encoding = negotiate(
+            response.get_data(), request.headers.get("Accept-Encoding"), request.headers.get("If-None-Match"),
+            COMPRESS_MIN_BYTES, compressed_response_cache,
+        )
+    response.status_code = status
+    response.set_data(body)
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+@app.after_request
+def finish_response(response):
+    """
+    Compresses the response, then records its route, status, latency and size
+    (for streamed responses once the stream ends) and attaches the
+    Server-Timing profile when one was requested.
+    """
+    response = compress_json_response(response)
+    started = g.get("request_started", time.perf_counter())
+    elapsed = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    if response.is_streamed:
+        # Recorded when the body has been sent (as the ASGI server does): the
+        # size isn't known up front and the request lasts until the last frame
+        method, status = request.method, response.status_code
+        response.response = count_streamed_bytes(response.response, lambda nbytes: observe_request(
+            route, method, status, time.perf_counter() - started, nbytes))
+    else:
+        observe_request(route, request.method, response.status_code, elapsed, response.content_length or 0)
+    profile = current_profile.get()
+    if profile is not None:
+        response.headers["Server-Timing"] = server_timing(profile + [("total", elapsed)])
+    return response
+
+
+@app.teardown_request
+def end_request_profile(exc):
+    """Stops collecting spans so a reused worker thread starts the next request clean."""
+    token = g.pop("profile_token", None)
+    if token is not None:
+        current_profile.reset(token)
+
+
+@app.route('/live_recommend', methods=['POST'])
+def live_recommend():
+    """
+    Live hotel recommendations.
+    - Checks the in-memory response cache, then cached results (city+dates+adults file)
+    - If found → returns cached
+    - If not → fetches from Amadeus, caches, and returns
+    - With ?stream=ndjson|sse (or that Accept type) → streams hotels per offer batch
+    (asgi.py serves this route natively async; see section 12b for the shared helpers)
+    """
+    data = request.get_json()
+    print(f"live_recommend called with data: {data}")
+    try:
+        city, checkin, checkout, adults = parse_live_search(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    city_code = CITY_CODES[city]
+
+    # Streaming mode: hotels are sent batch by batch as offers arrive (section 12e)
+    fmt = stream_format(request.headers.get("Accept"), request.args.get("stream"))
+    if fmt:
+        return stream_live_response(fmt, city, checkin, checkout, adults)
+
+    # Check in-memory response cache, then the on-disk offers cache
+    with span("cache_lookup"):
+        body = read_cached_live_body(city, checkin, checkout, adults)
+    if body is not None:
+        return Response(body, mimetype="application/json")
+
+    # No cache → fetch fresh (coalesced with identical in-flight searches)
+    try:
+        hotel_list, from_cache = fetch_live_hotels(city, checkin, checkout, adults)
+        body = cache_live_response((city_code, checkin, checkout, adults), hotel_list)
+        if from_cache:
+            return Response(body, mimetype="application/json")
+        with span("serialize"):
+            return jsonify(live_result(hotel_list))
+    except Exception as exc:
+        return jsonify({"error": "Failed fetching hotels", "details": str(exc)}), 500
+
+
+@app.route('/batch_search', methods=['POST'])
+def batch_search():
+    """
+    Several live searches in one request (compare cities or date windows).
+    Shared upstream work runs once and cache misses are fetched concurrently.
+
+    Body: searches - list of {city, checkin_date, checkout_date, adults}
+    Each result carries cache (hit | stale | miss | coalesced) and seconds,
+    or an error; one failed search doesn't fail the others.
+    """
+    try:
+        queries = parse_batch_search(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        result = run_batch_search(queries)
+        with span("serialize"):
+            return jsonify(result)
+    except Exception as exc:
         return jsonify({"error": "Failed fetching hotels", "details": str(exc)}), 500
 
 
@@ -475,39 +2713,263 @@ def refresh():
     """
     data = request.get_json()
     print(f"Refresh called with data: {data}")
-    if not data:
-        return jsonify({"error": "No JSON body received"}), 400
+    try:
+        city, checkin, checkout, adults = parse_live_search(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Always fetch fresh (concurrent refreshes of the same search share one fetch)
+    try:
+        hotel_list, _ = fetch_live_hotels(city, checkin, checkout, adults, force=True)
+        cache_live_response((CITY_CODES[city], checkin, checkout, adults), hotel_list)
+        with span("serialize"):
+            return jsonify(refresh_result(hotel_list))
+    except Exception as exc:
+        return jsonify({"error": "Error refreshing hotel data", "details": str(exc)}), 500
+
+
+@app.route('/recommend', methods=['POST'])
+def recommend():
+    """
+    Ranked top-K recommendations with server-side filtering and paging.
+
+    Body:
+        source: "oyo" (static dataset, default) or "live" (Amadeus; needs dates)
+        city, checkin_date, checkout_date, adults
+        min_price, max_price, min_rating, property_type
+        sort_by: Final_rating | Price | Rating, order: asc | desc
+        limit (max 100), cursor (from the previous page's next_cursor)
+    """
+    data = request.get_json() or {}
+    city = (data.get("city") or "").lower().strip()
+    source = data.get("source", "oyo")
+    if not city:
+        return jsonify({"error": "Missing 'city' parameter"}), 400
+    if source not in ("oyo", "live"):
+        return jsonify({"error": "'source' must be 'oyo' or 'live'"}), 400
+    try:
+        params = parse_rank_params(data)
+        if source == "live":
+            live_search = parse_live_search(dict(data, city=city))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        if source == "oyo":
+            with span("cache_lookup"):
+                entry = get_oyo_city_index().get(city)
+            hotels = entry["hotels"] if entry else []
+            columns = entry["columns"] if entry else build_rank_columns([])
+            from_cache = True
+        else:
+            with span("cache_lookup"):
+                cache_key = (CITY_CODES[live_search[0]],) + live_search[1:]
+                entry = live_rank_cache.get(cache_key)
+                from_cache = entry is not None
+                if entry is None:
+                    hotels, from_cache = get_live_hotels(*live_search)
+                    entry = live_rank_cache.get(cache_key) or cache_live_ranking(cache_key, hotels)
+            hotels, columns = entry["hotels"], entry["columns"]
+
+        with span("rank"):
+            page, total, next_cursor = rank_hotels(hotels, columns, params)
+        with span("serialize"):
+            return jsonify({
+                "hotel_count": total,
+                "returned": len(page),
+                "hotels": page,
+                "next_cursor": next_cursor,
+                "sort_by": params["sort_by"],
+                "order": params["order"],
+                "from_cache": from_cache,
+            })
+    except Exception as exc:
+        return jsonify({"error": "Failed ranking hotels", "details": str(exc)}), 500
+
+
+@app.route('/similar_hotels', methods=['POST'])
+def similar_hotels():
+    """
+    "Hotels like this one": top-N most similar hotels by cosine similarity over
+    name, address, property type, price bucket and rating bucket features.
+
+    Body: hotel_id, limit (default 10, max 50), same_city (default true)
+    """
+    data = request.get_json() or {}
+    hotel_id = data.get("hotel_id")
+    if not hotel_id:
+        return jsonify({"error": "Missing 'hotel_id' parameter"}), 400
+    try:
+        limit = max(1, min(int(data.get("limit", 10)), 50))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'limit' must be an integer"}), 400
 
-    # Extract & validate
+    try:
+        results = get_similarity_index().similar(hotel_id, limit, bool(data.get("same_city", True)))
+        if results is None:
+            return jsonify({"error": f"Unknown hotel_id '{hotel_id}'"}), 404
+        return jsonify({
+            "hotel_id": hotel_id,
+            "hotel_count": len(results),
+            "hotels": [dict(h, similarity=score) for h, score in results],
+        })
+    except Exception as e:
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+def parse_geo_query(data):
+    """
+    Validates lat/lng (+ optional city) for the nearby endpoints.
+    Raises ValueError with a user-facing message on bad input.
+    """
+    from geo_index import ALL_CITIES
+    try:
+        lat, lng = float(data["lat"]), float(data["lng"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Please provide numeric 'lat' and 'lng'")
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError("'lat'/'lng' out of range")
     city = data.get("city")
-    checkin = data.get("checkin_date")
-    checkout = data.get("checkout_date")
-    adults = data.get("adults", 1)
-    if not city or city.lower() not in CITY_CODES:
-        return jsonify({"error": "Invalid or unsupported city"}), 400
-    if not checkin or not checkout:
-        return jsonify({"error": "Please provide valid 'checkin_date' and 'checkout_date'"}), 400
+    return lat, lng, geo_city_key(city) if city else ALL_CITIES
 
-    city = city.lower()
-    adults = int(adults)
+def geo_response(results):
+    return jsonify({
+        "hotel_count": len(results),
+        "hotels": [dict(h, distance_km=km) for h, km in results],
+    })
+
+
+@app.route('/nearby_hotels', methods=['POST'])
+def nearby_hotels():
+    """
+    Hotels within `radius_km` (default 5, max 50) of a point, nearest first.
+    Body: lat, lng, radius_km, city (optional), limit (optional)
+    """
+    data = request.get_json() or {}
+    try:
+        lat, lng, city = parse_geo_query(data)
+        radius = float(data.get("radius_km", 5))
+        limit = int(data["limit"]) if data.get("limit") else None
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if not 0 < radius <= 50:
+        return jsonify({"error": "'radius_km' must be between 0 and 50"}), 400
 
-    # Always fetch fresh
     try:
-        hotel_list = fetch_and_cache_hotels(city, checkin, checkout, adults)
+        return geo_response(get_geo_index().within(lat, lng, radius, city, limit))
+    except Exception as e:
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+@app.route('/nearest_hotels', methods=['POST'])
+def nearest_hotels():
+    """
+    The `k` hotels (default 10, max 100) nearest to a point.
+    Body: lat, lng, k, city (optional)
+    """
+    data = request.get_json() or {}
+    try:
+        lat, lng, city = parse_geo_query(data)
+        k = int(data.get("k", 10))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if not 1 <= k <= 100:
+        return jsonify({"error": "'k' must be between 1 and 100"}), 400
+
+    try:
+        return geo_response(get_geo_index().nearest(lat, lng, k, city))
+    except Exception as e:
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+@app.route('/suggest', methods=['POST'])
+def suggest():
+    """
+    Typeahead: ranked city and hotel-name suggestions for a partial query,
+    tolerant of small typos.
+
+    Body: q, limit (default 8, max 20), city (optional: only hotels there),
+    types (optional: ["city"] and/or ["hotel"])
+    """
+    data = request.get_json() or {}
+    query = str(data.get("q") or "").strip()
+    if not query:
+        return jsonify({"error": "Missing 'q' parameter"}), 400
+    try:
+        limit = max(1, min(int(data.get("limit", 8)), 20))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'limit' must be an integer"}), 400
+    types = data.get("types")
+    if types is not None and (not isinstance(types, list) or not set(types) <= {"city", "hotel"}):
+        return jsonify({"error": "'types' must be a list of 'city' and/or 'hotel'"}), 400
+    city = canonical_city(data.get("city")) or None
+
+    try:
+        with span("suggest"):
+            results = get_suggest_index().suggest(query[:100], limit, city, types)
         return jsonify({
-            "message": f"Refreshed data with {len(hotel_list)} hotels.",
-            "hotel_count": len(hotel_list),
-            "hotels": hotel_list,
-            "refreshed": True,
+            "q": query,
+            "count": len(results),
+            "suggestions": [dict(record, score=score) for record, score in results],
         })
-    except Exception as exc:
-        return jsonify({"error": "Error refreshing hotel data", "details": str(exc)}), 500
+    except Exception as e:
+        return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
+
+
+@app.route('/admin/reload_oyo', methods=['POST'])
+def admin_reload_oyo():
+    """
+    Reloads the OYO dataset now (applying only row deltas where possible).
+    Requires the X-Admin-Token header to match ADMIN_TOKEN.
+    Body (optional): {"force": true} to reload even if the file is unchanged.
+    """
+    if not ADMIN_TOKEN or request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return jsonify({"error": "Forbidden"}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        summary = reload_oyo_dataset(force=bool(data.get("force")))
+        return jsonify({"reloaded": summary is not None, "summary": summary})
+    except Exception as e:
+        return jsonify({"error": "Reload failed", "details": str(e)}), 500
+
+
+@app.route('/admin/prefetch', methods=['GET'])
+def admin_prefetch():
+    """
+    Prefetch metrics for this worker: planned searches, fetches, upstream calls
+    used, budget left and the cache hit rate of planned searches.
+    Requires the X-Admin-Token header to match ADMIN_TOKEN.
+    """
+    if not ADMIN_TOKEN or request.headers.get("X-Admin-Token") != ADMIN_TOKEN:
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({"prefetch": prefetcher.snapshot(), "upstream_calls": upstream_call_counts()})
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness probe: 200 once this worker's dataset and indexes are warm,
+    else 503. Also reports import, warm-up and time-to-first-response.
+    """
+    body = {key: value for key, value in startup.items() if key != "started"}
+    body["uptime_seconds"] = round(time.perf_counter() - startup["started"], 3)
+    return jsonify(body), 200 if startup["ready"] else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Prometheus metrics (text format) for all workers on this host: request
+    counts/latency/bytes per route, stage timings, upstream calls and cache
+    hits/misses. Other workers' numbers are up to METRICS_FLUSH_INTERVAL old.
+    """
+    return Response(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.route('/oyo_hotels', methods=['POST'])
 def oyo_hotels():
     """
-    Return OYO hotels from local static CSV (instant, no external API calls).
+    Return OYO hotels from the local static dataset (instant, no external API calls).
     Filters by 'city' given in request body.
     """
     data = request.get_json() or {}
@@ -517,32 +2979,55 @@ def oyo_hotels():
 
     city_query = city.lower().strip()
     try:
-        df = load_oyo_hotels()  # Cached DataFrame
-        filtered = df[df['City'].str.lower() == city_query]
-        count = len(filtered)
-        if count == 0:
+        with span("cache_lookup"):
+            entry = get_oyo_city_index().get(city_query)  # Single dict lookup
+        if entry is None:
             return jsonify({
                 "message": f"No hotels found for city '{city}'",
                 "hotel_count": 0,
                 "hotels": []
             })
 
-        hotels = filtered.fillna("").to_dict(orient="records")
-
-        # Data cleaning for JSON compatibility
-        for h in hotels:
-            for key in ["Latitude", "Longitude", "Price", "Rating", "Final_rating"]:
-                if h.get(key) == "" or pd.isna(h.get(key)):
-                    h[key] = None
-            if not h.get("Property_type"):
-                h["Property_type"] = "hotel"
-            if not h.get("Room_status"):
-                h["Room_status"] = ""
-            if not h.get("Currency"):
-                h["Currency"] = "INR"
-
-        return jsonify({"hotel_count": count, "hotels": hotels})
+        # Body was JSON-encoded once when the index was built
+        return Response(entry["body"], mimetype="application/json")
 
     except Exception as e:
         return jsonify({"error": "Internal Server Error", "details": str(e)}), 500
 
+
+# ============================
+# 14. STARTUP
+# ============================
+
+def prepare_fork():
+    """
+    Runs once in the preloading gunicorn master, before the first fork: warms
+    the dataset and indexes, closes this process's SQLite handles (never used
+    across a fork) and freezes the warmed objects out of the garbage
+    collector, so collections in workers don't write to (and copy) the
+    shared pages.
+    """
+    warm_up()
+    offers_store.close()
+    amadeus_limiter.close()
+    gc.collect()
+    gc.freeze()
+
+def after_fork():
+    """
+    Runs in each gunicorn worker right after the fork. Threads don't survive
+    a fork, so the worker starts its own watcher and background threads;
+    metrics the master recorded are dropped so no worker reports them again.
+    """
+    startup.update(pid=os.getpid(), started=time.perf_counter(), first_response_seconds=None)
+    metrics_registry.reset()
+    start_oyo_watcher(OYO_WATCH_INTERVAL)
+    start_background_workers()
+
+startup["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 4)
+print(f"App imported in {startup['import_seconds']}s (pid {os.getpid()}).")
+
+# Without a preloading master: warm the OYO dataset in the background right
+# away and keep watching it for changes
+if not APP_PRELOAD:
+    start_oyo_watcher(OYO_WATCH_INTERVAL)
@@ -0,0 +1,463 @@
+# ============================
+# asgi.py - Async (ASGI) serving mode
+# ============================
+#
+# Run with:
+#   gunicorn asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:$PORT
+#   (or locally: uvicorn asgi:application --port 5000)
+#
+# POST /live_recommend and /refresh are served natively on the event loop with
+# the non-blocking Amadeus client, so a slow upstream only suspends a coroutine
+# instead of pinning a worker. Their CPU-bound steps (scoring, cache writes,
+# index updates) run in the default thread pool. Streamed /live_recommend
+# (NDJSON/SSE, app.py section 12e) cancels its upstream batches as soon as the
+# client disconnects.
+#
+# Every other route (and CORS preflights) goes to the unchanged Flask app in
+# a bounded thread pool (a2wsgi), so /oyo_hotels and the other local
+# endpoints keep responding while upstream calls are in flight.
+#
+# Caches, file locks and indexes are the ones in app.py, so sync (gunicorn
+# app:app) and async workers can share one live cache directory. Metrics and
+# stage spans also go to app.py's registry, so /metrics covers both paths.
+
+import asyncio
+import json
+import os
+import time
+import weakref
+from contextlib import aclosing, asynccontextmanager
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+import app as backend
+from amadeus_async import AsyncAmadeusClient
+
+# Threads serving the wrapped Flask routes per worker
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "16"))
+
+amadeus = AsyncAmadeusClient(
+    backend.AMADEUS_API_KEY,
+    backend.AMADEUS_API_SECRET,
+    max_concurrency=backend.AMADEUS_MAX_WORKERS,
+    pool_size=backend.AMADEUS_POOL_SIZE,
+    connect_timeout=backend.AMADEUS_CONNECT_TIMEOUT,
+    read_timeout=backend.AMADEUS_READ_TIMEOUT,
+    max_retries=backend.AMADEUS_MAX_RETRIES,
+    backoff_factor=backend.AMADEUS_BACKOFF_FACTOR,
+    base_url=backend.AMADEUS_BASE_URL,
+    on_request=backend.observe_upstream,
+    # One rate limit and one access token per worker, shared with the sync
+    # calls (/batch_search, revalidation, prefetch) made by app.py
+    limiter=backend.amadeus_limiter,
+    tokens=backend.amadeus_tokens,
+)
+
+flask_app = WSGIMiddleware(backend.app, workers=ASGI_WSGI_THREADS)
+
+# ----------------------------
+# 1. Async Fetch-Orchestrator
+# ----------------------------
+async def get_cached_hotel_list_async(city_code):
+    """Async get_cached_hotel_list: same memory/file cache, non-blocking upstream fetch."""
+    hotels = await asyncio.to_thread(backend.read_cached_hotel_list, city_code)
+    backend.CACHE_LOOKUPS.inc(cache="hotel_list", result="miss" if hotels is None else "hit")
+    if hotels is not None:
+        return hotels
+
+    async def fetch():
+        hotels = await amadeus.get_hotel_list(city_code)
+        await asyncio.to_thread(backend.store_hotel_list, city_code, hotels)
+        return hotels
+
+    # Concurrent searches in a cold city share one directory fetch
+    return await live_fetches.do(("hotel_list", city_code), fetch)
+
+async def fetch_and_cache_hotels_async(city, checkin, checkout, adults):
+    """Async fetch_and_cache_hotels (same steps and cache output)."""
+    city_code = backend.CITY_CODES[city]
+
+    with backend.span("hotel_list"):
+        hotels = await get_cached_hotel_list_async(city_code)
+    if not hotels:
+        raise Exception(f"No hotels found for city '{city}'.")
+
+    selected = backend.pick_hotels(hotels, sample_size=60)
+    hotel_ids = [h['hotelId'] for h in selected if 'hotelId' in h][:60]
+    with backend.span("offers"):
+        offers = await amadeus.fetch_offers(hotel_ids, checkin, checkout, adults, batch_size=20)
+
+    with backend.span("merge"):
+        merged = backend.merge_hotel_offers(hotels, offers)
+    return await asyncio.to_thread(backend.store_live_hotels, city, checkin, checkout, adults, merged)
+
+# ----------------------------
+# 2. Single-flight (event loop + cross-process)
+# ----------------------------
+class AsyncSingleFlight:
+    """
+    Coalesces concurrent calls with the same key on one event loop. The first
+    caller starts the work as a task; everyone (the first caller included)
+    awaits it shielded, so a disconnecting client never cancels shared work.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    async def do(self, key, fn):
+        task = self.tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.tasks[key] = task
+            task.add_done_callback(lambda _: self.tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+live_fetches = AsyncSingleFlight()
+
+# Event loop -> {lock path: asyncio.Lock}. Searches share lock files (stripes),
+# so coroutines of one worker queue here first: only one of them per file waits
+# on flock in a thread, and waiters can't take every thread the holder needs
+loop_file_locks = weakref.WeakKeyDictionary()
+
+@asynccontextmanager
+async def async_file_lock(path):
+    """
+    backend.file_lock for coroutines: coroutines of this worker take turns on an
+    asyncio.Lock, then the blocking flock wait (other workers) runs in a thread.
+    """
+    local = loop_file_locks.setdefault(asyncio.get_running_loop(), {}).setdefault(path, asyncio.Lock())
+    async with local:
+        async with flock_in_thread(path):
+            yield
+
+@asynccontextmanager
+async def flock_in_thread(path):
+    lock = backend.file_lock(path)
+    acquire = asyncio.ensure_future(asyncio.to_thread(lock.__enter__))
+    try:
+        await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        # The thread still gets the lock eventually: release it then, or it leaks
+        acquire.add_done_callback(
+            lambda f: f.cancelled() or f.exception() or lock.__exit__(None, None, None))
+        raise
+    try:
+        yield
+    finally:
+        lock.__exit__(None, None, None)  # Unlock never blocks
+
+async def fetch_live_hotels_async(city, checkin, checkout, adults, force=False):
+    """
+    Async fetch_live_hotels: one fetch per search per event loop, and other
+    workers (sync or async) wait on the same file lock and reuse its result.
+
+    Returns:
+        tuple: (hotel_list, from_cache); from_cache is False only for the
+        caller whose own call fetched from Amadeus
+    """
+    city_code = backend.CITY_CODES[city]
+    key = (city_code, checkin, checkout, adults)
+    started = time.time()
+    leader = False
+
+    async def load():
+        nonlocal leader
+        leader = True
+        async with async_file_lock(backend.offers_lock_path(key)):
+            try:
+                hotels = await asyncio.to_thread(backend.read_cached_hotels, key, started if force else None)
+                if hotels is not None:
+                    return hotels, True
+            except Exception as e:
+                print(f"Failed to read cached offers: {e}")
+            return await fetch_and_cache_hotels_async(city, checkin, checkout, adults), False
+
+    hotels, from_cache = await live_fetches.do((city_code, checkin, checkout, adults, force), load)
+    return hotels, from_cache or not leader
+
+# ----------------------------
+# 3. Async Routes
+# ----------------------------
+def encode(payload):
+    return backend.encode_json(payload)
+
+async def live_recommend(data):
+    """Async POST /live_recommend (same responses as the Flask view)."""
+    print(f"live_recommend called with data: {data}")
+    try:
+        city, checkin, checkout, adults = backend.parse_live_search(data)
+    except ValueError as e:
+        return 400, encode({"error": str(e)})
+    city_code = backend.CITY_CODES[city]
+
+    with backend.span("cache_lookup"):
+        body = await asyncio.to_thread(backend.read_cached_live_body, city, checkin, checkout, adults)
+    if body is not None:
+        return 200, body
+
+    try:
+        hotel_list, from_cache = await fetch_live_hotels_async(city, checkin, checkout, adults)
+        body = backend.cache_live_response((city_code, checkin, checkout, adults), hotel_list)
+        if from_cache:
+            return 200, body
+        with backend.span("serialize"):
+            return 200, encode(backend.live_result(hotel_list))
+    except Exception as exc:
+        return 500, encode({"error": "Failed fetching hotels", "details": str(exc)})
+
+async def refresh(data):
+    """Async POST /refresh (same responses as the Flask view)."""
+    print(f"Refresh called with data: {data}")
+    try:
+        city, checkin, checkout, adults = backend.parse_live_search(data)
+    except ValueError as e:
+        return 400, encode({"error": str(e)})
+
+    try:
+        hotel_list, _ = await fetch_live_hotels_async(city, checkin, checkout, adults, force=True)
+        backend.cache_live_response((backend.CITY_CODES[city], checkin, checkout, adults), hotel_list)
+        with backend.span("serialize"):
+            return 200, encode(backend.refresh_result(hotel_list))
+    except Exception as exc:
+        return 500, encode({"error": "Error refreshing hotel data", "details": str(exc)})
+
+async def live_search_events_async(city, checkin, checkout, adults):
+    """
+    Async backend.live_search_events: same frames, cache reuse and file lock.
+    A cache miss is produced by its own task, which releases the lock once
+    the entry is stored, however slowly the client reads.
+    """
+    city_code = backend.CITY_CODES[city]
+    cache_key = (city_code, checkin, checkout, adults)
+    yield "meta", {"city": city, "checkin_date": checkin, "checkout_date": checkout, "adults": adults}
+
+    with backend.span("cache_lookup"):
+        hotels = await asyncio.to_thread(backend.read_live_cache_file, city, checkin, checkout, adults)
+    backend.prefetcher.note_lookup(cache_key, hotels is not None)
+    frames = (produce_in_background(locked_search_events_async(city, checkin, checkout, adults))
+              if hotels is None else cached_search_events(hotels))
+    async with aclosing(frames):
+        async for frame in frames:
+            yield frame
+
+async def cached_search_events(hotels):
+    for frame in backend.cached_search_events(hotels):
+        yield frame
+
+async def locked_search_events_async(city, checkin, checkout, adults):
+    """Async backend.locked_search_events (cancelled by cancelling its task)."""
+    cache_key = (backend.CITY_CODES[city], checkin, checkout, adults)
+    async with async_file_lock(backend.offers_lock_path(cache_key)):
+        hotels = await asyncio.to_thread(backend.read_cached_hotels, cache_key)
+        if hotels is None:
+            async with aclosing(stream_and_cache_hotels_async(city, checkin, checkout, adults)) as frames:
+                async for frame in frames:
+                    yield frame
+            return
+    for frame in backend.cached_search_events(hotels):
+        yield frame
+
+async def produce_in_background(frames):
+    """
+    Async backend.produce_in_background: drains the async generator `frames`
+    in its own task into a queue this generator reads from. Closing this
+    generator (client disconnected) cancels the task and its upstream batches.
+    """
+    queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async with aclosing(frames):
+                async for frame in frames:
+                    queue.put_nowait(frame)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(backend.STREAM_END)
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            frame = await queue.get()
+            if frame is backend.STREAM_END:
+                return
+            if isinstance(frame, Exception):
+                raise frame
+            yield frame
+    finally:
+        task.cancel()
+
+async def stream_and_cache_hotels_async(city, checkin, checkout, adults):
+    """Async backend.stream_and_cache_hotels."""
+    city_code = backend.CITY_CODES[city]
+    with backend.span("hotel_list"):
+        hotels = await get_cached_hotel_list_async(city_code)
+    if not hotels:
+        raise Exception(f"No hotels found for city '{city}'.")
+    selected = backend.pick_hotels(hotels, sample_size=60)
+    hotel_ids = [h['hotelId'] for h in selected if 'hotelId' in h][:60]
+
+    frames = []
+    async with aclosing(amadeus.iter_offers(hotel_ids, checkin, checkout, adults, batch_size=20)) as batches:
+        async for offers in batches:
+            with backend.span("merge"):
+                merged = backend.merge_hotel_offers(hotels, offers)
+            df = await asyncio.to_thread(backend.score_live_hotels, merged)
+            frames.append(df)
+            yield "hotels", {"batch": len(frames) - 1, "hotels": backend.frame_to_records(df)}
+
+    df = await asyncio.to_thread(backend.combine_scored, frames)
+    hotel_list = await asyncio.to_thread(backend.save_live_hotels, city, checkin, checkout, adults, df)
+    backend.cache_live_response((city_code, checkin, checkout, adults), hotel_list)
+    yield "done", {"message": f"Found {len(hotel_list)} hotels with offers.",
+                   "hotel_count": len(hotel_list), "from_cache": False}
+
+async def live_recommend_stream(data, fmt):
+    """Streamed POST /live_recommend: (status, body) with an async iterator body on success."""
+    print(f"live_recommend called with data: {data}")
+    try:
+        city, checkin, checkout, adults = backend.parse_live_search(data)
+    except ValueError as e:
+        return 400, encode({"error": str(e)})
+
+    async def generate():
+        async with aclosing(live_search_events_async(city, checkin, checkout, adults)) as events:
+            try:
+                async for event, payload in events:
+                    yield backend.encode_event(fmt, event, payload)
+            except Exception as exc:
+                yield backend.encode_event(fmt, "error", {"error": "Failed fetching hotels", "details": str(exc)})
+
+    return 200, generate()
+
+ASYNC_ROUTES = {
+    "/live_recommend": live_recommend,
+    "/refresh": refresh,
+}
+
+# ----------------------------
+# 4. ASGI Application
+# ----------------------------
+async def read_json(receive):
+    """Reads the whole request body and decodes it as JSON (None if empty/invalid)."""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    try:
+        return json.loads(b"".join(chunks) or b"null")
+    except ValueError:
+        return None
+
+async def send_json(request_headers, send, status, body, started):
+    """
+    Sends a JSON body; 200s get the same compression/ETag handling as Flask
+    responses. Returns the (status, body bytes) actually sent.
+    """
+    headers = [(b"content-type", b"application/json")]
+    vary = ["Origin"]
+    if status == 200:
+        with backend.span("compress"):
+            status, body, etag, encoding = backend.negotiate(
+                body, request_headers.get("accept-encoding"), request_headers.get("if-none-match"),
+                backend.COMPRESS_MIN_BYTES, backend.compressed_response_cache,
+            )
+        headers.append((b"etag", f'"{etag}"'.encode()))
+        if encoding:
+            headers.append((b"content-encoding", encoding.encode()))
+        vary.append("Accept-Encoding")
+    headers.append((b"content-length", str(len(body)).encode()))
+    headers += cors_headers(request_headers)
+    headers.append((b"vary", ", ".join(vary).encode()))
+    profile = backend.current_profile.get()
+    if profile is not None:
+        timing = backend.server_timing(profile + [("total", time.perf_counter() - started)])
+        headers.append((b"server-timing", timing.encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+    return status, len(body)
+
+def cors_headers(request_headers):
+    origin = request_headers.get("origin", "")
+    if origin in backend.CORS_ORIGINS:
+        return [(b"access-control-allow-origin", origin.encode("latin-1"))]
+    return []
+
+async def send_stream(request_headers, receive, send, chunks, fmt):
+    """
+    Sends an async iterator of frames as they are produced. If the client
+    disconnects first, the producer is cancelled (and with it the upstream
+    batches it was waiting on). Returns the number of body bytes sent.
+    """
+    headers = [(k.lower().encode(), v.encode()) for k, v in backend.stream_headers(fmt).items()]
+    headers += cors_headers(request_headers) + [(b"vary", b"Origin")]
+    await send({"type": "http.response.start", "status": 200, "headers": headers})
+    sent = 0
+
+    async def pump():
+        nonlocal sent
+        try:
+            async for chunk in chunks:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                sent += len(chunk)
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await chunks.aclose()
+
+    async def disconnected():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    producer = asyncio.ensure_future(pump())
+    watcher = asyncio.ensure_future(disconnected())
+    await asyncio.wait({producer, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    watcher.cancel()
+    if not producer.done():
+        print("Client disconnected mid-stream, cancelling the search")
+        producer.cancel()
+    try:
+        await producer
+    except asyncio.CancelledError:
+        pass
+    return sent
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            backend.start_background_workers()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await amadeus.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def application(scope, receive, send):
+    """Routes Amadeus-bound POSTs to the async handlers and everything else to Flask."""
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    handler = ASYNC_ROUTES.get(scope.get("path")) if scope["type"] == "http" and scope["method"] == "POST" else None
+    if handler is None:
+        return await flask_app(scope, receive, send)
+
+    started = time.perf_counter()
+    request_headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+    query = parse_qs(scope.get("query_string", b"").decode())
+    flag = request_headers.get("x-profile") or query.get("profile", [None])[0]
+    profiling = backend.profiling_requested(flag, request_headers.get("x-admin-token"))
+    stream = backend.stream_format(request_headers.get("accept"), query.get("stream", [None])[0])
+    if handler is live_recommend and stream:
+        handler = lambda data: live_recommend_stream(data, stream)
+    token = backend.current_profile.set([] if profiling else None)
+    try:
+        status, body = await handler(await read_json(receive))
+        if isinstance(body, bytes):
+            status, nbytes = await send_json(request_headers, send, status, body, started)
+        else:
+            nbytes = await send_stream(request_headers, receive, send, body, stream)
+    finally:
+        backend.current_profile.reset(token)
+    backend.observe_request(scope["path"], "POST", status, time.perf_counter() - started, nbytes)
@@ -0,0 +1,12 @@
+# ============================
+# benchmarks - Reproducible benchmarks and load tests for the backend
+# ============================
+#
+# Run from backend/:
+#   python -m benchmarks.micro --out results/micro.json
+#   python -m benchmarks.load --duration 30 --out results/load.json
+#   python -m benchmarks.compare results/base.json results/load.json
+#   python -m benchmarks.fake_amadeus --port 8089   (standalone fake upstream)
+#
+# Every runner writes one JSON document (metadata + metrics) so results from
+# two commits can be diffed with benchmarks.compare.
@@ -0,0 +1,81 @@
+# ============================
+# compare.py - Diff two benchmark result files
+# ============================
+#
+# Compares every latency/throughput/memory metric present in both files
+# (micro or load results) and flags changes beyond --threshold in the bad
+# direction. Exits 1 if any metric regressed, so it can gate CI.
+#
+# Usage (from backend/):
+#   python -m benchmarks.compare BASE.json NEW.json [--threshold 0.10]
+
+import argparse
+import json
+import sys
+
+# Metric name suffix → True if higher is better
+METRIC_DIRECTIONS = {
+    "_ms": False,
+    "_mb": False,
+    "_kb": False,
+    "error_rate": False,
+    "throughput_rps": True,
+    "items_per_s": True,
+}
+
+def direction(name):
+    for suffix, higher_is_better in METRIC_DIRECTIONS.items():
+        if name.endswith(suffix):
+            return higher_is_better
+    return None
+
+def flatten(data, prefix=""):
+    """{'a': {'b': 1}} → {'a.b': 1}, numeric leaves only (run metadata skipped)."""
+    out = {}
+    for key, value in data.items():
+        if key == "meta":
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[path] = value
+    return out
+
+def compare(base, new, threshold):
+    """Returns rows (metric, base, new, relative change, verdict) for shared tracked metrics."""
+    base_flat, new_flat = flatten(base), flatten(new)
+    rows = []
+    for path in sorted(set(base_flat) & set(new_flat)):
+        higher_is_better = direction(path.rsplit(".", 1)[-1])
+        if higher_is_better is None:
+            continue
+        old, cur = base_flat[path], new_flat[path]
+        change = (cur - old) / old if old else (0.0 if cur == old else float("inf"))
+        worse = -change if higher_is_better else change
+        verdict = "REGRESSION" if worse > threshold else ("improved" if worse < -threshold else "")
+        rows.append((path, old, cur, change, verdict))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change treated as significant")
+    args = parser.parse_args(argv)
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    rows = compare(base, new, args.threshold)
+    width = max((len(r[0]) for r in rows), default=10)
+    for path, old, cur, change, verdict in rows:
+        print(f"{path:<{width}}  {old:>12.3f}  {cur:>12.3f}  {change:>+8.1%}  {verdict}")
+    regressions = [r for r in rows if r[4] == "REGRESSION"]
+    print(f"\n{len(rows)} metrics compared, {len(regressions)} regressions (threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+# ============================
+# fake_amadeus.py - Local fake of the Amadeus endpoints the backend calls
+# ============================
+#
+# Serves the OAuth token, hotel directory (by-city) and hotel-offers endpoints
+# with deterministic data, configurable latency and injected failures (5xx and
+# 429 with Retry-After), so benchmarks and tests never touch the real API or
+# its quota. Besides the random failure rates, tests can fail specific hotel
+# IDs or throttle the first N calls deterministically.
+#
+# Point the app at it with AMADEUS_BASE_URL=http://127.0.0.1:<port>.
+# GET /__stats returns request counts per endpoint and status.
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+TOKEN_PATH = "/v1/security/oauth2/token"
+HOTEL_LIST_PATH = "/v1/reference-data/locations/hotels/by-city"
+OFFERS_PATH = "/v3/shopping/hotel-offers"
+
+PROPERTY_TYPES = ["HOTEL", "HOSTEL", "APARTMENT", "RESORT", "GUEST_HOUSE"]
+NAME_WORDS = ["Grand", "Taj", "Residency", "Palace", "Inn", "Comfort", "Royal", "Plaza", "Suites", "Lodge"]
+
+class FakeAmadeusConfig:
+    """
+    Knobs for the fake upstream (latencies in ms, rates in 0..1).
+
+    Deterministic failures: offer requests for any hotel in `fail_hotel_ids`
+    get a 503, and the first `throttle_first` directory/offer calls get a 429
+    with `Retry-After: retry_after` seconds.
+    """
+
+    def __init__(self, latency_ms=200, jitter_ms=50, error_rate=0.0, throttle_rate=0.0,
+                 hotels_per_city=300, availability=0.8, seed=0, fail_hotel_ids=(), throttle_first=0,
+                 retry_after=1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.hotels_per_city = hotels_per_city
+        self.availability = availability
+        self.seed = seed
+        self.fail_hotel_ids = set(fail_hotel_ids)
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+
+    def as_dict(self):
+        return dict(vars(self), fail_hotel_ids=sorted(self.fail_hotel_ids))
+
+def fake_hotels(city_code, count, seed=0):
+    """Deterministic hotel directory for a city code."""
+    rng = random.Random(f"{seed}:{city_code}")
+    lat0, lng0 = rng.uniform(10, 30), rng.uniform(70, 90)
+    hotels = []
+    for i in range(count):
+        hotels.append({
+            "hotelId": f"{city_code[:2]}{city_code}{i:04d}",
+            "name": f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {city_code} {i}",
+            "geoCode": {"latitude": round(lat0 + rng.uniform(-0.2, 0.2), 5),
+                        "longitude": round(lng0 + rng.uniform(-0.2, 0.2), 5)},
+            "address": {"lines": [f"{rng.randint(1, 300)} Main Road"], "cityName": city_code},
+            "type": rng.choice(PROPERTY_TYPES),
+            "rating": str(rng.randint(1, 5)) if rng.random() < 0.7 else None,
+        })
+    return hotels
+
+def fake_offer(hotel_id, checkin, adults, seed=0, availability=0.8):
+    """Offer entry for one hotel (or None when 'sold out'), stable per search."""
+    h = zlib.crc32(f"{seed}:{hotel_id}:{checkin}:{adults}".encode())
+    if (h % 1000) / 1000 >= availability:
+        return None
+    return {
+        "hotel": {"hotelId": hotel_id},
+        "offers": [{"price": {"total": f"{1500 + h % 9000}.00", "currency": "INR"}}],
+    }
+
+class FakeAmadeusServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, FakeAmadeusHandler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.directories = {}
+        self.calls = 0  # Directory/offer calls so far (for throttle_first)
+        self.timeline = []  # (perf_counter, path) of every directory/offer call, for pacing checks
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def draw(self):
+        with self.lock:
+            return self.rng.random(), self.rng.gauss(0, 1)
+
+    def note_call(self, endpoint):
+        """Records a directory/offer call; returns its number (1-based)."""
+        with self.lock:
+            self.calls += 1
+            self.timeline.append((time.perf_counter(), endpoint))
+            return self.calls
+
+    def directory(self, city_code):
+        with self.lock:
+            if city_code not in self.directories:
+                self.directories[city_code] = fake_hotels(city_code, self.config.hotels_per_city, self.config.seed)
+            return self.directories[city_code]
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+class FakeAmadeusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.server.count(f"{self.endpoint}:{status}")  # Before the client can see the response
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate_upstream(self, hotel_ids=()):
+        """Sleeps for the configured latency; returns True if a failure was sent instead."""
+        config = self.server.config
+        call = self.server.note_call(self.endpoint) if self.endpoint != TOKEN_PATH else None
+        roll, noise = self.server.draw()
+        time.sleep(max(0.0, config.latency_ms + noise * config.jitter_ms) / 1000)
+        if roll < config.error_rate or config.fail_hotel_ids.intersection(hotel_ids):
+            self.send_json(503, {"errors": [{"status": 503, "title": "injected failure"}]})
+            return True
+        throttled = call is not None and call <= config.throttle_first
+        if throttled or roll < config.error_rate + config.throttle_rate:
+            self.send_json(429, {"errors": [{"status": 429, "title": "too many requests"}]},
+                           {"Retry-After": str(config.retry_after)})
+            return True
+        return False
+
+    def authorized(self):
+        if not self.headers.get("Authorization", "").startswith("Bearer fake-"):
+            self.send_json(401, {"errors": [{"status": 401, "title": "invalid token"}]})
+            return False
+        return True
+
+    def do_POST(self):
+        self.endpoint = urlparse(self.path).path
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.endpoint != TOKEN_PATH:
+            return self.send_json(404, {"errors": [{"status": 404}]})
+        if not self.simulate_upstream():
+            self.send_json(200, {"access_token": f"fake-{time.time_ns()}", "expires_in": 1799})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.endpoint = url.path
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/__stats":
+            with self.server.lock:
+                return self.send_json(200, dict(self.server.stats))
+        if url.path not in (HOTEL_LIST_PATH, OFFERS_PATH):
+            return self.send_json(404, {"errors": [{"status": 404}]})
+        hotel_ids = [hid for hid in query.get("hotelIds", "").split(",") if hid]
+        if not self.authorized() or self.simulate_upstream(hotel_ids):
+            return
+
+        config = self.server.config
+        if url.path == HOTEL_LIST_PATH:
+            return self.send_json(200, {"data": self.server.directory(query.get("cityCode", "XXX"))})
+        offers = [fake_offer(hid, query.get("checkInDate"), query.get("adults"), config.seed, config.availability)
+                  for hid in hotel_ids]
+        self.send_json(200, {"data": [o for o in offers if o]})
+
+def start_fake_amadeus(config=None, host="127.0.0.1", port=0):
+    """Starts the fake server on a daemon thread and returns it (`.url`, `.stats`, `.shutdown()`)."""
+    server = FakeAmadeusServer((host, port), config or FakeAmadeusConfig())
+    threading.Thread(target=server.serve_forever, name="fake-amadeus", daemon=True).start()
+    return server
+
+def add_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=200, help="mean upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="latency standard deviation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of calls answered 429")
+    parser.add_argument("--hotels-per-city", type=int, default=300)
+    parser.add_argument("--availability", type=float, default=0.8, help="fraction of hotels with an offer")
+    parser.add_argument("--seed", type=int, default=0)
+
+def config_from_args(args):
+    return FakeAmadeusConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate,
+                             args.hotels_per_city, args.availability, args.seed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake Amadeus API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = FakeAmadeusServer((args.host, args.port), config_from_args(args))
+    print(f"Fake Amadeus listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
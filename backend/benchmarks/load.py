@@ -0,0 +1,224 @@
+# ============================
+# load.py - Load generator against a real server + fake Amadeus
+# ============================
+#
+# Starts the fake Amadeus server in-process, launches the app under gunicorn
+# (sync `app:app`, or `--server asgi` for asgi:application on uvicorn workers)
+# pointed at it with an isolated cache directory, then drives a weighted mix
+# of requests from --concurrency client threads for --duration seconds.
+#
+# Reports p50/p95/p99 latency and throughput per scenario and overall, status
+# counts, server PSS (peak/end, all worker processes) and upstream calls seen
+# by the fake server, as one JSON document.
+#
+# Usage (from backend/):
+#   python -m benchmarks.load --duration 30 --concurrency 16 --latency-ms 300 \
+#       --error-rate 0.02 --mix oyo=0.6,live=0.35,refresh=0.05 --out results/load.json
+
+import argparse
+import datetime
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.fake_amadeus import add_arguments, config_from_args, start_fake_amadeus
+from benchmarks.report import latency_stats, process_pss_mb, run_metadata, write_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+OYO_CITIES = ["mumbai", "delhi", "bangalore", "hyderabad", "chennai", "nowhere"]
+LIVE_CITIES = ["mumbai", "delhi", "goa", "jaipur", "pune", "chennai"]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def parse_mix(text):
+    """'oyo=0.6,live=0.4' → {'oyo': 0.6, 'live': 0.4}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}' (choose from {sorted(SCENARIOS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+# ----------------------------
+# 1. Scenarios: (method, path, json body) per request
+# ----------------------------
+def search_body(rng, args):
+    """A live search drawn from --searches distinct (city, dates) combinations."""
+    n = rng.randrange(args.searches)
+    checkin = datetime.date.today() + datetime.timedelta(days=7 + n // len(LIVE_CITIES))
+    return {
+        "city": LIVE_CITIES[n % len(LIVE_CITIES)],
+        "checkin_date": checkin.isoformat(),
+        "checkout_date": (checkin + datetime.timedelta(days=2)).isoformat(),
+        "adults": 1,
+    }
+
+SCENARIOS = {
+    "oyo": lambda rng, args: ("POST", "/oyo_hotels", {"city": rng.choice(OYO_CITIES)}),
+    "live": lambda rng, args: ("POST", "/live_recommend", search_body(rng, args)),
+    "refresh": lambda rng, args: ("POST", "/refresh", search_body(rng, args)),
+    "recommend": lambda rng, args: ("POST", "/recommend", {"city": rng.choice(OYO_CITIES[:-1]), "limit": 20}),
+    "nearby": lambda rng, args: ("POST", "/nearest_hotels", {"lat": 19.07, "lng": 72.87, "k": 10}),
+}
+
+# ----------------------------
+# 2. Server under test
+# ----------------------------
+def server_command(args, port):
+    bind = f"127.0.0.1:{port}"
+    if args.server == "asgi":
+        return [sys.executable, "-m", "gunicorn", "asgi:application", "-k", "uvicorn.workers.UvicornWorker",
+                "-w", str(args.workers), "-b", bind, "--timeout", "120"]
+    return [sys.executable, "-m", "gunicorn", "app:app", "-w", str(args.workers),
+            "--threads", str(args.threads), "-b", bind, "--timeout", "120"]
+
+def start_server(args, upstream_url, cache_dir):
+    port = free_port()
+    env = dict(os.environ,
+               AMADEUS_BASE_URL=upstream_url,
+               AMADEUS_API_KEY="bench", AMADEUS_API_SECRET="bench",
+               LIVE_CACHE_DIR=cache_dir,
+               OYO_WATCH_INTERVAL="0", PREFETCH_CITIES="")
+    for item in args.env or []:
+        key, _, value = item.partition("=")
+        env[key] = value
+    log = open(os.path.join(cache_dir, "server.log"), "w")
+    proc = subprocess.Popen(server_command(args, port), cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited early, see {log.name}")
+        try:
+            requests.post(f"{base_url}/oyo_hotels", json={"city": "mumbai"}, timeout=2)
+            return proc, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Server did not become ready within 60s")
+
+# ----------------------------
+# 3. Load loop
+# ----------------------------
+def run_load(args, base_url, pid):
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    samples = {name: [] for name in names}  # name -> [(latency_ms, status)]
+    pss = []
+    stop = threading.Event()
+
+    def sample_memory():
+        while not stop.is_set():
+            value = process_pss_mb(pid)
+            if value is not None:
+                pss.append(value)
+            stop.wait(0.5)
+
+    def client(worker_id, deadline):
+        rng = random.Random(f"{args.seed}:{worker_id}")
+        session = requests.Session()
+        session.headers["Accept-Encoding"] = "gzip, br" if args.compress else "identity"
+        local = {name: [] for name in names}
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body = SCENARIOS[name](rng, args)
+            start = time.perf_counter()
+            try:
+                status = session.request(method, base_url + path, json=body, timeout=args.timeout).status_code
+            except requests.RequestException:
+                status = "error"
+            local[name].append(((time.perf_counter() - start) * 1000, status))
+        return local
+
+    threading.Thread(target=sample_memory, daemon=True).start()
+    started = time.monotonic()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for local in pool.map(lambda i: client(i, deadline), range(args.concurrency)):
+            for name, values in local.items():
+                samples[name].extend(values)
+    elapsed = time.monotonic() - started
+    stop.set()
+    return samples, elapsed, pss
+
+def summarize(samples, elapsed):
+    scenarios, everything = {}, []
+    for name, values in samples.items():
+        stats = latency_stats([ms for ms, _ in values], elapsed)
+        statuses = {}
+        for _, status in values:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        stats["status_counts"] = statuses
+        stats["error_rate"] = round(sum(n for s, n in statuses.items() if not s.startswith(("2", "3"))) / len(values), 4) if values else 0.0
+        scenarios[name] = stats
+        everything.extend(ms for ms, _ in values)
+    return scenarios, latency_stats(everything, elapsed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the backend against a fake Amadeus API.")
+    parser.add_argument("--server", choices=["sync", "asgi"], default="sync")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per sync worker")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads")
+    parser.add_argument("--mix", default="oyo=0.6,live=0.35,refresh=0.05",
+                        help=f"scenario weights, from {sorted(SCENARIOS)}")
+    parser.add_argument("--searches", type=int, default=24,
+                        help="distinct live searches (fewer = more cache hits)")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request client timeout")
+    parser.add_argument("--compress", action="store_true", help="send Accept-Encoding: gzip, br")
+    parser.add_argument("--env", action="append", metavar="KEY=VALUE", help="extra server environment")
+    parser.add_argument("--keep-cache", action="store_true", help="keep the server's cache dir and log")
+    parser.add_argument("--out", help="JSON results path (default: stdout)")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    parse_mix(args.mix)
+
+    upstream = start_fake_amadeus(config_from_args(args))
+    cache_dir = tempfile.mkdtemp(prefix="bench_load_")
+    proc, base_url = start_server(args, upstream.url, cache_dir)
+    print(f"Server {' '.join(server_command(args, 0)[2:4])} at {base_url}, upstream {upstream.url}", file=sys.stderr)
+    try:
+        pss_start = process_pss_mb(proc.pid)
+        samples, elapsed, pss = run_load(args, base_url, proc.pid)
+        pss_end = process_pss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        upstream.shutdown()
+        if not args.keep_cache:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    scenarios, overall = summarize(samples, elapsed)
+    with upstream.lock:
+        upstream_calls = dict(upstream.stats)
+    results = {
+        "meta": run_metadata("load", dict(vars(args), upstream=upstream.config.as_dict())),
+        "elapsed_s": round(elapsed, 3),
+        "overall": overall,
+        "scenarios": scenarios,
+        "server": {"pss_start_mb": pss_start, "pss_peak_mb": max(pss) if pss else None, "pss_end_mb": pss_end},
+        "upstream_calls": upstream_calls,
+    }
+    for name, stats in scenarios.items():
+        print(f"{name:<10} n={stats['count']:<6} p50={stats.get('p50_ms')}ms p95={stats.get('p95_ms')}ms "
+              f"p99={stats.get('p99_ms')}ms errors={stats['error_rate']}", file=sys.stderr)
+    write_results(results, args.out)
+    return results
+
+if __name__ == "__main__":
+    main()
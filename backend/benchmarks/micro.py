@@ -0,0 +1,134 @@
+# ============================
+# micro.py - Microbenchmarks for the backend's hot paths
+# ============================
+#
+# Times dataset loading, the per-city OYO lookup, rating (scalar + vectorized),
+# response serialization, the offer-merge step and typeahead lookups on
+# synthetic inputs scaled
+# to --rows. Each benchmark reports min/median/mean wall time over --repeat
+# runs and its peak Python allocation (tracemalloc, measured in a separate run).
+#
+# Usage (from backend/):
+#   python -m benchmarks.micro [--rows 100000] [--repeat 7] [--only NAME ...] [--out FILE]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# App logs go to stderr so stdout carries only the JSON results
+sys.stdout = sys.stderr
+
+# The app reads its configuration at import: isolate the cache, no watcher threads
+os.environ.setdefault("LIVE_CACHE_DIR", tempfile.mkdtemp(prefix="bench_cache_"))
+os.environ.setdefault("OYO_WATCH_INTERVAL", "0")
+os.environ.setdefault("PREFETCH_CITIES", "")
+
+import pandas as pd
+
+import app as backend
+from suggest_index import SuggestIndex
+from benchmarks.fake_amadeus import fake_hotels, fake_offer
+from benchmarks.report import run_metadata, write_results
+
+def time_call(fn, repeat):
+    """Runs `fn` once to warm up, then `repeat` times. Returns per-run times (ms)."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def peak_alloc_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+def scaled_oyo(rows):
+    """The OYO dataset repeated up to `rows` rows (unique hotelIds)."""
+    base = backend.read_oyo_dataset(backend.OYO_DATA_PATH if os.path.exists(backend.OYO_DATA_PATH)
+                                    else backend.OYO_CSV_PATH)
+    copies = -(-rows // len(base))
+    df = pd.concat([base] * copies, ignore_index=True).iloc[:rows].copy()
+    df["hotelId"] = df["hotelId"] + "_" + (df.index // len(base)).astype(str)
+    return df
+
+def build_benchmarks(rows):
+    """Returns {name: (fn, items processed per call)} over inputs sized by `rows`."""
+    df = scaled_oyo(rows)
+    path = backend.OYO_DATA_PATH if os.path.exists(backend.OYO_DATA_PATH) else backend.OYO_CSV_PATH
+    index = backend.build_oyo_city_index(df)
+    cities = list(index)
+    biggest = max(cities, key=lambda c: index[c]["hotel_count"])
+    client = backend.app.test_client()
+
+    ratings, ptypes, names, ids = df["Rating"], df["Property_type"], df["Hotel_name"], df["hotelId"]
+    scalar_rows = list(zip(ratings[:1000], ptypes[:1000], names[:1000], ids[:1000]))
+
+    directory = fake_hotels("BOM", max(60, rows // 100))
+    offers = [o for o in (fake_offer(h["hotelId"], "2026-01-01", 1) for h in directory) if o]
+
+    def build_suggest_index():
+        suggest = SuggestIndex()
+        for city_key, entry in index.items():
+            suggest.upsert(entry["hotels"], city_key, "oyo")
+        return suggest
+
+    suggest = build_suggest_index()
+    # Every keystroke of a few typical (and one misspelled) queries
+    keystrokes = [word[:i] for word in ("mumbai", "hotel airport", "collection o", "radisn")
+                  for i in range(1, len(word) + 1)]
+
+    return {
+        "load_oyo_hotels": (lambda: backend.read_oyo_dataset(path), None),
+        "build_oyo_city_index": (lambda: backend.build_oyo_city_index(df), len(df)),
+        "oyo_city_lookup": (lambda: [index.get(c) for c in cities], len(cities)),
+        "oyo_hotels_route": (lambda: client.post("/oyo_hotels", json={"city": biggest}), 1),
+        "calculate_final_rating": (lambda: [backend.calculate_final_rating(*r) for r in scalar_rows], len(scalar_rows)),
+        "calculate_final_ratings": (lambda: backend.calculate_final_ratings(ratings, ptypes, names, ids), len(df)),
+        "frame_to_records": (lambda: backend.frame_to_records(df), len(df)),
+        "encode_json": (lambda records=backend.frame_to_records(df): backend.encode_json({"hotels": records}), len(df)),
+        "merge_hotel_offers": (lambda: backend.merge_hotel_offers(directory, offers), len(offers)),
+        "build_suggest_index": (build_suggest_index, len(df)),
+        "suggest_keystrokes": (lambda: [suggest.suggest(q, 8) for q in keystrokes], len(keystrokes)),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run backend microbenchmarks.")
+    parser.add_argument("--rows", type=int, default=100000, help="synthetic dataset size")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--only", nargs="*", help="benchmark names to run (default: all)")
+    parser.add_argument("--out", help="JSON results path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    benchmarks = build_benchmarks(args.rows)
+    results = {}
+    for name, (fn, items) in benchmarks.items():
+        if args.only and name not in args.only:
+            continue
+        times = time_call(fn, args.repeat)
+        median = statistics.median(times)
+        results[name] = {
+            "min_ms": round(min(times), 3),
+            "median_ms": round(median, 3),
+            "mean_ms": round(statistics.fmean(times), 3),
+            "peak_alloc_kb": peak_alloc_kb(fn),
+        }
+        if items:
+            results[name]["items"] = items
+            results[name]["items_per_s"] = round(items / (median / 1000), 1) if median else None
+        print(f"{name:<24} median {median:10.3f} ms", file=sys.stderr)
+
+    write_results({"meta": run_metadata("micro", vars(args)), "benchmarks": results}, args.out)
+    return results
+
+if __name__ == "__main__":
+    main()
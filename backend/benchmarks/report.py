@@ -0,0 +1,94 @@
+# ============================
+# report.py - Shared result helpers (percentiles, metadata, JSON output)
+# ============================
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import numpy as np
+
+def latency_stats(latencies_ms, elapsed_s=None):
+    """Summary of a list of latencies (ms): count, mean, p50/p95/p99, max and throughput."""
+    if not latencies_ms:
+        return {"count": 0}
+    values = np.asarray(latencies_ms, dtype=float)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    stats = {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+    if elapsed_s:
+        stats["throughput_rps"] = round(values.size / elapsed_s, 2)
+    return stats
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run_metadata(kind, config):
+    """Header identifying a run: what ran, on which commit/machine, with which settings."""
+    return {
+        "kind": kind,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+    }
+
+def write_results(results, path=None):
+    """Writes results as JSON to `path` (directories created) or the real stdout."""
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if not path:
+        print(text, file=sys.__stdout__)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"Results written to {path}", file=sys.stderr)
+
+def read_kb(path, field):
+    """Value (kB) of a "<field>: <n> kB" line in a /proc file, or None."""
+    with open(path) as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return None
+
+def process_pss_mb(pid):
+    """
+    Proportional set size (MB) of `pid` plus its children, from /proc (None
+    where unavailable). Pages shared between the processes - e.g. a preloaded
+    gunicorn master and its forked workers - are split between them instead
+    of counted once per process as in RSS, so the total is the memory they
+    actually use. Falls back to RSS on kernels without smaps_rollup.
+    """
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+    total_kb = 0
+    for p in pids:
+        try:
+            try:
+                total_kb += read_kb(f"/proc/{p}/smaps_rollup", "Pss:") or 0
+            except FileNotFoundError:
+                total_kb += read_kb(f"/proc/{p}/status", "VmRSS:") or 0
+        except OSError:
+            if p == pid:
+                return None
+    return round(total_kb / 1024, 1)
@@ -0,0 +1,122 @@
+# ============================
+# startup.py - Import time and time-to-first-response
+# ============================
+#
+# Measures, over --repeat fresh runs each:
+#   - import: `import app` in a new interpreter (wall time of the import and
+#     the app's own import_seconds)
+#   - per gunicorn mode (preload on/off): time from launch until the first
+#     /oyo_hotels response, how long that request took (including time queued
+#     while the server was still starting), time until /ready answers 200,
+#     and server memory once warm (PSS of master + workers)
+#
+# Usage (from backend/):
+#   python -m benchmarks.startup [--repeat 3] [--workers 2] [--out results/startup.json]
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+from benchmarks.load import BACKEND_DIR, free_port
+from benchmarks.report import process_pss_mb, run_metadata, write_results
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app; "
+    "print(__import__('json').dumps({'wall': time.perf_counter() - t, 'app': app.startup['import_seconds']}))"
+)
+
+def isolated_env(cache_dir, **extra):
+    """App environment with its own cache directory, no upstream and no polling."""
+    return dict(os.environ, LIVE_CACHE_DIR=cache_dir, OYO_WATCH_INTERVAL="0", PREFETCH_CITIES="",
+                AMADEUS_BASE_URL="http://127.0.0.1:9", **extra)
+
+def measure_import(cache_dir):
+    # APP_PRELOAD keeps the import from warming up in the background meanwhile
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, capture_output=True, text=True,
+                         env=isolated_env(cache_dir, APP_PRELOAD="true"), check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    return result["wall"] * 1000, result["app"] * 1000
+
+def wait_for(url, proc, deadline, method="get", **kwargs):
+    """Polls `url` until it answers 200. Returns the duration (ms) of the successful request."""
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Server exited early")
+        start = time.perf_counter()
+        try:
+            if getattr(requests, method)(url, timeout=30, **kwargs).status_code == 200:
+                return (time.perf_counter() - start) * 1000
+        except requests.RequestException:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError(f"{url} not ready in time")
+
+def measure_server(args, preload, cache_dir):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = isolated_env(cache_dir, GUNICORN_PRELOAD="true" if preload else "false")
+    log = open(os.path.join(cache_dir, "server.log"), "w")
+    launched = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-w", str(args.workers),
+                             "-b", f"127.0.0.1:{port}", "--timeout", "120"],
+                            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        deadline = time.monotonic() + 120
+        first_ms = wait_for(f"{base_url}/oyo_hotels", proc, deadline, method="post", json={"city": "mumbai"})
+        first_response_ms = (time.perf_counter() - launched) * 1000
+        wait_for(f"{base_url}/ready", proc, deadline)
+        ready_ms = (time.perf_counter() - launched) * 1000
+        return first_response_ms, first_ms, ready_ms, process_pss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        log.close()
+
+def summary(values):
+    return {"median_ms": round(statistics.median(values), 1), "min_ms": round(min(values), 1)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure backend import time and time-to-first-response.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument("--out", help="JSON results path (default: stdout)")
+    args = parser.parse_args(argv)
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        imports = [measure_import(cache_dir) for _ in range(args.repeat)]
+        results = {
+            "meta": run_metadata("startup", vars(args)),
+            "import": {"wall": summary([w for w, _ in imports]), "app_reported": summary([a for _, a in imports])},
+        }
+        for preload in (False, True):
+            runs = [measure_server(args, preload, cache_dir) for _ in range(args.repeat)]
+            pss = [r[3] for r in runs if r[3] is not None]
+            results["preload" if preload else "no_preload"] = {
+                "time_to_first_response": summary([r[0] for r in runs]),
+                "first_request": summary([r[1] for r in runs]),
+                "time_to_ready": summary([r[2] for r in runs]),
+                "pss_mb": max(pss) if pss else None,
+            }
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    for name in ("no_preload", "preload"):
+        r = results[name]
+        print(f"{name:<11} first response {r['time_to_first_response']['median_ms']} ms "
+              f"(request {r['first_request']['median_ms']} ms), ready {r['time_to_ready']['median_ms']} ms, "
+              f"memory {r['pss_mb']} MB PSS",
+              file=sys.stderr)
+    write_results(results, args.out)
+    return results
+
+if __name__ == "__main__":
+    main()
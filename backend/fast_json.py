@@ -0,0 +1,159 @@
+# ============================
+# fast_json.py - Fast JSON serialization + response compression
+# ============================
+#
+# Hotel payloads are built from DataFrames. `frame_to_records` turns a frame
+# into JSON-safe dicts in one pass per column (NaN/±Inf → None with a NumPy
+# mask), instead of rebuilding every dict and list afterwards.
+#
+# Encoding uses orjson when installed (falls back to the standard library),
+# and `OrjsonProvider` plugs it into Flask so `jsonify` uses it too.
+#
+# `negotiate` picks gzip/brotli from Accept-Encoding and answers unchanged
+# bodies with 304 via strong ETags (one per body + encoding).
+
+import gzip
+import hashlib
+import json
+import math
+import sys
+
+from flask.json.provider import JSONProvider
+from werkzeug.http import parse_accept_header, parse_etags
+
+try:
+    import orjson                                # Fast JSON encoder (optional)
+except ImportError:
+    orjson = None
+try:
+    import brotli                                # Brotli compression (optional)
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# ----------------------------
+# 1. DataFrame → JSON-safe records
+# ----------------------------
+def frame_to_records(df, string_fill=None, defaults=None):
+    """
+    Converts `df` to a list of dicts in one vectorized pass per column:
+    non-finite floats become None, missing values in other columns become
+    `string_fill`, and `defaults` ({column: value}) replace missing/empty ones.
+    """
+    import numpy as np
+    import pandas as pd
+    defaults = defaults or {}
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if col.dtype.kind == "f":
+            values = col.to_numpy()
+            out = values.astype(object)
+            out[~np.isfinite(values)] = None
+        else:
+            out = col.to_numpy(dtype=object, copy=True)
+            missing = pd.isna(out)
+            if missing.any():
+                out[missing] = string_fill
+        if name in defaults:
+            out[(out == "") | pd.isna(out)] = defaults[name]
+        columns.append(out)
+    names = list(df.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+def clean_floats(obj):
+    """Replaces NaN/±Inf floats with None in nested dicts/lists (stdlib fallback only)."""
+    if isinstance(obj, dict):
+        return {k: clean_floats(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [clean_floats(v) for v in obj]
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+# ----------------------------
+# 2. Encoding
+# ----------------------------
+def _default(obj):
+    np = sys.modules.get("numpy")  # Not imported yet: obj can't be a NumPy value
+    if np is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj):
+    """
+    Encodes `obj` to compact JSON bytes with sorted keys. NaN/±Inf are
+    written as null; NumPy scalars and arrays are supported.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(clean_floats(obj), default=_default, sort_keys=True,
+                      separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by `dumps`, so jsonify skips the stdlib encoder."""
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s) if orjson is not None else json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+# ----------------------------
+# 3. Compression + ETags
+# ----------------------------
+def etag_for(body):
+    """Strong validator for an uncompressed body."""
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+def pick_encoding(accept_encoding):
+    """Best encoding the client accepts: 'br' (if available), 'gzip' or None."""
+    accept = parse_accept_header(accept_encoding or "")
+    if brotli is not None and accept.quality("br") > 0:
+        return "br"
+    if accept.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def negotiate(body, accept_encoding, if_none_match, min_size=1024, cache=None):
+    """
+    Prepares a 200 JSON `body` for one client.
+
+    Returns:
+        tuple: (status, body, etag, encoding) - 304 with an empty body if the
+        client's If-None-Match matches `etag`, else the body compressed with
+        the client's best encoding (None = sent as-is, e.g. under `min_size`).
+        `cache` (get/put by key) memoizes compressed bodies across requests.
+    """
+    encoding = pick_encoding(accept_encoding) if len(body) >= min_size else None
+    digest = etag_for(body)
+    tag = f"{digest}-{encoding}" if encoding else digest
+    if parse_etags(if_none_match).contains(tag):
+        return 304, b"", tag, encoding
+
+    if encoding:
+        compressed = cache.get(tag) if cache is not None else None
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if cache is not None:
+                cache.put(tag, compressed)
+        body = compressed
+    return 200, body, tag, encoding
@@ -0,0 +1,117 @@
+# ============================
+# geo_index.py - Nearest-hotel search over coordinates
+# ============================
+#
+# Hotels with Latitude/Longitude are grouped per city and indexed with a
+# haversine BallTree, so "within R km" and "K nearest" queries touch only
+# the relevant part of the tree instead of scanning every hotel. A separate
+# tree over all cities serves queries that don't name a city.
+#
+# Trees are rebuilt lazily: adding hotels only marks a city dirty, and the
+# next query against it rebuilds that one tree.
+
+import math
+import threading
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+ALL_CITIES = "*"
+
+def coordinates(hotel):
+    """Returns (lat, lng) in degrees, or None if missing/out of range."""
+    try:
+        lat, lng = float(hotel.get("Latitude")), float(hotel.get("Longitude"))
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(lat) or math.isnan(lng) or not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+class GeoIndex:
+    """
+    Per-city haversine BallTrees over hotel coordinates, keyed by hotelId.
+    """
+
+    def __init__(self):
+        self.hotels = {}     # city -> {hotelId: (lat, lng, record)}
+        self.trees = {}      # city -> (BallTree, [records]) for clean cities
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(h) for h in self.hotels.values())
+
+    def hotel_ids(self):
+        """Every indexed hotelId."""
+        with self.lock:
+            return [hid for bucket in self.hotels.values() for hid in bucket]
+
+    def upsert(self, hotels, city):
+        """Adds or replaces hotels with valid coordinates under `city`. Returns the number changed."""
+        added = 0
+        with self.lock:
+            bucket = self.hotels.setdefault(city, {})
+            for h in hotels:
+                coords = coordinates(h)
+                if coords is None or not h.get("hotelId"):
+                    continue
+                entry = (coords[0], coords[1], h)
+                if bucket.get(h["hotelId"]) == entry:
+                    continue  # Unchanged: keep the city's tree
+                bucket[h["hotelId"]] = entry
+                added += 1
+            if added:
+                self.trees.pop(city, None)
+                self.trees.pop(ALL_CITIES, None)
+        return added
+
+    def remove(self, hotel_ids):
+        """Drops `hotel_ids` from every city. Returns the number removed."""
+        removed = 0
+        with self.lock:
+            for city, bucket in self.hotels.items():
+                hits = [h for h in hotel_ids if h in bucket]
+                for h in hits:
+                    del bucket[h]
+                if hits:
+                    removed += len(hits)
+                    self.trees.pop(city, None)
+            if removed:
+                self.trees.pop(ALL_CITIES, None)
+        return removed
+
+    def _tree(self, city):
+        """Returns (tree, records) for `city` (or ALL_CITIES), rebuilding if dirty."""
+        with self.lock:
+            cached = self.trees.get(city)
+            if cached is not None:
+                return cached
+            if city == ALL_CITIES:
+                rows = [r for bucket in self.hotels.values() for r in bucket.values()]
+            else:
+                rows = list(self.hotels.get(city, {}).values())
+            if not rows:
+                return None, []
+            points = np.radians(np.array([(lat, lng) for lat, lng, _ in rows]))
+            tree = (BallTree(points, metric="haversine"), [r for _, _, r in rows])
+            self.trees[city] = tree
+            return tree
+
+    def within(self, lat, lng, radius_km, city=ALL_CITIES, limit=None):
+        """Hotels within `radius_km` of (lat, lng), nearest first, as (record, km) pairs."""
+        tree, records = self._tree(city)
+        if tree is None:
+            return []
+        query = np.radians([[lat, lng]])
+        ind, dist = tree.query_radius(query, r=radius_km / EARTH_RADIUS_KM, return_distance=True, sort_results=True)
+        pairs = [(records[i], round(float(d) * EARTH_RADIUS_KM, 3)) for i, d in zip(ind[0], dist[0])]
+        return pairs[:limit] if limit else pairs
+
+    def nearest(self, lat, lng, k, city=ALL_CITIES):
+        """The `k` hotels nearest to (lat, lng), nearest first, as (record, km) pairs."""
+        tree, records = self._tree(city)
+        if tree is None:
+            return []
+        dist, ind = tree.query(np.radians([[lat, lng]]), k=min(k, len(records)))
+        return [(records[i], round(float(d) * EARTH_RADIUS_KM, 3)) for i, d in zip(ind[0], dist[0])]
@@ -0,0 +1,35 @@
+# ============================
+# gunicorn.conf.py - Preload-and-fork startup
+# ============================
+#
+# gunicorn reads this file automatically when started from backend/, for both
+# `gunicorn app:app` and `gunicorn asgi:application -k uvicorn.workers.UvicornWorker`.
+#
+# With preload (the default; GUNICORN_PRELOAD=false turns it off) the master
+# imports the app once, loads the OYO dataset and builds every derived index,
+# then forks the workers. Workers start warm and share that memory
+# copy-on-write instead of each importing and loading it on a user request.
+# Threads don't survive a fork, so each worker starts its own watcher and
+# background threads right after it (app.after_fork).
+#
+# Without preload every worker imports the app and warms up in a background
+# thread; GET /ready answers 503 until that is done.
+
+import os
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Read by app.py at import: a preloading master starts no threads of its own
+os.environ["APP_PRELOAD"] = "true" if preload_app else "false"
+
+def when_ready(server):
+    """Master, after the app was imported and before the first fork."""
+    if preload_app:
+        import app
+        app.prepare_fork()
+
+def post_fork(server, worker):
+    """Each worker, right after it was forked."""
+    if preload_app:
+        import app
+        app.after_fork()
@@ -0,0 +1,152 @@
+# ============================
+# hotel_schema.py - Typed binary storage for hotel tables
+# ============================
+#
+# Both the OYO dataset and the live Amadeus caches are stored as uncompressed
+# Arrow IPC (Feather v2) files with an explicit schema. Uncompressed Feather can
+# be memory-mapped, so gunicorn workers reading the same file share its pages
+# through the OS page cache instead of each parsing a private CSV copy.
+#
+# CSV remains the import/export format (see csv_to_binary / binary_to_csv).
+
+import os
+import tempfile
+
+# pandas and pyarrow are imported by the functions that use them: importing
+# this module (e.g. at app startup) stays cheap
+
+# ----------------------------
+# 1. Schemas
+# ----------------------------
+class TableSchema:
+    """
+    Column names and types ("string" or "double") of a hotel table. The
+    matching Arrow schema is built on first use (`arrow`).
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.names = [name for name, _ in self.columns]
+        self._arrow = None
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def is_numeric(self, name):
+        return dict(self.columns)[name] == "double"
+
+    def insert(self, i, name, kind):
+        """A copy with column `name` inserted at position `i`."""
+        return TableSchema(self.columns[:i] + [(name, kind)] + self.columns[i:])
+
+    @property
+    def arrow(self):
+        if self._arrow is None:
+            import pyarrow as pa
+            self._arrow = pa.schema([(name, pa.float64() if kind == "double" else pa.string())
+                                     for name, kind in self.columns])
+        return self._arrow
+
+# Live Amadeus results (one row per hotel with an offer)
+LIVE_SCHEMA = TableSchema([
+    ("hotelId", "string"),
+    ("Hotel_name", "string"),
+    ("Address", "string"),
+    ("Latitude", "double"),
+    ("Longitude", "double"),
+    ("Property_type", "string"),
+    ("Room_status", "string"),
+    ("Price", "double"),
+    ("Currency", "string"),
+    ("Rating", "double"),
+    ("Final_rating", "double"),
+])
+
+# Transformed OYO dataset = live columns + City
+OYO_SCHEMA = LIVE_SCHEMA.insert(3, "City", "string")
+
+BINARY_EXT = ".feather"
+
+# ----------------------------
+# 2. Helpers
+# ----------------------------
+def binary_path_for(csv_path):
+    """Returns the binary (Feather) path that sits next to a CSV path."""
+    return os.path.splitext(csv_path)[0] + BINARY_EXT
+
+def apply_schema(df, schema):
+    """
+    Coerces a DataFrame to `schema`: missing columns are added, numeric fields
+    are parsed with invalid/empty values → NaN, string fields keep None for nulls.
+    """
+    import pandas as pd
+    out = pd.DataFrame(index=df.index)
+    for name, kind in schema:
+        col = df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if kind == "double":
+            out[name] = pd.to_numeric(col, errors="coerce").astype("float64")
+        else:
+            out[name] = col.astype(object).where(col.notna(), None)
+            out[name] = out[name].map(lambda v: v if v is None else str(v))
+    return out
+
+def to_table(df, schema):
+    """Builds a typed Arrow table from a DataFrame (or list of dicts)."""
+    import pandas as pd
+    import pyarrow as pa
+    if not isinstance(df, pd.DataFrame):
+        df = pd.DataFrame(list(df))
+    return pa.Table.from_pandas(apply_schema(df, schema), schema=schema.arrow, preserve_index=False)
+
+def write_table(df, dest, schema):
+    """
+    Writes rows to `dest` (path or binary file object) as uncompressed
+    Feather, so readers can memory-map it.
+
+    Paths are written to a temp file and renamed into place: servers may have
+    the old file memory-mapped, and overwriting it in place would change the
+    data under them.
+    """
+    import pyarrow.feather as feather
+    table = to_table(df, schema)
+    if not isinstance(dest, (str, os.PathLike)):
+        feather.write_feather(table, dest, compression="uncompressed")
+        return
+    # A unique temp file per call: threads of one process can write the same dest
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), prefix=".tmp_",
+                                    suffix=os.path.basename(dest))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            feather.write_feather(table, f, compression="uncompressed")
+        os.replace(tmp_path, dest)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def open_table_writer(dest, schema):
+    """
+    Opens an incremental writer for the binary format: call `.write_table(to_table(...))`
+    per chunk and `.close()` at the end. Output is identical to write_table's
+    (uncompressed Feather v2 / Arrow IPC file).
+    """
+    import pyarrow as pa
+    return pa.ipc.new_file(dest, schema.arrow)
+
+def read_table(path):
+    """
+    Memory-maps a Feather file and returns it as a DataFrame. Null-free numeric
+    columns are converted without copying, so their pages stay shared.
+    """
+    import pyarrow.feather as feather
+    table = feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+def csv_to_binary(csv_path, binary_path, schema):
+    """Imports a CSV into the typed binary format."""
+    import pandas as pd
+    write_table(pd.read_csv(csv_path, dtype=str, keep_default_na=False), binary_path, schema)
+
+def binary_to_csv(binary_path, csv_path):
+    """Exports a binary table back to CSV."""
+    read_table(binary_path).to_csv(csv_path, index=False)
@@ -0,0 +1,276 @@
+# ============================
+# metrics.py - Prometheus-style counters, histograms and timing spans
+# ============================
+#
+# A small in-process registry rendered in the Prometheus text format
+# (version 0.0.4), without a client library dependency.
+#
+# Each gunicorn worker has its own registry. Workers periodically write a
+# JSON snapshot to a shared directory, and /metrics merges the snapshots of
+# all live workers, so a scrape that lands on any worker sees the whole host.
+#
+# `span(stage)` times a block into a histogram and, when the current request
+# asked for profiling, also appends (stage, seconds) to its profile (sent
+# back as a Server-Timing header). The profile lives in a context variable,
+# so work handed to thread pools via contextvars.copy_context() and
+# asyncio.to_thread is attributed to the request that started it.
+
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Per-request list of (stage, seconds) while profiling, else None
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+# ----------------------------
+# 1. Metric types
+# ----------------------------
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.series = {}  # label values tuple -> float
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self.lock:
+            return self.series.get(self._key(labels), 0)
+
+    def totals_by(self, labelname):
+        """Sums series by one label, e.g. upstream calls per caller."""
+        i = self.labelnames.index(labelname)
+        totals = {}
+        with self.lock:
+            for key, value in self.series.items():
+                totals[key[i]] = totals.get(key[i], 0) + value
+        return totals
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(k), v] for k, v in self.series.items()]
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+class Histogram:
+    """Cumulative-bucket histogram (seconds by default) with optional labels."""
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # label values tuple -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    _key = Counter._key
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            row = self.series.get(key)
+            if row is None:
+                row = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[len(self.buckets)] += 1
+            row[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(k), list(v)] for k, v in self.series.items()]
+
+    reset = Counter.reset
+
+# ----------------------------
+# 2. Registry + exposition
+# ----------------------------
+class MetricsRegistry:
+    """Holds this process's metrics; merges snapshots from sibling workers."""
+
+    def __init__(self, snapshot_dir=None):
+        self.metrics = {}
+        self.snapshot_dir = snapshot_dir
+        self.flusher = None
+        self.lock = threading.Lock()
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        """Clears every series, e.g. in a worker forked from a process that already counted."""
+        for metric in self.metrics.values():
+            metric.reset()
+
+    def snapshot(self):
+        return {
+            name: {"type": m.type, "help": m.help, "labels": list(m.labelnames),
+                   "buckets": list(getattr(m, "buckets", [])), "series": m.snapshot()}
+            for name, m in self.metrics.items()
+        }
+
+    # --- cross-worker aggregation ---
+    def _snapshot_path(self, pid):
+        return os.path.join(self.snapshot_dir, f"metrics_{pid}.json")
+
+    def flush(self):
+        """Writes this worker's snapshot for siblings to merge (no-op without a directory)."""
+        if not self.snapshot_dir:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def start_flusher(self, interval):
+        """Flushes the snapshot every `interval` seconds (once per worker process)."""
+        with self.lock:
+            if self.flusher is not None or interval <= 0 or not self.snapshot_dir:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.flush()
+                    except Exception as e:
+                        print(f"Metrics flush failed: {e}")
+
+            self.flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+            self.flusher.start()
+
+    def collect(self):
+        """This worker's live metrics merged with the latest snapshots of other live workers."""
+        snapshots = [self.snapshot()]
+        if self.snapshot_dir and os.path.isdir(self.snapshot_dir):
+            for name in os.listdir(self.snapshot_dir):
+                if not (name.startswith("metrics_") and name.endswith(".json")):
+                    continue
+                pid = int(name[len("metrics_"):-len(".json")])
+                if pid == os.getpid():
+                    continue
+                if not pid_alive(pid):
+                    remove_quietly(os.path.join(self.snapshot_dir, name))
+                    continue
+                try:
+                    with open(os.path.join(self.snapshot_dir, name), encoding="utf-8") as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        return render_text(self.collect())
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # Exists but not ours to signal
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def merge_snapshots(snapshots):
+    """Sums series with equal label values across snapshots."""
+    merged = {}
+    for snap in snapshots:
+        for name, metric in snap.items():
+            target = merged.setdefault(name, dict(metric, series={}))
+            for labels, value in metric["series"]:
+                key = tuple(labels)
+                if key not in target["series"]:
+                    target["series"][key] = value if not isinstance(value, list) else list(value)
+                elif isinstance(value, list):
+                    target["series"][key] = [a + b for a, b in zip(target["series"][key], value)]
+                else:
+                    target["series"][key] += value
+    return merged
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render_text(merged):
+    """Prometheus text exposition of a merged snapshot."""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key in sorted(metric["series"]):
+            value = metric["series"][key]
+            if metric["type"] == "histogram":
+                for bound, count in zip(metric["buckets"] + [math.inf], value[:-1]):
+                    lines.append(f"{name}_bucket{_labels(metric['labels'], key, [('le', _number(bound))])} {count}")
+                lines.append(f"{name}_sum{_labels(metric['labels'], key)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(metric['labels'], key)} {value[-2]}")
+            else:
+                lines.append(f"{name}{_labels(metric['labels'], key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+# ----------------------------
+# 3. Timing spans + per-request profiles
+# ----------------------------
+@contextmanager
+def span(histogram, stage):
+    """Times the block into `histogram` (label stage=...) and the request profile, if any."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, stage=stage)
+        profile = current_profile.get()
+        if profile is not None:
+            profile.append((stage, elapsed))
+
+def server_timing(profile):
+    """Server-Timing header value for a request profile (durations in ms)."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in profile)
@@ -0,0 +1,268 @@
+# ============================
+# similarity.py - Content-based "hotels like this one" index
+# ============================
+#
+# Each hotel becomes a hashed, L2-normalized sparse feature vector built from
+# its name, address, property type, price bucket and rating bucket. Because the
+# vectors are L2-normalized, cosine similarity against the whole catalog is a
+# single sparse matrix-vector product.
+#
+# Hashing (instead of a fitted TF-IDF vocabulary) keeps the vectorizer stateless,
+# so rows can be added or replaced incrementally without refitting, and the
+# index can be persisted and reloaded as-is.
+#
+# The app saves the index from a background thread, at most once per
+# SIMILAR_INDEX_SAVE_INTERVAL, so live fetches never wait on a rewrite.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer
+
+# ----------------------------
+# 1. Feature Extraction
+# ----------------------------
+N_FEATURES = 2 ** 18
+
+# Upper edges (INR) of the price buckets; prices above the last edge share one bucket
+PRICE_BUCKET_EDGES = [1000, 2000, 3500, 5000, 8000, 12000]
+
+vectorizer = HashingVectorizer(
+    n_features=N_FEATURES,
+    ngram_range=(1, 2),
+    alternate_sign=False,
+    norm="l2",
+)
+
+def to_float(value):
+    """Parses a numeric field, returning None for missing/invalid values."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(value) else value
+
+def feature_text(hotel):
+    """
+    Builds the document that gets hashed for one hotel: free text from name and
+    address plus categorical tokens for property type, price and rating buckets.
+    """
+    price = to_float(hotel.get("Price"))
+    rating = to_float(hotel.get("Final_rating"))
+    tokens = [
+        hotel.get("Hotel_name") or "",
+        hotel.get("Address") or "",
+        f"ptype_{(hotel.get('Property_type') or 'unknown').lower()}",
+        f"pricebucket_{'na' if price is None else int(np.searchsorted(PRICE_BUCKET_EDGES, price))}",
+        f"ratingbucket_{'na' if rating is None else int(round(rating))}",
+    ]
+    return " ".join(tokens)
+
+def fingerprint(hotel):
+    """Stable content hash of the fields that feed the feature vector."""
+    return hashlib.blake2b(feature_text(hotel).encode("utf-8"), digest_size=8).hexdigest()
+
+# ----------------------------
+# 2. Similarity Index
+# ----------------------------
+# Compact once this fraction of the rows belongs to replaced or removed hotels
+COMPACT_RATIO = 0.25
+
+class SimilarityIndex:
+    """
+    Sparse feature matrix over a hotel catalog, keyed by hotelId.
+
+    `upsert` only vectorizes hotels that are new or whose features changed.
+    Updates never rewrite the matrix: new vectors are appended as rows
+    (buffered and stacked onto the matrix on the next query), and the rows
+    of replaced or removed hotels are masked out until enough of them pile
+    up to compact the matrix.
+    """
+
+    def __init__(self):
+        self.ids = []            # row -> hotelId
+        self.positions = {}      # hotelId -> row (current rows only)
+        self.fingerprints = []   # row -> content hash
+        self.groups = []         # row -> city key (for same-city queries)
+        self.records = []        # row -> hotel dict returned to clients
+        self.matrix = sp.csr_matrix((0, N_FEATURES), dtype=np.float64)
+        self.pending = []        # Appended row blocks not yet stacked onto `matrix`
+        self.dead = set()        # Rows of replaced/removed hotels
+        self.group_array = None  # cached np.array(groups), reset on upsert
+        self.dead_array = None   # cached np.array(sorted(dead)), reset on change
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def hotel_ids(self):
+        """hotelIds currently in the index."""
+        with self.lock:
+            return list(self.positions)
+
+    def upsert(self, hotels, group):
+        """
+        Adds or replaces `hotels` (dicts with a hotelId) under city key `group`.
+        Only hotels that are new or whose features changed are (re)vectorized;
+        the others just get their record replaced (e.g. a new price within the
+        same bucket, or a new Room_status). Returns the number of hotels added
+        or changed.
+        """
+        changed = {}
+        refreshed = 0
+        for h in hotels:
+            hid = h.get("hotelId")
+            if not hid:
+                continue
+            fp = fingerprint(h)
+            pos = self.positions.get(hid)
+            if pos is None or self.fingerprints[pos] != fp or self.groups[pos] != group:
+                changed[hid] = (fp, h)
+            elif self.records[pos] != h:
+                with self.lock:
+                    pos = self.positions.get(hid)
+                    if pos is not None:
+                        self.records[pos] = h
+                refreshed += 1
+        if not changed:
+            return refreshed
+
+        vectors = vectorizer.transform([feature_text(h) for _, h in changed.values()])
+        with self.lock:
+            for hid, (fp, h) in changed.items():
+                pos = self.positions.get(hid)
+                if pos is not None:
+                    self.dead.add(pos)
+                self.positions[hid] = len(self.ids)
+                self.ids.append(hid)
+                self.fingerprints.append(fp)
+                self.groups.append(group)
+                self.records.append(h)
+            self.pending.append(vectors.tocsr())
+            self.group_array = None
+            self.dead_array = None
+            self._maybe_compact()
+        return len(changed) + refreshed
+
+    def remove(self, hotel_ids):
+        """Drops rows for `hotel_ids`. Returns the number of rows removed."""
+        with self.lock:
+            drop = [self.positions.pop(h) for h in hotel_ids if h in self.positions]
+            if not drop:
+                return 0
+            self.dead.update(drop)
+            self.dead_array = None
+            self._maybe_compact()
+        return len(drop)
+
+    def _stack(self):
+        """Stacks pending row blocks onto the matrix (caller holds the lock)."""
+        if self.pending:
+            self.matrix = sp.vstack([self.matrix] + self.pending, format="csr")
+            self.pending = []
+        return self.matrix
+
+    def _maybe_compact(self, force=False):
+        """Drops dead rows once they are COMPACT_RATIO of the matrix (caller holds the lock)."""
+        if not self.dead or (not force and len(self.dead) < COMPACT_RATIO * len(self.ids)):
+            return
+        keep = [i for i in range(len(self.ids)) if i not in self.dead]
+        self.matrix = self._stack()[keep]
+        self.ids = [self.ids[i] for i in keep]
+        self.fingerprints = [self.fingerprints[i] for i in keep]
+        self.groups = [self.groups[i] for i in keep]
+        self.records = [self.records[i] for i in keep]
+        self.positions = {hid: i for i, hid in enumerate(self.ids)}
+        self.dead = set()
+        self.group_array = None
+        self.dead_array = None
+
+    def similar(self, hotel_id, limit=10, same_group=False):
+        """
+        Returns up to `limit` (record, cosine similarity) pairs most similar to
+        `hotel_id`, best first, excluding the hotel itself. None if unknown.
+        """
+        with self.lock:
+            pos = self.positions.get(hotel_id)
+            if pos is None:
+                return None
+            if self.group_array is None:
+                self.group_array = np.asarray(self.groups, dtype=object)
+            if self.dead_array is None:
+                self.dead_array = np.fromiter(sorted(self.dead), dtype=np.intp, count=len(self.dead))
+            matrix, records, groups, dead = self._stack(), self.records, self.group_array, self.dead_array
+        scores = (matrix @ matrix[pos].T).toarray().ravel()
+        scores[pos] = -np.inf
+        scores[dead] = -np.inf
+        if same_group:
+            scores[groups != groups[pos]] = -np.inf
+
+        k = min(limit, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        # Cut-off score via argpartition, then order only the candidates (ties by row)
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        top = np.flatnonzero(scores >= kth)
+        top = top[np.lexsort((top, -scores[top]))][:k]
+        return [(records[i], round(float(scores[i]), 4)) for i in top]
+
+    # ----------------------------
+    # 3. Persistence
+    # ----------------------------
+    def save(self, path):
+        """
+        Persists the index as one file, `<path>.npz` (matrix arrays plus the
+        row metadata as JSON), replaced atomically: readers see the old index
+        or the new one, never a matrix from one and rows from the other.
+        """
+        with self.lock:
+            self._maybe_compact(force=True)
+            matrix = self._stack()
+            meta = {
+                "ids": list(self.ids),
+                "fingerprints": list(self.fingerprints),
+                "groups": list(self.groups),
+                "records": list(self.records),
+            }
+        dest = f"{path}.npz"
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr,
+                         shape=np.array(matrix.shape),
+                         meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+            os.replace(tmp, dest)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Loads a persisted index, or returns an empty one if missing/corrupt."""
+        index = cls()
+        try:
+            with np.load(f"{path}.npz") as saved:
+                matrix = sp.csr_matrix((saved["data"], saved["indices"], saved["indptr"]),
+                                       shape=tuple(saved["shape"]))
+                meta = json.loads(saved["meta"].tobytes().decode("utf-8"))
+            if matrix.shape != (len(meta["ids"]), N_FEATURES):
+                raise ValueError("index shape does not match metadata")
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(f"{path}.npz"):
+                print(f"Ignoring unreadable similarity index {path}: {e}")
+            return index
+        index.matrix = matrix
+        index.ids = meta["ids"]
+        index.fingerprints = meta["fingerprints"]
+        index.groups = meta["groups"]
+        index.records = meta["records"]
+        index.positions = {hid: i for i, hid in enumerate(index.ids)}
+        return index
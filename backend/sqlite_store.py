@@ -0,0 +1,220 @@
+# ============================
+# sqlite_store.py - Live offers cache in one SQLite database (WAL)
+# ============================
+#
+# Stores typed live hotel rows (LIVE_SCHEMA columns) for every cached search
+# in two tables:
+#   searches  one row per (city_code, checkin, checkout, adults): written/expiry
+#             times, last access, row count and approximate size
+#   offers    one row per hotel per search, ordered by `pos`, indexed by
+#             search key and by hotelId
+#
+# A search is replaced in one transaction, so readers see the old rows or the
+# new ones, never a mix. WAL mode lets every gunicorn worker read while one
+# writes. "All cached offers for a city" is a single indexed query instead
+# of one file read per search.
+#
+# Connections are per thread and re-opened after a fork.
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from hotel_schema import LIVE_SCHEMA
+
+COLUMNS = LIVE_SCHEMA.names
+SQL_TYPES = {name: "REAL" if LIVE_SCHEMA.is_numeric(name) else "TEXT" for name in COLUMNS}
+KEY_COLUMNS = ("city_code", "checkin", "checkout", "adults")
+KEY_WHERE = " AND ".join(f"{c} = ?" for c in KEY_COLUMNS)
+
+SCHEMA_SQL = f"""
+CREATE TABLE IF NOT EXISTS searches (
+    city_code TEXT NOT NULL, checkin TEXT NOT NULL, checkout TEXT NOT NULL, adults INTEGER NOT NULL,
+    written_at REAL NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL,
+    row_count INTEGER NOT NULL, size INTEGER NOT NULL,
+    PRIMARY KEY (city_code, checkin, checkout, adults)
+);
+CREATE TABLE IF NOT EXISTS offers (
+    city_code TEXT NOT NULL, checkin TEXT NOT NULL, checkout TEXT NOT NULL, adults INTEGER NOT NULL,
+    pos INTEGER NOT NULL,
+    {", ".join(f'"{name}" {SQL_TYPES[name]}' for name in COLUMNS)},
+    PRIMARY KEY (city_code, checkin, checkout, adults, pos)
+);
+CREATE INDEX IF NOT EXISTS offers_hotel ON offers ("hotelId");
+CREATE INDEX IF NOT EXISTS searches_expiry ON searches (expires_at);
+"""
+
+SELECT_COLUMNS = ", ".join(f'"{name}"' for name in COLUMNS)
+INSERT_SQL = (f"INSERT INTO offers ({', '.join(KEY_COLUMNS)}, pos, {SELECT_COLUMNS}) "
+              f"VALUES ({', '.join('?' * (len(KEY_COLUMNS) + 1 + len(COLUMNS)))})")
+
+class SQLiteOffersStore:
+    """
+    Cached live searches in SQLite. Keys are (city_code, checkin, checkout,
+    adults) tuples; rows come back as JSON-safe dicts (NULL → None).
+
+    Like CacheStore, hits are noted in memory and flushed by the sweeper,
+    which also drops expired searches and evicts least-recently-used ones
+    beyond `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.accessed = {}  # key -> last access time (this worker, not yet flushed)
+        self.lock = threading.Lock()
+        self.sweeper = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(SCHEMA_SQL)
+
+    # ----------------------------
+    # 1. Connections
+    # ----------------------------
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn, self.local.pid = conn, os.getpid()
+        return conn
+
+    def close(self):
+        """Closes this thread's connection (e.g. in a gunicorn master before it forks)."""
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction (takes the write lock up front, so it never has to upgrade)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # ----------------------------
+    # 2. Reads
+    # ----------------------------
+    def written_at(self, key):
+        """When the search was cached (epoch seconds), or None."""
+        row = self._conn().execute(f"SELECT written_at FROM searches WHERE {KEY_WHERE}", key).fetchone()
+        return row[0] if row else None
+
+    def read(self, key, max_age=None):
+        """
+        (rows, written_at) for a cached search no older than `max_age`
+        seconds, else None. Both come from one read transaction.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            row = conn.execute(f"SELECT written_at FROM searches WHERE {KEY_WHERE}", key).fetchone()
+            if row is None or (max_age is not None and time.time() - row[0] >= max_age):
+                return None
+            rows = conn.execute(f"SELECT {SELECT_COLUMNS} FROM offers WHERE {KEY_WHERE} ORDER BY pos", key).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        with self.lock:
+            self.accessed[tuple(key)] = time.time()
+        return [dict(zip(COLUMNS, r)) for r in rows], row[0]
+
+    def cities(self):
+        """City codes with at least one unexpired cached search."""
+        rows = self._conn().execute("SELECT DISTINCT city_code FROM searches WHERE expires_at > ?", (time.time(),))
+        return [r[0] for r in rows]
+
+    def version(self):
+        """
+        Changes whenever a search is written, expires or is evicted: the
+        count and summed write times of the unexpired searches.
+        """
+        return tuple(self._conn().execute(
+            "SELECT COUNT(*), TOTAL(written_at) FROM searches WHERE expires_at > ?", (time.time(),)
+        ).fetchone())
+
+    def city_offers(self, city_code):
+        """Every unexpired cached offer row for a city, tagged with its search's dates and adults."""
+        rows = self._conn().execute(
+            f"SELECT o.checkin, o.checkout, o.adults, {', '.join('o.' + c for c in SELECT_COLUMNS.split(', '))} "
+            f"FROM offers o JOIN searches s USING ({', '.join(KEY_COLUMNS)}) "
+            f"WHERE o.city_code = ? AND s.expires_at > ? ORDER BY o.checkin, o.checkout, o.adults, o.pos",
+            (city_code, time.time()),
+        ).fetchall()
+        return [dict(zip(("checkin_date", "checkout_date", "adults") + tuple(COLUMNS), r)) for r in rows]
+
+    # ----------------------------
+    # 3. Writes + eviction
+    # ----------------------------
+    def write(self, key, df, ttl):
+        """Atomically replaces a search's rows with `df` (LIVE_SCHEMA columns)."""
+        values = df[COLUMNS].astype(object).where(df[COLUMNS].notna(), None)
+        rows = [tuple(key) + (pos,) + tuple(r) for pos, r in enumerate(values.itertuples(index=False, name=None))]
+        size = int(df[COLUMNS].memory_usage(index=False, deep=True).sum())
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM offers WHERE {KEY_WHERE}", key)
+            conn.executemany(INSERT_SQL, rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                tuple(key) + (now, now + ttl, now, len(rows), size),
+            )
+
+    def _delete(self, conn, key):
+        conn.execute(f"DELETE FROM offers WHERE {KEY_WHERE}", key)
+        conn.execute(f"DELETE FROM searches WHERE {KEY_WHERE}", key)
+
+    def sweep(self):
+        """
+        Flushes noted hits, drops expired searches, then evicts LRU searches
+        until the stored rows fit in `max_bytes`. Returns the number removed.
+        """
+        with self.lock:
+            accessed, self.accessed = self.accessed, {}
+        now = time.time()
+        removed = 0
+        with self._transaction() as conn:
+            conn.executemany(
+                f"UPDATE searches SET last_access = MAX(last_access, ?) WHERE {KEY_WHERE}",
+                [(ts,) + key for key, ts in accessed.items()],
+            )
+            for key in conn.execute(f"SELECT {', '.join(KEY_COLUMNS)} FROM searches WHERE expires_at <= ?", (now,)).fetchall():
+                self._delete(conn, key)
+                removed += 1
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM searches").fetchone()[0]
+            if total > self.max_bytes:
+                lru = conn.execute(f"SELECT {', '.join(KEY_COLUMNS)}, size FROM searches ORDER BY last_access").fetchall()
+                for *key, size in lru:
+                    if total <= self.max_bytes:
+                        break
+                    self._delete(conn, key)
+                    total -= size
+                    removed += 1
+        if removed:
+            print(f"Evicted {removed} cached searches from {os.path.basename(self.path)}")
+        return removed
+
+    def start_sweeper(self, interval):
+        """Starts the background eviction thread (once per worker process)."""
+        with self.lock:
+            if self.sweeper is not None or interval <= 0:
+                return
+
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.sweep()
+                    except Exception as e:
+                        print(f"Offers cache sweep failed: {e}")
+
+            self.sweeper = threading.Thread(target=run, name="offers-sweeper", daemon=True)
+            self.sweeper.start()
@@ -0,0 +1,309 @@
+# ============================
+# suggest_index.py - Typeahead suggestions over cities and hotel names
+# ============================
+#
+# Every suggestion (a city or a hotel) is split into normalized tokens
+# (accents stripped, lower-cased, alphanumeric runs). Each token is indexed
+# under all of its prefixes up to MAX_PREFIX characters, so matching a
+# keystroke-by-keystroke query token is one dict lookup - a flattened prefix
+# trie.
+#
+# Typo tolerance: tokens are also indexed by character trigrams. When a query
+# token has too few prefix matches, tokens sharing enough trigrams with it are
+# checked with a bounded edit distance against their prefix ("mumbia" still
+# finds "mumbai", "radisn" finds "radisson").
+#
+# Entries are keyed by id (hotelId, or "city:<name>"), so re-adding a hotel
+# replaces it and new live results are folded in incrementally.
+#
+# One- and two-letter queries match most of the index and are what every
+# search starts with, so their results are memoized until the next change.
+
+import heapq
+import re
+import threading
+import unicodedata
+
+MAX_PREFIX = 12          # Longest indexed prefix; longer query tokens are checked against the token itself
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Match quality per query token, scaled by the weight of the field it matched
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.8
+FUZZY_SCORE = 0.6
+FUZZY_PENALTY = 0.15     # Per edit
+NAME_WEIGHT = 1.0
+SECONDARY_WEIGHT = 0.6   # Address / city tokens
+
+# Small ranking boosts so equal matches prefer cities, then better-rated hotels
+CITY_BOOST = 0.3
+RATING_BOOST = 0.1       # Times Final_rating / 5
+
+MEMO_MAX_LEN = 2         # Single-word queries up to this length are memoized
+MEMO_SIZE = 1024
+
+def normalize(text):
+    """Lower-cased ASCII with accents stripped."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+def trigrams(token):
+    """Character trigrams, anchored at the start so prefixes share them."""
+    padded = f"$${token}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def max_edits(token):
+    """Typos tolerated in a query token of this length."""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 7 else 2
+
+def prefix_distance(query, token, limit):
+    """
+    Smallest edit distance (Damerau: insert/delete/substitute/transpose)
+    between `query` and any prefix of `token`, or None if above `limit`.
+    """
+    token = token[:len(query) + limit]
+    prev2 = None
+    prev = list(range(len(token) + 1))
+    for i in range(1, len(query) + 1):
+        row = [i] + [0] * len(token)
+        for j in range(1, len(token) + 1):
+            cost = query[i - 1] != token[j - 1]
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if (prev2 is not None and j > 1 and query[i - 1] == token[j - 2]
+                    and query[i - 2] == token[j - 1]):
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return None
+        prev2, prev = prev, row
+    best = min(prev)
+    return best if best <= limit else None
+
+def to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if value != value else value
+
+class SuggestIndex:
+    """
+    Prefix + trigram index over city and hotel names, keyed by entry id.
+    """
+
+    def __init__(self):
+        self.entries = {}    # id -> (record, {token: weight}, boost)
+        self.prefixes = {}   # prefix -> {id: best weight of a token with that prefix}
+        self.tokens = {}     # token -> {id: weight}
+        self.grams = {}      # trigram -> set of tokens
+        self.memo = {}       # (word, limit, city, types) -> results, cleared on any change
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def hotel_ids(self, source=None):
+        """Ids of the indexed hotels (only those from `source`, if given)."""
+        with self.lock:
+            return [entry_id for entry_id, (record, _, _) in self.entries.items()
+                    if record["type"] == "hotel" and (source is None or record["source"] == source)]
+
+    # ----------------------------
+    # 1. Updates
+    # ----------------------------
+    def _add(self, entry_id, record, fields, boost):
+        """Indexes one entry; `fields` is [(text, weight)]. Returns True if it changed."""
+        weights = {}
+        for text, weight in fields:
+            for token in tokenize(text):
+                weights[token] = max(weights.get(token, 0), weight)
+        current = self.entries.get(entry_id)
+        if current is not None and current[0] == record and current[1] == weights:
+            return False
+        if current is not None:
+            self._drop(entry_id)
+        self.memo.clear()
+        self.entries[entry_id] = (record, weights, boost)
+        for token, weight in weights.items():
+            ids = self.tokens.get(token)
+            if ids is None:
+                ids = self.tokens[token] = {}
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(token)
+            ids[entry_id] = weight
+            for n in range(1, min(len(token), MAX_PREFIX) + 1):
+                bucket = self.prefixes.setdefault(token[:n], {})
+                if bucket.get(entry_id, 0) < weight:
+                    bucket[entry_id] = weight
+        return True
+
+    def _drop(self, entry_id):
+        entry = self.entries.pop(entry_id, None)
+        if entry is None:
+            return False
+        self.memo.clear()
+        for token in entry[1]:
+            ids = self.tokens.get(token)
+            if ids is not None:
+                ids.pop(entry_id, None)
+                if not ids:
+                    del self.tokens[token]
+                    for gram in trigrams(token):
+                        grams = self.grams.get(gram)
+                        if grams is not None:
+                            grams.discard(token)
+                            if not grams:
+                                del self.grams[gram]
+            for n in range(1, min(len(token), MAX_PREFIX) + 1):
+                bucket = self.prefixes.get(token[:n])
+                if bucket is not None:
+                    bucket.pop(entry_id, None)
+                    if not bucket:
+                        del self.prefixes[token[:n]]
+        return True
+
+    def upsert(self, hotels, city, source):
+        """Adds or replaces hotels (by hotelId) under `city`. Returns the number changed."""
+        changed = 0
+        with self.lock:
+            for h in hotels:
+                hotel_id, name = h.get("hotelId"), h.get("Hotel_name")
+                if not hotel_id or not name:
+                    continue
+                record = {"type": "hotel", "text": name, "hotelId": hotel_id, "city": city,
+                          "address": h.get("Address") or "", "source": source}
+                rating = to_float(h.get("Final_rating"))
+                boost = RATING_BOOST * min(max(rating, 0), 5) / 5 if rating is not None else 0.0
+                fields = [(name, NAME_WEIGHT), (record["address"], SECONDARY_WEIGHT), (city, SECONDARY_WEIGHT)]
+                changed += self._add(hotel_id, record, fields, boost)
+        return changed
+
+    def upsert_cities(self, cities):
+        """Adds or replaces city entries from {city name: {"live": bool, "hotel_count": int}}."""
+        changed = 0
+        with self.lock:
+            for name, info in cities.items():
+                record = {"type": "city", "text": name.title(), "city": name,
+                          "live": bool(info.get("live")), "hotel_count": int(info.get("hotel_count", 0))}
+                changed += self._add(f"city:{name}", record, [(name, NAME_WEIGHT)], CITY_BOOST)
+        return changed
+
+    def remove(self, entry_ids):
+        """Drops entries by id (hotelIds or "city:<name>"). Returns the number removed."""
+        with self.lock:
+            return sum(self._drop(entry_id) for entry_id in entry_ids)
+
+    # ----------------------------
+    # 2. Queries
+    # ----------------------------
+    def _fuzzy(self, query, limit):
+        """{id: score} for tokens within `limit` edits of a prefix of `query`'s length."""
+        grams = trigrams(query)
+        shared = {}
+        for gram in grams:
+            for token in self.grams.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        # Each edit breaks at most 3 trigrams of the query
+        needed = max(1, len(grams) - 3 * limit)
+        matches = {}
+        for token, count in shared.items():
+            if count < needed:
+                continue
+            distance = prefix_distance(query, token, limit)
+            if distance is None or distance == 0:
+                continue  # Exact prefixes are already scored
+            score = FUZZY_SCORE - FUZZY_PENALTY * (distance - 1)
+            for entry_id, weight in self.tokens[token].items():
+                if matches.get(entry_id, 0) < score * weight:
+                    matches[entry_id] = score * weight
+        return matches
+
+    def _matches(self, query, limit):
+        """{id: score} of entries with a token matching one query token."""
+        if len(query) <= MAX_PREFIX:
+            bucket = self.prefixes.get(query, {})
+            matches = {entry_id: PREFIX_SCORE * weight for entry_id, weight in bucket.items()}
+        else:
+            bucket = self.prefixes.get(query[:MAX_PREFIX], {})
+            matches = {entry_id: PREFIX_SCORE * weight for entry_id, weight in bucket.items()
+                       if any(t.startswith(query) for t in self.entries[entry_id][1])}
+        for entry_id, weight in self.tokens.get(query, {}).items():
+            matches[entry_id] = EXACT_SCORE * weight
+        edits = max_edits(query)
+        if edits and len(matches) < limit:
+            for entry_id, score in self._fuzzy(query, edits).items():
+                if matches.get(entry_id, 0) < score:
+                    matches[entry_id] = score
+        return matches
+
+    def _totals(self, per_word, limit):
+        """
+        {id: (words matched, summed score)}. Entries matching every word are
+        found by probing the smallest match set; partial matches are only
+        counted when there are fewer than `limit` full ones.
+        """
+        per_word = sorted(per_word, key=len)
+        first, rest = per_word[0], per_word[1:]
+        totals = {}
+        for entry_id, score in first.items():
+            for matches in rest:
+                other = matches.get(entry_id)
+                if other is None:
+                    break
+                score += other
+            else:
+                totals[entry_id] = (len(per_word), score)
+        if rest and len(totals) < limit:
+            partial = {}
+            for matches in per_word:
+                for entry_id, score in matches.items():
+                    if entry_id not in totals:
+                        count, total = partial.get(entry_id, (0, 0.0))
+                        partial[entry_id] = (count + 1, total + score)
+            totals.update(partial)
+        return totals
+
+    def suggest(self, query, limit=8, city=None, types=None):
+        """
+        Top-`limit` suggestions for a partial query, best first. Entries
+        matching more query tokens always rank above those matching fewer.
+
+        Args:
+            city: only hotels in this city (cities are still suggested)
+            types: restrict to {"city", "hotel"}
+
+        Returns:
+            list: (record, score)
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        memo_key = None
+        if len(words) == 1 and len(words[0]) <= MEMO_MAX_LEN:
+            memo_key = (words[0], limit, city, tuple(sorted(types)) if types else None)
+        with self.lock:
+            if memo_key in self.memo:
+                return self.memo[memo_key]
+            totals = self._totals([self._matches(word, limit) for word in words], limit)
+            entries, scale = self.entries, 1 / len(words)
+
+            def candidates():
+                for entry_id, (matched, score) in totals.items():
+                    record, _, boost = entries[entry_id]
+                    if types and record["type"] not in types:
+                        continue
+                    if city and record["type"] == "hotel" and record["city"] != city:
+                        continue
+                    yield matched, score * scale + boost, -len(record["text"]), entry_id
+
+            best = heapq.nlargest(limit, candidates())
+            results = [(entries[entry_id][0], round(score, 4)) for _, score, _, entry_id in best]
+            if memo_key is not None:
+                if len(self.memo) >= MEMO_SIZE:
+                    self.memo.clear()
+                self.memo[memo_key] = results
+            return results
@@ -0,0 +1,53 @@
+# ============================
+# conftest.py - Fixtures: the app wired to a local fake Amadeus server
+# ============================
+#
+# app.py reads its configuration at import, so the fake upstream is started
+# and the environment set before the first test imports it. Every test gets
+# the same server with default knobs and cleared counters.
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from benchmarks.fake_amadeus import FakeAmadeusConfig, start_fake_amadeus
+
+def quiet_config(**overrides):
+    """No latency, no injected failures, unless overridden."""
+    return FakeAmadeusConfig(**dict(dict(latency_ms=0, jitter_ms=0), **overrides))
+
+@pytest.fixture(scope="session")
+def upstream_server():
+    server = start_fake_amadeus(quiet_config())
+    cache_dir = tempfile.mkdtemp(prefix="tests_live_cache_")
+    os.environ.update(
+        AMADEUS_BASE_URL=server.url, AMADEUS_API_KEY="test-key", AMADEUS_API_SECRET="test-secret",
+        AMADEUS_RATE_PER_SEC="1000", AMADEUS_MAX_RETRIES="2", AMADEUS_BACKOFF_FACTOR="0.01",
+        LIVE_CACHE_DIR=cache_dir, APP_PRELOAD="true", OYO_WATCH_INTERVAL="0", PREFETCH_CITIES="",
+        METRICS_FLUSH_INTERVAL="0",
+    )
+    yield server
+    server.shutdown()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+@pytest.fixture
+def upstream(upstream_server):
+    """The fake Amadeus server, reset to quiet_config() with empty stats."""
+    upstream_server.config = quiet_config()
+    with upstream_server.lock:
+        upstream_server.stats.clear()
+        upstream_server.timeline.clear()
+        upstream_server.calls = 0
+    return upstream_server
+
+@pytest.fixture
+def backend(upstream):
+    """The app module, pointed at `upstream`."""
+    import app
+    return app
+
+@pytest.fixture
+def token(backend):
+    return backend.get_amadeus_access_token()
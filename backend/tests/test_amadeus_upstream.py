@@ -0,0 +1,161 @@
+# ============================
+# test_amadeus_upstream.py - Amadeus calls against the fake upstream
+# ============================
+
+import asyncio
+import time
+
+import pytest
+import requests
+
+from benchmarks.fake_amadeus import HOTEL_LIST_PATH, OFFERS_PATH, TOKEN_PATH, fake_offer
+
+HOTEL_IDS = [f"HT{i:04d}" for i in range(120)]  # 6 batches of 20
+CHECKIN, CHECKOUT = "2026-11-01", "2026-11-02"
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def offered_ids(offers):
+    return sorted(o["hotel"]["hotelId"] for o in offers)
+
+def expected_ids(hotel_ids, config):
+    return sorted(hid for hid in hotel_ids if fake_offer(hid, CHECKIN, "1", config.seed, config.availability))
+
+# ----------------------------
+# 1. Batching
+# ----------------------------
+def test_batches_run_in_parallel(backend, upstream, token, monkeypatch):
+    upstream.config.latency_ms = 200
+    offers, parallel = timed(backend.fetch_offers_parallel, HOTEL_IDS, CHECKIN, CHECKOUT, token, 1)
+
+    monkeypatch.setattr(backend, "AMADEUS_MAX_WORKERS", 1)
+    sequential_offers, sequential = timed(backend.fetch_offers_parallel, HOTEL_IDS, CHECKIN, CHECKOUT, token, 1)
+
+    assert offered_ids(offers) == offered_ids(sequential_offers) == expected_ids(HOTEL_IDS, upstream.config)
+    assert upstream.stats[f"{OFFERS_PATH}:200"] == 12
+    assert sequential >= 6 * 0.2
+    assert parallel < sequential * 0.6  # 3 workers: 2 rounds instead of 6
+
+def test_failed_batch_is_skipped(backend, upstream, token):
+    upstream.config.fail_hotel_ids = {HOTEL_IDS[25]}  # Second batch
+    offers = backend.fetch_offers_parallel(HOTEL_IDS, CHECKIN, CHECKOUT, token, 1)
+
+    assert offered_ids(offers) == expected_ids(HOTEL_IDS[:20] + HOTEL_IDS[40:], upstream.config)
+    assert upstream.stats[f"{OFFERS_PATH}:503"] == 1 + backend.AMADEUS_MAX_RETRIES
+
+def test_all_batches_failing_raises(backend, upstream, token):
+    upstream.config.fail_hotel_ids = set(HOTEL_IDS[::20])
+    with pytest.raises(requests.HTTPError):
+        backend.fetch_offers_parallel(HOTEL_IDS, CHECKIN, CHECKOUT, token, 1)
+
+# ----------------------------
+# 2. Throttling (429 + Retry-After)
+# ----------------------------
+def test_throttled_call_waits_for_retry_after(backend, upstream, token):
+    upstream.config.throttle_first = 1
+    hotels, elapsed = timed(backend.get_hotel_list, "BLR", token)
+
+    assert len(hotels) == upstream.config.hotels_per_city
+    assert upstream.stats[f"{HOTEL_LIST_PATH}:429"] == 1
+    assert upstream.stats[f"{HOTEL_LIST_PATH}:200"] == 1
+    assert elapsed >= upstream.config.retry_after
+
+def test_async_client_waits_for_retry_after(backend, upstream):
+    from amadeus_async import AsyncAmadeusClient
+
+    async def fetch():
+        client = AsyncAmadeusClient("test-key", "test-secret", rate=1000, max_retries=2,
+                                    backoff_factor=0.01, base_url=upstream.url)
+        try:
+            await client.get_token()
+            upstream.config.throttle_first = upstream.calls + 1
+            return await client.get_hotel_list("BLR")
+        finally:
+            await client.aclose()
+
+    hotels, elapsed = timed(asyncio.run, fetch())
+    assert len(hotels) == upstream.config.hotels_per_city
+    assert upstream.stats[f"{HOTEL_LIST_PATH}:429"] == 1
+    assert elapsed >= upstream.config.retry_after
+
+# ----------------------------
+# 3. Rate limiting
+# ----------------------------
+def test_limiter_paces_upstream_calls(backend, upstream, token, monkeypatch):
+    monkeypatch.setattr(backend, "amadeus_limiter", backend.TokenBucket(2))
+    backend.fetch_offers_parallel(HOTEL_IDS[:100], CHECKIN, CHECKOUT, token, 1)
+
+    starts = sorted(t for t, path in upstream.timeline if path == OFFERS_PATH)
+    assert len(starts) == 5
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.08  # 100 ms apart, minus scheduling slack
+
+def test_shared_limiter_spans_instances(backend, tmp_path):
+    # Two buckets on one database behave like two workers sharing the rate
+    path = str(tmp_path / "rate.sqlite3")
+    workers = [backend.SharedTokenBucket(path, 20), backend.SharedTokenBucket(path, 20)]
+    waits = [workers[i % 2].reserve() for i in range(10)]
+
+    assert waits[0] == 0
+    assert waits == sorted(waits)
+    assert waits[-1] == pytest.approx(9 / 20, abs=0.05)
+
+def test_process_scope_divides_rate(backend, monkeypatch):
+    monkeypatch.setattr(backend, "AMADEUS_RATE_SCOPE", "process")
+    monkeypatch.setattr(backend, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(backend, "AMADEUS_RATE_PER_SEC", 10.0)
+    limiter = backend.make_amadeus_limiter()
+
+    assert not isinstance(limiter, backend.SharedTokenBucket)
+    assert limiter.rate == 2.5
+
+def test_async_client_shares_limiter_and_token(backend, upstream, token, monkeypatch):
+    from amadeus_async import AsyncAmadeusClient
+
+    monkeypatch.setattr(backend, "amadeus_limiter", backend.TokenBucket(2))
+    client = AsyncAmadeusClient("test-key", "test-secret", base_url=upstream.url,
+                                limiter=backend.amadeus_limiter, tokens=backend.amadeus_tokens)
+
+    async def fetch():
+        try:
+            return await client.get_hotel_list("BLR")
+        finally:
+            await client.aclose()
+
+    backend.get_hotel_list("DEL", token)  # Takes the only token for the next 0.5 s
+    hotels, elapsed = timed(asyncio.run, fetch())
+    assert hotels
+    assert elapsed >= 0.3  # Waited behind the sync call's reservation
+    assert f"{TOKEN_PATH}:200" not in upstream.stats  # Reused the sync client's token
+
+# ----------------------------
+# 4. Single-flight
+# ----------------------------
+def test_only_the_fetching_caller_reports_a_miss(backend, upstream):
+    from concurrent.futures import ThreadPoolExecutor
+
+    upstream.config.latency_ms = 100
+    search = ("goa", "2026-12-20", "2026-12-21", 1)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: backend.fetch_live_hotels(*search), range(4)))
+
+    assert sorted(from_cache for _, from_cache in results) == [False, True, True, True]
+    assert all(hotels == results[0][0] for hotels, _ in results)
+    assert upstream.stats[f"{OFFERS_PATH}:200"] >= 1
+
+def test_only_the_fetching_coroutine_reports_a_miss(backend, upstream):
+    import asgi
+
+    upstream.config.latency_ms = 100
+    search = ("goa", "2026-12-22", "2026-12-23", 1)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(asgi.fetch_live_hotels_async(*search) for _ in range(4)))
+        finally:
+            await asgi.amadeus.aclose()
+
+    results = asyncio.run(run())
+    assert sorted(from_cache for _, from_cache in results) == [False, True, True, True]
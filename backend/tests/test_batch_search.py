@@ -0,0 +1,91 @@
+# ============================
+# test_batch_search.py - /batch_search against the fake upstream
+# ============================
+
+import pytest
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
+
+def search(city, checkin, checkout, adults=1):
+    return {"city": city, "checkin_date": checkin, "checkout_date": checkout, "adults": adults}
+
+def test_results_follow_request_order(client, backend):
+    cached = search("pune", "2027-01-10", "2027-01-11")
+    assert client.post("/live_recommend", json=cached).status_code == 200
+
+    searches = [
+        search("goa", "2027-01-10", "2027-01-11"),
+        cached,
+        search("delhi", "2027-01-10", "2027-01-12", adults=2),
+        search("goa", "2027-01-10", "2027-01-11"),
+        search("goa", "2027-01-11", "2027-01-12"),
+    ]
+    response = client.post("/batch_search", json={"searches": searches})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body["search_count"], body["unique_searches"], body["upstream_searches"]) == (5, 4, 3)
+
+    results = body["results"]
+    assert [(r["city"], r["checkin_date"], r["checkout_date"], r["adults"]) for r in results] == [
+        (s["city"], s["checkin_date"], s["checkout_date"], s["adults"]) for s in searches
+    ]
+    assert [r["cache"] for r in results] == ["miss", "hit", "miss", "miss", "miss"]
+    assert results[3]["duplicate_of"] == 0 and results[3]["hotels"] == results[0]["hotels"]
+    assert all("duplicate_of" not in r for i, r in enumerate(results) if i != 3)
+    # Each search's hotels come from its own city
+    for r in results:
+        assert r["hotel_count"] == len(r["hotels"]) > 0
+        assert {h["hotelId"][2:5] for h in r["hotels"]} == {backend.CITY_CODES[r["city"]]}
+
+def test_failed_search_does_not_fail_the_others(client, backend, monkeypatch):
+    fetch = backend.fetch_live_hotels
+
+    def failing_fetch(city, checkin, checkout, adults, force=False):
+        if city == "delhi":
+            raise Exception("Upstream unavailable")
+        return fetch(city, checkin, checkout, adults, force)
+    monkeypatch.setattr(backend, "fetch_live_hotels", failing_fetch)
+
+    searches = [search("goa", "2027-02-01", "2027-02-02"), search("delhi", "2027-02-01", "2027-02-02"),
+                search("pune", "2027-02-01", "2027-02-02")]
+    response = client.post("/batch_search", json={"searches": searches})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[1]["error"] == "Upstream unavailable" and "hotels" not in results[1]
+    assert [r.get("cache") for r in results] == ["miss", None, "miss"]
+    assert backend.read_live_cache_entry("delhi", "2027-02-01", "2027-02-02", 1) is None
+
+def test_failed_directory_fails_only_its_city(client, backend, monkeypatch):
+    get_list = backend.get_cached_hotel_list
+    monkeypatch.setattr(backend, "get_cached_hotel_list",
+                        lambda code, token=None: [] if code == "DEL" else get_list(code, token))
+
+    searches = [search("delhi", "2027-02-05", "2027-02-06"), search("goa", "2027-02-05", "2027-02-06"),
+                search("delhi", "2027-02-06", "2027-02-07")]
+    results = client.post("/batch_search", json={"searches": searches}).get_json()["results"]
+    assert results[0]["error"] == results[2]["error"] == "No hotels found for city code 'DEL'."
+    assert results[1]["cache"] == "miss" and results[1]["hotels"]
+
+def test_batch_size_limit(client, backend, monkeypatch):
+    monkeypatch.setattr(backend, "BATCH_SEARCH_MAX_QUERIES", 3)
+    searches = [search("goa", "2027-03-01", "2027-03-02")] * 3
+    assert client.post("/batch_search", json={"searches": searches}).status_code == 200
+
+    response = client.post("/batch_search", json={"searches": searches + searches[:1]})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "At most 3 searches per request"
+
+@pytest.mark.parametrize("body, error", [
+    ({}, "Please provide a non-empty 'searches' list"),
+    ({"searches": []}, "Please provide a non-empty 'searches' list"),
+    ({"searches": {"city": "goa"}}, "Please provide a non-empty 'searches' list"),
+    ({"searches": [search("goa", "2027-03-01", "2027-03-02"), search("atlantis", "2027-03-01", "2027-03-02")]},
+     "searches[1]: Invalid or unsupported city"),
+    ({"searches": ["goa"]}, "searches[0]: No JSON body received"),
+])
+def test_invalid_batches_are_rejected(client, body, error):
+    response = client.post("/batch_search", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
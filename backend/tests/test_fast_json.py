@@ -0,0 +1,113 @@
+# ============================
+# test_fast_json.py - JSON encoding, compression negotiation and ETags
+# ============================
+
+import gzip
+import json
+import math
+
+import pytest
+
+import fast_json
+
+brotli = pytest.importorskip("brotli")
+
+BODY = json.dumps([{"hotelId": str(i), "Hotel_name": "Hotel %d" % i} for i in range(100)]).encode()
+
+# ----------------------------
+# NaN/±Inf → null
+# ----------------------------
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_writes_non_finite_floats_as_null(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(fast_json, "orjson", None)
+    data = {"b": [math.nan, math.inf], "a": {"x": -math.inf, "y": 1.5}}
+    assert fast_json.dumps(data) == b'{"a":{"x":null,"y":1.5},"b":[null,null]}'
+
+def test_frame_to_records_nulls_non_finite_and_missing_values():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({
+        "Price": [1200.0, math.nan, math.inf],
+        "City": ["Goa", None, ""],
+        "Property_type": ["Hotel", "", None],
+    })
+    records = fast_json.frame_to_records(df, string_fill="", defaults={"Property_type": "Hotel"})
+    assert records == [
+        {"Price": 1200.0, "City": "Goa", "Property_type": "Hotel"},
+        {"Price": None, "City": "", "Property_type": "Hotel"},
+        {"Price": None, "City": "", "Property_type": "Hotel"},
+    ]
+    assert json.loads(fast_json.dumps(records))[2]["Price"] is None
+
+# ----------------------------
+# Content negotiation
+# ----------------------------
+@pytest.mark.parametrize("accept, encoding", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("identity", None),
+    (None, None),
+])
+def test_encoding_follows_accept_encoding(accept, encoding):
+    status, body, tag, chosen = fast_json.negotiate(BODY, accept, None)
+    assert (status, chosen) == (200, encoding)
+    decode = {"br": brotli.decompress, "gzip": gzip.decompress, None: bytes}[encoding]
+    assert decode(body) == BODY
+
+def test_without_brotli_gzip_is_used(monkeypatch):
+    monkeypatch.setattr(fast_json, "brotli", None)
+    assert fast_json.negotiate(BODY, "br, gzip", None)[3] == "gzip"
+
+def test_small_bodies_are_sent_as_is():
+    status, body, tag, encoding = fast_json.negotiate(b"{}", "gzip, br", None, min_size=1024)
+    assert (status, body, encoding) == (200, b"{}", None)
+    assert tag == fast_json.etag_for(b"{}")
+
+def test_compressed_bodies_are_memoized_by_tag():
+    class Cache(dict):
+        def put(self, key, value):
+            self[key] = value
+    cache = Cache()
+    first = fast_json.negotiate(BODY, "gzip", None, cache=cache)
+    assert list(cache) == [first[2]]
+    cache[first[2]] = b"memoized"
+    assert fast_json.negotiate(BODY, "gzip", None, cache=cache)[1] == b"memoized"
+
+# ----------------------------
+# ETags + 304
+# ----------------------------
+def test_etag_depends_on_body_and_encoding():
+    gzip_tag = fast_json.negotiate(BODY, "gzip", None)[2]
+    assert gzip_tag == fast_json.negotiate(BODY, "gzip", None)[2]
+    assert gzip_tag != fast_json.negotiate(BODY, "br", None)[2]
+    assert gzip_tag != fast_json.negotiate(BODY[:-1] + b" ", "gzip", None)[2]
+
+def test_if_none_match_answers_304():
+    tag = fast_json.negotiate(BODY, "gzip", None)[2]
+    assert fast_json.negotiate(BODY, "gzip", f'"{tag}"') == (304, b"", tag, "gzip")
+    assert fast_json.negotiate(BODY, "gzip", f'"other", "{tag}"')[0] == 304
+    assert fast_json.negotiate(BODY, "gzip", "*")[0] == 304
+    # A tag for another encoding doesn't validate this representation
+    assert fast_json.negotiate(BODY, "br", f'"{tag}"')[0] == 200
+
+def test_app_compresses_tags_and_revalidates(backend):
+    client = backend.app.test_client()
+    query = {"city": "mumbai", "limit": 50}
+    response = client.post("/recommend", json=query, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    etag = response.headers["ETag"]
+    hotels = json.loads(gzip.decompress(response.get_data()))["hotels"]
+    assert len(hotels) > 1
+
+    again = client.post("/recommend", json=query, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == etag
+
+    plain = client.post("/recommend", json=query, headers={"If-None-Match": etag})
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+    assert plain.get_json()["hotels"] == hotels
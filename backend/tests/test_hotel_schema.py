@@ -0,0 +1,33 @@
+# ============================
+# test_hotel_schema.py - Typed binary hotel tables
+# ============================
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from hotel_schema import LIVE_SCHEMA, read_table, write_table
+
+def rows(n):
+    return pd.DataFrame([{"hotelId": f"H{n}-{i}", "Hotel_name": f"Hotel {i}", "Price": float(i)}
+                         for i in range(200)])
+
+def test_concurrent_writes_to_one_path(tmp_path):
+    dest = str(tmp_path / "offers.feather")
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda n: write_table(rows(n), dest, LIVE_SCHEMA), range(32)))
+
+    df = read_table(dest)
+    assert list(df.columns) == LIVE_SCHEMA.names
+    assert len(df) == 200 and df["hotelId"].str.split("-").str[0].nunique() == 1
+    assert os.listdir(tmp_path) == ["offers.feather"]  # No temp files left behind
+
+def test_oyo_binary_is_generated_from_the_csv_outside_the_tree(backend):
+    backend.get_oyo_snapshot()
+    assert os.path.dirname(os.path.abspath(backend.OYO_DATA_PATH)) == os.path.abspath(backend.LIVE_CACHE_DIR)
+    assert backend.oyo_data_stamp()[0] == backend.OYO_DATA_PATH
+
+    binary = read_table(backend.OYO_DATA_PATH)
+    from_csv = backend.apply_schema(pd.read_csv(backend.OYO_CSV_PATH), backend.OYO_SCHEMA)
+    pd.testing.assert_frame_equal(binary, from_csv)
@@ -0,0 +1,78 @@
+# ============================
+# test_live_indexes.py - Live hotels in the derived indexes follow the offers store
+# ============================
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from hotel_schema import LIVE_SCHEMA, apply_schema
+
+def live_frame(*hotel_ids):
+    return apply_schema(pd.DataFrame([
+        {"hotelId": hid, "Hotel_name": f"Test Stay {hid}", "Address": "Baga Beach Road", "Latitude": 15.55,
+         "Longitude": 73.75, "Property_type": "HOTEL", "Room_status": "Available", "Price": 3200.0,
+         "Currency": "INR", "Rating": 4.0, "Final_rating": 4.1}
+        for hid in hotel_ids
+    ]), LIVE_SCHEMA)
+
+@pytest.fixture
+def store(backend):
+    """The offers store, emptied of searches this module wrote."""
+    keys = []
+
+    def write(key, df, ttl):
+        keys.append(key)
+        backend.offers_store.write(key, df, ttl)
+
+    yield write
+    for key in keys:
+        backend.offers_store.write(key, live_frame(), -1)
+    backend.sync_live_indexes(force=True)
+
+def test_sync_adds_other_workers_hotels_and_drops_expired(backend, store):
+    index = backend.get_similarity_index()
+    store(("GOA", "2026-12-01", "2026-12-02", 1), live_frame("LVGOA001", "LVGOA002"), 3600)
+
+    assert backend.sync_live_indexes()
+    assert {"LVGOA001", "LVGOA002"} <= set(index.hotel_ids())
+    assert not backend.sync_live_indexes()  # Store unchanged: nothing to do
+
+    store(("GOA", "2026-12-01", "2026-12-02", 1), live_frame("LVGOA002"), 3600)
+    store(("GOA", "2026-12-05", "2026-12-06", 1), live_frame("LVGOA003"), -1)  # Already expired
+    assert backend.sync_live_indexes()
+    ids = set(index.hotel_ids())
+    assert "LVGOA002" in ids
+    assert not {"LVGOA001", "LVGOA003"} & ids
+    assert index.groups[index.positions["LVGOA002"]] == backend.CITY_NAMES["GOA"]
+
+def test_sync_keeps_oyo_hotels(backend, store):
+    index = backend.get_similarity_index()
+    oyo_ids = {h["hotelId"] for entry in backend.get_oyo_city_index().values() for h in entry["hotels"]}
+    backend.sync_live_indexes(force=True)
+    assert oyo_ids <= set(index.hotel_ids())
+
+def test_sync_updates_geo_and_typeahead(backend, store):
+    geo, suggest = backend.get_geo_index(), backend.get_suggest_index()
+    store(("GOA", "2026-12-08", "2026-12-09", 1), live_frame("LVGOA004"), 3600)
+    assert backend.sync_live_indexes()
+    assert "LVGOA004" in geo.hotel_ids()
+    assert "LVGOA004" in suggest.hotel_ids("live")
+
+    store(("GOA", "2026-12-08", "2026-12-09", 1), live_frame(), 3600)
+    assert backend.sync_live_indexes()
+    assert "LVGOA004" not in geo.hotel_ids()
+    assert "LVGOA004" not in suggest.hotel_ids()
+
+def test_live_hotels_filed_under_the_oyo_city_name(backend, store):
+    assert backend.CITY_NAMES["BLR"] == "bangalore"
+    assert backend.canonical_city(" Bengaluru ") == "bangalore"
+    store(("BLR", "2026-12-08", "2026-12-09", 1), live_frame("LVBLR001"), 3600)
+    backend.sync_live_indexes()
+    index = backend.get_similarity_index()
+    assert index.groups[index.positions["LVBLR001"]] == "bangalore"
+    results = backend.get_suggest_index().suggest("test stay", city=backend.canonical_city("bengaluru"),
+                                                  types={"hotel"})
+    assert results[0][0]["hotelId"] == "LVBLR001"
+    assert results[0][0]["city"] == "bangalore"
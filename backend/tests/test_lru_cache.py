@@ -0,0 +1,100 @@
+# ============================
+# test_lru_cache.py - In-memory LRU + TTL response cache
+# ============================
+
+import threading
+import time
+
+import pytest
+
+@pytest.fixture
+def LRUCache(backend):
+    return backend.LRUCache
+
+def test_hit_miss_counters(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=10, max_bytes=1000)
+    assert cache.get("a") is None
+    cache.put("a", b"body")
+    assert cache.get("a") == b"body"
+    assert cache.get("a") == b"body"
+    assert cache.get("b") is None
+    assert cache.stats() == {"entries": 1, "bytes": 4, "hits": 2, "misses": 2, "evictions": 0}
+
+def test_expired_entries_are_misses_and_dropped(LRUCache):
+    cache = LRUCache(ttl=0.05, max_entries=10, max_bytes=1000)
+    cache.put("a", b"body")
+    assert cache.get("a") == b"body"
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 1, "misses": 1, "evictions": 0}
+
+def test_put_restarts_the_ttl(LRUCache):
+    cache = LRUCache(ttl=0, max_entries=10, max_bytes=1000)
+    cache.put("a", b"old")
+    cache.ttl = 60
+    cache.put("a", b"new")
+    assert cache.get("a") == b"new"
+    assert cache.stats()["bytes"] == 3
+
+def test_byte_budget_evicts_least_recently_used(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=10, max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"  # "b" is now least recently used
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (b"aaaa", b"cccc")
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 8, 1)
+
+def test_one_large_value_evicts_several(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=10, max_bytes=10)
+    for key in "abc":
+        cache.put(key, b"xxx")
+    cache.put("big", b"y" * 9)
+    assert [k for k in "abc" if cache.get(k) is not None] == []
+    assert cache.stats()["evictions"] == 3 and cache.stats()["bytes"] == 9
+
+def test_values_over_the_budget_are_not_cached(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=10, max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("huge", b"z" * 11)
+    assert cache.get("huge") is None
+    assert cache.get("a") == b"aaaa"  # Nothing was evicted for it
+    assert cache.stats()["evictions"] == 0
+
+def test_explicit_size_for_non_bytes_values(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=10, max_bytes=100)
+    cache.put("a", {"hotels": []}, size=60)
+    cache.put("b", {"hotels": []}, size=60)
+    assert cache.get("a") is None and cache.get("b") == {"hotels": []}
+    assert cache.stats()["bytes"] == 60
+
+def test_entry_limit_and_invalidate(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=2, max_bytes=1000)
+    for key in "abc":
+        cache.put(key, b"v")
+    assert cache.get("a") is None and cache.stats()["entries"] == 2
+    cache.invalidate("b")
+    cache.invalidate("missing")
+    assert cache.get("b") is None
+    assert cache.stats()["bytes"] == 1
+
+def test_concurrent_use_keeps_the_accounting_consistent(LRUCache):
+    cache = LRUCache(ttl=60, max_entries=50, max_bytes=400)
+
+    def work(n):
+        for i in range(500):
+            key = (n * 7 + i) % 80
+            if cache.get(key) is None:
+                cache.put(key, b"x" * (key % 9 + 1))
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 500
+    assert stats["bytes"] == sum(size for _, _, size in cache.entries.values()) <= 400
+    assert stats["entries"] <= 50
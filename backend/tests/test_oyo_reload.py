@@ -0,0 +1,123 @@
+# ============================
+# test_oyo_reload.py - OYO dataset diffs and hot reloads
+# ============================
+
+import math
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from hotel_schema import OYO_SCHEMA, apply_schema
+
+def frame(*rows):
+    return apply_schema(pd.DataFrame([dict(zip(["hotelId", "City", "Price", "Room_status"], row)) for row in rows]),
+                        OYO_SCHEMA)
+
+OLD = frame(("A", "Goa", 1000, None), ("B", "Goa", math.nan, "Available"), ("C", "Pune", 2000, None))
+
+# ----------------------------
+# diff_oyo_datasets
+# ----------------------------
+def test_unchanged_rows_with_missing_values_are_equal(backend):
+    assert backend.diff_oyo_datasets(OLD, OLD.copy()) == (set(), set(), set())
+
+def test_added_removed_and_changed_rows(backend):
+    new = frame(("A", "Goa", 1000, None), ("B", "Goa", 1500, "Available"), ("D", "Delhi", 900, None))
+    changed, removed, cities = backend.diff_oyo_datasets(OLD, new)
+    assert (changed, removed) == ({"B", "D"}, {"C"})
+    assert cities == {"goa", "pune", "delhi"}
+
+@pytest.mark.parametrize("row", [
+    ("A", "Goa", 1000, ""),           # None → ""
+    ("A", "Goa", math.nan, None),     # Number → missing
+    ("A", "Goa", 1000, "\0"),         # A NUL string isn't a missing value
+])
+def test_missing_and_empty_values_differ(backend, row):
+    new = pd.concat([frame(row), OLD.iloc[1:]], ignore_index=True)
+    assert backend.diff_oyo_datasets(OLD, new) == ({"A"}, set(), {"goa"})
+
+def test_city_move_affects_both_cities(backend):
+    new = pd.concat([frame(("A", "Mumbai", 1000, None)), OLD.iloc[1:]], ignore_index=True)
+    assert backend.diff_oyo_datasets(OLD, new) == ({"A"}, set(), {"goa", "mumbai"})
+
+def test_duplicate_ids_need_a_full_rebuild(backend):
+    assert backend.diff_oyo_datasets(OLD, frame(("A", "Goa", 1, None), ("A", "Goa", 2, None))) is None
+
+# ----------------------------
+# reload_oyo_dataset
+# ----------------------------
+@pytest.fixture
+def dataset(backend, tmp_path, monkeypatch):
+    """A private copy of the OYO CSV, loaded with no derived indexes built yet."""
+    csv = tmp_path / "oyo.csv"
+    shutil.copy(backend.OYO_CSV_PATH, csv)
+    monkeypatch.setattr(backend, "OYO_CSV_PATH", str(csv))
+    monkeypatch.setattr(backend, "OYO_DATA_PATH", str(tmp_path / "oyo.feather"))
+    for name in ("oyo_snapshot", "similarity_index", "geo_index", "suggest_index"):
+        monkeypatch.setattr(backend, name, None)
+    return csv
+
+def rewrite(csv, edit):
+    df = pd.read_csv(csv)
+    edit(df)
+    df.to_csv(csv, index=False)
+    later = time.time() + 5  # Newer than the binary written by the last load
+    os.utime(csv, (later, later))
+
+def test_first_load_and_ambiguous_ids_are_full_reloads(backend, dataset):
+    first = backend.reload_oyo_dataset()
+    assert first["mode"] == "full" and first["hotels"] > 0
+    assert backend.reload_oyo_dataset() is None  # Nothing changed on disk
+
+    rewrite(dataset, lambda df: None)  # Rewritten, same rows
+    assert backend.reload_oyo_dataset()["mode"] == "delta"
+
+    def duplicate_id(df):
+        df.loc[1, "hotelId"] = df.loc[0, "hotelId"]
+    rewrite(dataset, duplicate_id)
+    assert backend.reload_oyo_dataset()["mode"] == "full"
+
+def test_edits_are_delta_reloads(backend, dataset):
+    backend.reload_oyo_dataset()
+    before = backend.oyo_snapshot
+    city = before["df"].loc[0, "City"].lower()
+
+    def edit(df):
+        df.loc[0, "Hotel_name"] = "Zzyzx Renamed Hotel"
+        df.drop(index=1, inplace=True)
+    rewrite(dataset, edit)
+    summary = backend.reload_oyo_dataset()
+    assert (summary["mode"], summary["changed"], summary["removed"]) == ("delta", 1, 1)
+    assert summary["cities"] == [city]
+
+    cities = backend.oyo_snapshot["cities"]
+    assert "Zzyzx Renamed Hotel" in {h["Hotel_name"] for h in cities[city]["hotels"]}
+    untouched = next(c for c in cities if c != city)
+    assert cities[untouched] is before["cities"][untouched]  # Reused, not rebuilt
+
+def test_index_built_during_a_reload_uses_the_new_snapshot(backend, dataset):
+    backend.reload_oyo_dataset()
+    new_id = "ZZYZX001"
+
+    def add_hotel(df):
+        df.loc[0, "hotelId"] = new_id
+    rewrite(dataset, add_hotel)
+
+    # A reload holds the lock from before update_derived_indexes until the swap; an
+    # index built meanwhile must wait for it rather than use the old snapshot
+    backend.oyo_reload_lock.acquire()
+    try:
+        builder = threading.Thread(target=backend.get_suggest_index)
+        builder.start()
+        builder.join(0.2)
+        assert backend.suggest_index is None
+        df = backend.read_oyo_dataset(backend.oyo_data_stamp()[0])
+        backend.oyo_snapshot = dict(backend.oyo_snapshot, df=df, cities=backend.build_oyo_city_index(df))
+    finally:
+        backend.oyo_reload_lock.release()
+    builder.join(10)
+    assert new_id in backend.suggest_index.hotel_ids("oyo")
@@ -0,0 +1,97 @@
+# ============================
+# test_prefetch.py - Background prefetch budget and stale-while-revalidate
+# ============================
+
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+
+from hotel_schema import LIVE_SCHEMA, apply_schema
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def prefetch_calls(backend):
+    return backend.upstream_call_counts().get("prefetch", 0)
+
+# ----------------------------
+# Budget
+# ----------------------------
+def test_exhausted_budget_defers_the_rest(backend, upstream):
+    per_search = backend.PREFETCH_CALLS_PER_SEARCH
+    cities = ["goa", "pune", "delhi", "mumbai"]
+    # Token and directories cached up front, so every search costs exactly its estimate
+    token = backend.get_amadeus_access_token()
+    for city in cities:
+        assert backend.get_cached_hotel_list(backend.CITY_CODES[city], token)
+    prefetcher = backend.Prefetcher(cities, ["+400"], [1], budget_per_min=2 * per_search + 2, refresh_ahead=0)
+    assert len(prefetcher.due()) == 4
+
+    before = prefetch_calls(backend)
+    assert prefetcher.run_once() == 2
+    spent = prefetch_calls(backend) - before
+    assert prefetcher.budget.remaining() == prefetcher.budget.per_minute - spent < per_search
+    stats = prefetcher.snapshot()
+    assert (stats["fetched"], stats["deferred"], stats["upstream_calls"]) == (2, 1, spent)
+    assert len(prefetcher.due()) == 2
+
+    # Still out of budget: nothing is fetched and nothing is sent upstream
+    assert prefetcher.run_once() == 0
+    assert prefetch_calls(backend) - before == spent
+    assert prefetcher.snapshot()["deferred"] == 2
+
+    # A minute later the budget is back
+    prefetcher.budget.spent = deque((t - 61, n) for t, n in prefetcher.budget.spent)
+    assert prefetcher.run_once() == 2
+    assert prefetcher.due() == []
+
+# ----------------------------
+# Stale-while-revalidate
+# ----------------------------
+def test_stale_hit_serves_stale_data_and_revalidates_once(backend, upstream, monkeypatch):
+    key = ("GOA", "2027-04-01", "2027-04-02", 1)
+    search = ("goa",) + key[1:]
+    stale = apply_schema(pd.DataFrame([{"hotelId": "STALE001", "Hotel_name": "Old Stay", "Price": 1000.0}]),
+                         LIVE_SCHEMA)
+    backend.offers_store.write(key, stale, 3600)
+    backend.live_response_cache.invalidate(key)
+    monkeypatch.setattr(backend, "OFFERS_CACHE_TTL", 0)  # Everything cached is now stale
+
+    # Hold the refresh until every read below has been answered
+    release = threading.Event()
+    fetches = []
+    fetch = backend.fetch_live_hotels
+
+    def gated_fetch(*args, **kwargs):
+        fetches.append(args)
+        release.wait(10)
+        return fetch(*args, **kwargs)
+    monkeypatch.setattr(backend, "fetch_live_hotels", gated_fetch)
+
+    try:
+        response = backend.app.test_client().post("/live_recommend", json=dict(
+            city="goa", checkin_date=key[1], checkout_date=key[2], adults=1))
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["from_cache"] is True
+        assert [h["hotelId"] for h in body["hotels"]] == ["STALE001"]
+        for _ in range(3):
+            hotels, is_stale = backend.read_live_cache_entry(*search)
+            assert is_stale and [h["hotelId"] for h in hotels] == ["STALE001"]
+        wait_until(lambda: fetches)
+        assert key in backend.revalidating
+    finally:
+        release.set()
+
+    wait_until(lambda: key not in backend.revalidating)
+    assert fetches == [search]
+    hotels, written_at = backend.offers_store.read(key)
+    assert hotels and "STALE001" not in {h["hotelId"] for h in hotels}
+    assert backend.live_response_cache.get(key) is not None  # Refreshed response body
+    backend.offers_store.write(key, apply_schema(pd.DataFrame(), LIVE_SCHEMA), -1)
+    backend.live_response_cache.invalidate(key)
@@ -0,0 +1,55 @@
+# ============================
+# test_ratings.py - Vectorized Final_rating scoring
+# ============================
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+IDS = ["OIMPXEFB", "AMGOA1", "", "HID0000001", "हॉटल-1"]
+
+def test_fnv1a_matches_the_reference(backend):
+    hashes = backend.hash_strings(pa.array(["a", "", "foobar"]))
+    assert hashes.tolist() == [0xaf63dc4c8601ec8c, 0xcbf29ce484222325, 0x85944171f73967e8]
+    # Sliced arrays hash their own values
+    assert backend.hash_strings(pa.array(["x", "a"]).slice(1))[0] == 0xaf63dc4c8601ec8c
+
+def scores(backend, ids=IDS):
+    n = len(ids)
+    return backend.calculate_final_ratings([None] * n, ["hotel"] * n, ["Stay"] * n, ids)
+
+def test_scores_are_deterministic_across_calls_and_inputs(backend):
+    first = scores(backend)
+    assert np.array_equal(first, scores(backend))
+    assert np.array_equal(first[::-1], scores(backend, IDS[::-1]))  # Per hotel, not per position
+    assert scores(backend, [IDS[3]])[0] == first[3]
+
+def test_scores_are_deterministic_across_processes(backend):
+    code = ("import app; print(list(app.calculate_final_ratings("
+            f"[None] * {len(IDS)}, ['hotel'] * {len(IDS)}, ['Stay'] * {len(IDS)}, {IDS!r})))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         env=dict(os.environ, PYTHONHASHSEED="123")).stdout
+    assert eval(out.strip().splitlines()[-1]) == scores(backend).tolist()
+
+@pytest.mark.parametrize("raw, ptype, expected", [
+    (4.6, "hotel", 4.6),      # Valid 0-5 rating is kept
+    (None, "Hostel", 2.5),    # Missing: per property type (case-insensitive)
+    ("n/a", "resort", 4.5),   # Unparseable
+    (7.5, "villa", 4.0),      # Out of range
+    (None, None, 3.0),        # Unknown type: default
+    (None, "castle", 3.0),
+])
+def test_fallback_rating(backend, raw, ptype, expected):
+    rating = backend.calculate_final_ratings([raw], [ptype], ["Stay"], ["H1"])[0]
+    assert abs(rating - expected) <= backend.NOISE_AMPLITUDE + 0.005
+
+def test_brand_boost(backend):
+    names = ["Sea View Lodge", "The TAJ Mahal Palace", "JW Marriott Juhu", "Hotel Taj-Inn"]
+    ratings = backend.calculate_final_ratings([3.0] * 4, ["hotel"] * 4, names, ["H1"] * 4)
+    assert ratings.tolist()[1:] == [round(ratings[0] + backend.BRAND_BOOST, 2)] * 3
+    assert backend.calculate_final_ratings([5.0], ["hotel"], ["Taj"], ["H1"])[0] <= 5  # Clamped
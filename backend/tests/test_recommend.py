@@ -0,0 +1,91 @@
+# ============================
+# test_recommend.py - /recommend request validation
+# ============================
+
+import pytest
+
+LIVE = {"source": "live", "city": "goa", "checkin_date": "2026-12-10", "checkout_date": "2026-12-11"}
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
+
+@pytest.mark.parametrize("body, error", [
+    (dict(LIVE, adults="two"), "'adults' must be an integer"),
+    (dict(LIVE, adults=[1]), "'adults' must be an integer"),
+    (dict(LIVE, city="atlantis"), "Invalid or unsupported city"),
+    (dict(LIVE, checkout_date=""), "Please provide valid 'checkin_date' and 'checkout_date'"),
+    (dict(LIVE, source="cache"), "'source' must be 'oyo' or 'live'"),
+])
+def test_bad_live_parameters_are_rejected(client, body, error):
+    response = client.post("/recommend", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+def test_oyo_source_needs_no_dates(client):
+    response = client.post("/recommend", json={"city": "mumbai", "limit": 3})
+    assert response.status_code == 200
+    assert response.get_json()["returned"] <= 3
+
+# ----------------------------
+# Ranking
+# ----------------------------
+HOTELS = [
+    {"hotelId": "A", "Price": 3000, "Final_rating": 4.5, "Rating": 4.5, "Property_type": "Hotel"},
+    {"hotelId": "B", "Price": 1500, "Final_rating": 3.9, "Rating": None, "Property_type": "hostel"},
+    {"hotelId": "C", "Price": None, "Final_rating": 4.5, "Rating": 4.2, "Property_type": "HOTEL"},
+    {"hotelId": "D", "Price": 2200, "Final_rating": 3.1, "Rating": 3.0, "Property_type": "resort"},
+    {"hotelId": "E", "Price": 2200, "Final_rating": 4.5, "Rating": "n/a", "Property_type": None},
+]
+
+def ranked(backend, hotels=HOTELS, **data):
+    params = backend.parse_rank_params(data)
+    page, total, cursor = backend.rank_hotels(hotels, backend.build_rank_columns(hotels), params)
+    return [h["hotelId"] for h in page], total, cursor
+
+def test_filters(backend):
+    assert ranked(backend, min_price=2000, max_price=3000)[:2] == (["A", "E", "D"], 3)
+    assert ranked(backend, min_rating=4.0)[:2] == (["A", "C", "E"], 3)
+    assert ranked(backend, property_type="HOTEL")[:2] == (["A", "C"], 2)
+
+def test_order_and_missing_keys_last(backend):
+    assert ranked(backend, sort_by="Price")[0] == ["B", "D", "E", "A", "C"]
+    assert ranked(backend, sort_by="Price", order="desc")[0] == ["A", "D", "E", "B", "C"]
+    assert ranked(backend, sort_by="Rating")[0] == ["A", "C", "D", "B", "E"]
+
+def test_ties_keep_dataset_order_across_pages(backend):
+    # A, C and E tie on Final_rating; the cut-off falls inside the tie
+    first, total, cursor = ranked(backend, limit=2)
+    assert (first, total, cursor) == (["A", "C"], 5, "2")
+    second, _, cursor = ranked(backend, limit=2, cursor=cursor)
+    assert (second, cursor) == (["E", "B"], "4")
+    last, _, cursor = ranked(backend, limit=2, cursor=cursor)
+    assert (last, cursor) == (["D"], None)
+
+def test_cursor_past_the_end(backend):
+    assert ranked(backend, cursor="10") == ([], 5, None)
+
+def test_pages_cover_a_large_list_once(backend):
+    hotels = [{"hotelId": str(i), "Price": i % 7, "Final_rating": (i * 37) % 11 / 2} for i in range(250)]
+    seen, cursor = [], None
+    while True:
+        page, total, cursor = ranked(backend, hotels, limit=40, cursor=cursor)
+        seen += page
+        if cursor is None:
+            break
+    assert total == 250 and len(seen) == len(set(seen)) == 250
+    ratings = [hotels[int(i)]["Final_rating"] for i in seen]
+    assert ratings == sorted(ratings, reverse=True)
+
+def test_live_ranking_columns_are_built_once_per_search(backend, monkeypatch):
+    key = ("GOA", "2026-12-24", "2026-12-25", 1)
+    backend.cache_live_response(key, HOTELS)
+    monkeypatch.setattr(backend, "build_rank_columns", lambda hotels: pytest.fail("columns rebuilt"))
+    monkeypatch.setattr(backend, "get_live_hotels", lambda *args: pytest.fail("cache not used"))
+
+    response = backend.app.test_client().post("/recommend", json=dict(
+        LIVE, checkin_date=key[1], checkout_date=key[2], sort_by="Price", limit=2))
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [h["hotelId"] for h in body["hotels"]] == ["B", "D"]
+    assert body["hotel_count"] == 5 and body["next_cursor"] == "2"
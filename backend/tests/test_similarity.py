@@ -0,0 +1,78 @@
+# ============================
+# test_similarity.py - Similar-hotels index updates and persistence
+# ============================
+
+import os
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from similarity import SimilarityIndex
+
+def hotel(hotel_id, name, price=2500, rating=4.0):
+    return {"hotelId": hotel_id, "Hotel_name": name, "Address": "MG Road", "Property_type": "hotel",
+            "Price": price, "Final_rating": rating}
+
+CATALOG = [hotel("A", "Grand Palace"), hotel("B", "Grand Palace Suites"), hotel("C", "Sea View Inn", 9000, 2.0)]
+FILLER = [hotel(f"X{i}", f"Lodge {i}") for i in range(5)]
+
+def ranked(index, hotel_id, **kwargs):
+    return [record["hotelId"] for record, _ in index.similar(hotel_id, **kwargs)]
+
+def test_replaced_rows_are_appended_not_rewritten():
+    index = SimilarityIndex()
+    index.upsert(CATALOG + FILLER, "goa")
+    index.similar("A")  # Stacks the first block
+    matrix = index.matrix
+
+    assert index.upsert([hotel("B", "Sea View Inn Annex", 9000, 2.0)], "goa") == 1
+    assert index.matrix is matrix  # Only buffered until the next query
+    assert len(index) == len(CATALOG + FILLER)
+    assert ranked(index, "C")[0] == "B"
+    results = ranked(index, "A", limit=50)
+    assert sorted(results) == sorted(h["hotelId"] for h in CATALOG + FILLER if h["hotelId"] != "A")
+
+def test_removed_rows_never_match_and_get_compacted():
+    index = SimilarityIndex()
+    index.upsert(CATALOG + FILLER, "goa")
+    assert index.remove(["B"]) == 1
+    assert "B" not in ranked(index, "A", limit=20)
+    assert index.similar("B") is None
+
+    index.remove([h["hotelId"] for h in FILLER])  # Over COMPACT_RATIO: rows are dropped
+    assert not index.dead
+    assert index.matrix.shape[0] == len(index) == 2
+    assert ranked(index, "A") == ["C"]
+
+def test_save_writes_one_file_and_round_trips(tmp_path):
+    path = str(tmp_path / "similar_index")
+    index = SimilarityIndex()
+    index.upsert(CATALOG, "goa")
+    index.upsert([hotel("D", "Grand Palace Annex")], "pune")
+    index.remove(["C"])
+    index.save(path)
+
+    assert sorted(os.listdir(tmp_path)) == ["similar_index.npz"]
+    loaded = SimilarityIndex.load(path)
+    assert sorted(loaded.hotel_ids()) == ["A", "B", "D"]
+    assert ranked(loaded, "A") == ranked(index, "A")
+    assert ranked(loaded, "A", same_group=True) == ["B"]
+
+def test_unreadable_file_gives_an_empty_index(tmp_path):
+    path = str(tmp_path / "similar_index")
+    with open(f"{path}.npz", "wb") as f:
+        f.write(b"not an npz")
+    assert len(SimilarityIndex.load(path)) == 0
+
+def test_changes_outside_the_features_replace_the_record():
+    index = SimilarityIndex()
+    index.upsert(CATALOG + FILLER, "goa")
+    rows = len(index.ids)
+
+    updated = dict(hotel("B", "Grand Palace Suites", price=2600), Room_status="Unavailable")
+    assert index.upsert([updated], "goa") == 1
+    assert len(index.ids) == rows  # Same price bucket: nothing re-vectorized
+    record = next(r for r, _ in index.similar("A") if r["hotelId"] == "B")
+    assert record["Price"] == 2600 and record["Room_status"] == "Unavailable"
+    assert index.upsert([updated], "goa") == 0
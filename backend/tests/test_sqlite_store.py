@@ -0,0 +1,128 @@
+# ============================
+# test_sqlite_store.py - SQLite live offers store
+# ============================
+
+import math
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from hotel_schema import LIVE_SCHEMA, apply_schema
+from sqlite_store import SQLiteOffersStore
+
+KEY = ("GOI", "2027-05-01", "2027-05-02", 1)
+
+def offers(n, tag="v1"):
+    return apply_schema(pd.DataFrame([
+        {"hotelId": f"H{i:03d}", "Hotel_name": f"{tag} Stay {i}", "Price": 1000.0 + i, "Currency": "INR"}
+        for i in range(n)
+    ]), LIVE_SCHEMA)
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteOffersStore(str(tmp_path / "offers.sqlite3"), max_bytes=10 ** 9)
+    yield store
+    store.close()
+
+def test_round_trip(store):
+    df = apply_schema(pd.DataFrame([
+        {"hotelId": "B", "Hotel_name": "Beach Stay", "Latitude": 15.5, "Longitude": 73.8, "Price": 3200.0,
+         "Rating": math.nan, "Room_status": None},
+        {"hotelId": "A", "Hotel_name": "Airport Inn", "Price": "bogus", "Final_rating": 4.25},
+    ]), LIVE_SCHEMA)
+    before = time.time()
+    store.write(KEY, df, 3600)
+
+    rows, written_at = store.read(KEY)
+    assert before <= written_at <= time.time()
+    assert store.written_at(KEY) == written_at
+    assert [r["hotelId"] for r in rows] == ["B", "A"]  # Written order
+    assert set(rows[0]) == set(LIVE_SCHEMA.names)
+    assert (rows[0]["Latitude"], rows[0]["Price"], rows[0]["Rating"], rows[0]["Room_status"]) == (15.5, 3200.0, None, None)
+    assert (rows[1]["Price"], rows[1]["Final_rating"]) == (None, 4.25)
+    assert store.cities() == ["GOI"]
+    assert [(r["checkin_date"], r["hotelId"]) for r in store.city_offers("GOI")] == [("2027-05-01", "B"), ("2027-05-01", "A")]
+
+def test_write_replaces_and_max_age(store):
+    store.write(KEY, offers(5), 3600)
+    store.write(KEY, offers(2, "v2"), 3600)
+    rows, _ = store.read(KEY)
+    assert [r["Hotel_name"] for r in rows] == ["v2 Stay 0", "v2 Stay 1"]
+    assert store.read(KEY, max_age=3600) is not None
+    assert store.read(KEY, max_age=0) is None
+    assert store.read(("GOI", "2027-05-09", "2027-05-10", 1)) is None
+    assert store.written_at(("GOI", "2027-05-09", "2027-05-10", 1)) is None
+
+def test_sweep_drops_expired_searches(store):
+    expired = ("BOM", "2027-05-01", "2027-05-02", 1)
+    store.write(KEY, offers(3), 3600)
+    store.write(expired, offers(3), -1)
+    version = store.version()
+    assert store.cities() == ["GOI"]  # Already hidden before the sweep
+    assert store.city_offers("BOM") == []
+
+    assert store.sweep() == 1
+    assert store.written_at(expired) is None and store.read(expired) is None
+    assert len(store.read(KEY)[0]) == 3
+    assert store.version() == version  # Only unexpired searches count
+    assert store.sweep() == 0
+
+def test_sweep_evicts_least_recently_used_over_budget(store):
+    keys = [("GOI", f"2027-06-0{d}", f"2027-06-0{d + 1}", 1) for d in range(1, 4)]
+    for key in keys:
+        store.write(key, offers(20), 3600)
+        time.sleep(0.01)
+    size = store._conn().execute("SELECT MAX(size) FROM searches").fetchone()[0]
+    store.max_bytes = 2 * size
+    store.read(keys[0])  # Now more recently used than keys[1]
+
+    assert store.sweep() == 1
+    assert [store.read(key) is not None for key in keys] == [True, False, True]
+
+def test_readers_see_whole_searches_during_writes(store):
+    store.write(KEY, offers(10, "v0"), 3600)
+    stop = threading.Event()
+    errors = []
+
+    def write():
+        for n in range(1, 21):
+            store.write(KEY, offers(10 if n % 2 else 40, f"v{n}"), 3600)
+        stop.set()
+
+    def read():
+        # Each thread has its own connection: readers run alongside the writer
+        reads = 0
+        while not stop.is_set() or reads == 0:
+            rows, _ = store.read(KEY)
+            tags = {r["Hotel_name"].split()[0] for r in rows}
+            if len(tags) != 1 or len(rows) not in (10, 40):
+                errors.append((len(rows), tags))
+            reads += 1
+        store.close()
+
+    threads = [threading.Thread(target=read) for _ in range(4)] + [threading.Thread(target=write)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(30)
+    assert not errors
+    assert store.read(KEY)[0][0]["Hotel_name"] == "v20 Stay 0"
+
+def test_open_write_transaction_does_not_block_readers(store):
+    store.write(KEY, offers(10), 3600)
+    writer = sqlite3.connect(store.path, isolation_level=None)  # Another worker, mid-write
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("DELETE FROM offers")
+    try:
+        result = []
+        reader = threading.Thread(target=lambda: result.append(store.read(KEY)))
+        reader.start()
+        reader.join(5)
+        assert not reader.is_alive()  # WAL: readers see the last commit without waiting
+        assert len(result[0][0]) == 10
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
@@ -0,0 +1,122 @@
+# ============================
+# test_streaming.py - Streamed live search against the fake upstream
+# ============================
+
+import asyncio
+import time
+
+import pytest
+
+fcntl = pytest.importorskip("fcntl")
+
+def lock_is_free(path):
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return True
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def test_lock_released_while_client_reads_slowly(backend, upstream):
+    upstream.config.latency_ms = 50
+    key = ("GOA", "2026-12-10", "2026-12-11", 1)
+    events = backend.live_search_events("goa", *key[1:])
+    assert next(events)[0] == "meta"
+    assert next(events)[0] == "hotels"  # The client stalls after the first batch
+
+    # The fetch finishes and unlocks while the client still hasn't read on
+    wait_until(lambda: lock_is_free(backend.offers_lock_path(key)))
+    assert backend.offers_store.written_at(key) is not None
+    rest = list(events)
+    assert [event for event, _ in rest][-1] == "done"
+    assert rest[-1][1]["from_cache"] is False
+
+def test_disconnect_stops_the_fetch_without_caching(backend, upstream):
+    upstream.config.latency_ms = 200
+    key = ("GOA", "2026-12-12", "2026-12-13", 1)
+    events = backend.live_search_events("goa", *key[1:])
+    next(events)
+    next(events)
+    events.close()
+
+    time.sleep(1)
+    assert backend.offers_store.written_at(key) is None
+    assert lock_is_free(backend.offers_lock_path(key))
+
+def test_streamed_response_bytes_are_counted(backend, upstream):
+    route, search = "/live_recommend", {"city": "goa", "checkin_date": "2026-12-16", "checkout_date": "2026-12-17"}
+    sent_before = backend.HTTP_RESPONSE_BYTES.value(route=route)
+    requests_before = backend.HTTP_REQUESTS.value(route=route, method="POST", status=200)
+
+    body = backend.app.test_client().post(route + "?stream=ndjson", json=search).get_data()
+    assert body.count(b"\n") >= 3  # meta, hotels..., done
+    assert backend.HTTP_RESPONSE_BYTES.value(route=route) - sent_before == len(body)
+    assert backend.HTTP_REQUESTS.value(route=route, method="POST", status=200) - requests_before == 1
+
+def test_streamed_bytes_counted_when_the_client_leaves(backend, upstream):
+    upstream.config.latency_ms = 200
+    route, key = "/live_recommend", ("GOA", "2026-12-18", "2026-12-19", 1)
+    sent_before = backend.HTTP_RESPONSE_BYTES.value(route=route)
+
+    response = backend.app.test_client().post(route + "?stream=sse", buffered=False, json=dict(
+        city="goa", checkin_date=key[1], checkout_date=key[2]))
+    first = next(iter(response.response))
+    assert first.startswith(b"event: meta")
+    assert backend.HTTP_RESPONSE_BYTES.value(route=route) == sent_before  # Not recorded mid-stream
+    response.close()
+
+    assert backend.HTTP_RESPONSE_BYTES.value(route=route) - sent_before == len(first)
+    time.sleep(1)
+    assert backend.offers_store.written_at(key) is None  # The search was cancelled
+    assert lock_is_free(backend.offers_lock_path(key))
+
+def test_async_lock_released_while_client_reads_slowly(backend, upstream):
+    import asgi
+
+    upstream.config.latency_ms = 50
+    key = ("GOA", "2026-12-14", "2026-12-15", 1)
+
+    async def run():
+        events = asgi.live_search_events_async("goa", *key[1:])
+        try:
+            assert (await anext(events))[0] == "meta"
+            assert (await anext(events))[0] == "hotels"
+            while not lock_is_free(backend.offers_lock_path(key)):
+                await asyncio.sleep(0.02)
+            assert backend.offers_store.written_at(key) is not None
+            return [frame async for frame in events]
+        finally:
+            await events.aclose()
+            await asgi.amadeus.aclose()
+
+    rest = asyncio.run(asyncio.wait_for(run(), 10))
+    assert rest[-1][0] == "done"
+
+def test_search_locks_use_a_fixed_set_of_files(backend):
+    keys = [("BOM", f"2026-12-{day:02d}", f"2026-12-{day + 1:02d}", adults)
+            for day in range(1, 29) for adults in range(1, 5)]
+    paths = {backend.offers_lock_path(key) for key in keys}
+    assert len(paths) <= backend.OFFERS_LOCK_STRIPES
+    assert backend.offers_lock_path(keys[0]) == backend.offers_lock_path(keys[0])
+
+def test_async_searches_sharing_a_lock_stripe_all_finish(backend, upstream, monkeypatch):
+    import asgi
+
+    monkeypatch.setattr(backend, "OFFERS_LOCK_STRIPES", 1)
+    searches = [("goa", f"2026-12-{day:02d}", f"2026-12-{day + 1:02d}", 1) for day in range(1, 13)]
+
+    async def run():
+        try:
+            return await asyncio.gather(*(asgi.fetch_live_hotels_async(*search) for search in searches))
+        finally:
+            await asgi.amadeus.aclose()
+
+    results = asyncio.run(asyncio.wait_for(run(), 30))
+    assert len(results) == len(searches)
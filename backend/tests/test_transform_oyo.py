@@ -0,0 +1,66 @@
+# ============================
+# test_transform_oyo.py - Stable hotel ids in the OYO transform
+# ============================
+
+import csv
+import os
+
+import pytest
+
+import transform_oyo
+from hotel_schema import read_table
+from transform_oyo import run, transform_row
+
+def raw(index, name="OYO 123 Hotel Sea Breeze", location="Juhu, Mumbai", price="2500", rating="400"):
+    return {"": str(index), "Hotel_name": name, "Location": location, "Price": price, "Rating": rating}
+
+def test_id_ignores_price_rating_and_row_index():
+    base = transform_row(raw(0))["hotelId"]
+    assert transform_row(raw(7, price="3100", rating="650"))["hotelId"] == base
+    assert transform_row(raw(0, name="123 hotel sea breeze", location="Juhu,  Mumbai"))["hotelId"] == base
+    assert transform_row(raw(0, location="Bandra, Mumbai"))["hotelId"] != base
+
+def write_raw(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def test_true_duplicates_get_their_own_ids(tmp_path):
+    source = tmp_path / "rooms.csv"
+    rows = [raw(0), raw(1, name="Hotel Blue Moon"), raw(2, price="2700"), raw(3, rating="10")]
+    write_raw(source, rows)
+
+    out = str(tmp_path / "hotels.feather")
+    assert run(str(source), out, chunk_size=2, workers=1) == 4
+    ids = read_table(out)["hotelId"].tolist()
+    assert len(set(ids)) == 4
+    assert ids[0] == transform_row(raw(0))["hotelId"]
+
+    # Re-running on a reordered dump with new prices keeps the unique hotel's id
+    rows[1]["Price"] = "999"
+    write_raw(source, list(reversed(rows)))
+    run(str(source), out, chunk_size=2, workers=1)
+    rerun = read_table(out)["hotelId"].tolist()
+    assert rerun[2] == ids[1]
+    assert set(rerun) == set(ids)
+
+def test_failed_run_leaves_outputs_untouched(tmp_path, monkeypatch):
+    source = tmp_path / "rooms.csv"
+    write_raw(source, [raw(i, name=f"Hotel {i}") for i in range(4)])
+    out, out_csv = tmp_path / "hotels.feather", tmp_path / "hotels.csv"
+    run(str(source), str(out), str(out_csv), chunk_size=2, workers=1)
+    before = {path: path.read_bytes() for path in (out, out_csv)}
+
+    with pytest.raises(FileNotFoundError):
+        run(str(tmp_path / "missing.csv"), str(out), str(out_csv), workers=1)
+
+    def failing_workers(chunks, workers):
+        yield transform_oyo.transform_chunk(next(chunks))
+        raise RuntimeError("worker died")
+    monkeypatch.setattr(transform_oyo, "transformed_chunks", failing_workers)
+    with pytest.raises(RuntimeError):
+        run(str(source), str(out), str(out_csv), chunk_size=2, workers=1)
+
+    assert sorted(os.listdir(tmp_path)) == ["hotels.csv", "hotels.feather", "rooms.csv"]  # No .tmp files
+    assert {path: path.read_bytes() for path in (out, out_csv)} == before
@@ -1,11 +1,32 @@
+"""
+Transforms a raw OYO hotel dump into the serving dataset used by app.py.
+
+Streams the input CSV in chunks, transforms chunks in parallel worker
+processes and writes the CSV that app.py serves (it generates its own typed
+binary copy from it), plus an optional typed binary (Feather) file. Memory
+use is bounded by chunk size x in-flight chunks.
+
+Usage:
+    python transform_oyo.py [input_csv] [--csv OUT.csv] [--output OUT.feather]
+                            [--chunk-size N] [--workers N]
+"""
+
+import argparse
 import csv
-import random
+import hashlib
+import os
+import re
 import string
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 
-input_csv = 'OYO_HOTEL_ROOMS.csv'  # Path to your original dataset
-output_csv = 'OYO_HOTELS_792_transformed.csv'  # Desired output filename
+from hotel_schema import OYO_SCHEMA, open_table_writer, to_table
 
-# List of cities to look for in hotel info - add more as needed
+DEFAULT_INPUT_CSV = 'OYO_HOTEL_ROOMS.csv'  # Path to your original dataset
+DEFAULT_OUTPUT_CSV = 'OYO_HOTELS_792_transformed.csv'  # CSV export filename
+
+# List of cities to look for in hotel info - add more as needed.
+# Earlier entries win when several cities appear in the same text.
 KNOWN_CITIES = [
     'Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata',
     'Hyderabad', 'Pune', 'Ahmedabad', 'Jaipur', 'Lucknow',
@@ -14,9 +35,47 @@ KNOWN_CITIES = [
     'Ludhiana', 'Agra', 'Nashik', 'Faridabad'
 ]
 
-def generate_hotel_id():
-    # Generate hotel id like 'OI' + 6 random uppercase letters
-    return 'OI' + ''.join(random.choices(string.ascii_uppercase, k=6))
+# One compiled alternation over all cities instead of a substring test per city
+CITY_PATTERN = re.compile("|".join(re.escape(c.lower()) for c in KNOWN_CITIES))
+CITY_PRIORITY = {c.lower(): (i, c) for i, c in enumerate(KNOWN_CITIES)}
+
+FIELDNAMES = OYO_SCHEMA.names
+
+ID_LETTERS = 12  # 26^12 ids - collision-free in practice for multi-million-row dumps
+
+def identity_text(text):
+    """Lower-cased alphanumeric words, so case, punctuation and spacing don't change an id."""
+    return ' '.join(re.findall(r'[a-z0-9]+', (text or '').lower()))
+
+def generate_hotel_id(name, address, occurrence=1):
+    # Stable hotel id like 'OI' + uppercase letters, hashed from the fields that
+    # identify a hotel - its cleaned name and its location - so a new price or
+    # rating, or the dump's row order and index column, never change it. The
+    # 2nd, 3rd, ... row with the same name and location (a true duplicate)
+    # hashes its occurrence number too; see assign_duplicate_ids
+    content = f'{identity_text(name)}\x1f{identity_text(address)}'
+    if occurrence > 1:
+        content += f'\x1f#{occurrence}'
+    digest = hashlib.blake2b(content.encode('utf-8'), digest_size=8).digest()
+    value = int.from_bytes(digest, 'big')
+    letters = []
+    for _ in range(ID_LETTERS):
+        value, rem = divmod(value, 26)
+        letters.append(string.ascii_uppercase[rem])
+    return 'OI' + ''.join(letters)
+
+def assign_duplicate_ids(rows, seen):
+    """
+    Gives each repeat of a name + location its own id, numbered in input
+    order. `seen` (id -> occurrences so far) carries across chunks, so this
+    runs in the parent process on the ordered results.
+    """
+    for row in rows:
+        count = seen.get(row['hotelId'], 0) + 1
+        seen[row['hotelId']] = count
+        if count > 1:
+            row['hotelId'] = generate_hotel_id(row['Hotel_name'], row['Address'], count)
+    return rows
 
 def clean_hotel_name(raw_name):
     # Remove prefix "OYO " if present (case insensitive)
@@ -38,48 +97,123 @@ def convert_rating(raw_rating, max_raw=1000):
 
 def extract_city(hotel_name, address):
     text = f"{hotel_name} {address}".lower()
-    for city in KNOWN_CITIES:
-        if city.lower() in text:
-            return city
-    return "Unknown"
-
-with open(input_csv, 'r', encoding='utf-8') as infile, \
-     open(output_csv, 'w', newline='', encoding='utf-8') as outfile:
-    
-    reader = csv.DictReader(infile)
-    
-    fieldnames = [
-        'hotelId', 'Hotel_name', 'Address', 'City', 'Latitude',
-        'Longitude', 'Property_type', 'Room_status',
-        'Price', 'Currency', 'Rating', 'Final_rating'
-    ]
-    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for row in reader:
-        hotel_id = generate_hotel_id()
-        hotel_name_original = row.get('Hotel_name', '')
-        hotel_name = clean_hotel_name(hotel_name_original)
-        address = row.get('Location', '').strip()
-        city = extract_city(hotel_name_original, address)
-        price = row.get('Price', '').strip()
-        rating_raw = row.get('Rating', '').strip()
-
-        output_row = {
-            'hotelId': hotel_id,
-            'Hotel_name': hotel_name,
-            'Address': address,
-            'City': city,
-            'Latitude': '',
-            'Longitude': '',
-            'Property_type': 'hotel',
-            'Room_status': '',
-            'Price': price,
-            'Currency': 'INR',
-            'Rating': rating_raw,
-            'Final_rating': convert_rating(rating_raw)
-        }
-
-        writer.writerow(output_row)
-
-print(f'Transformed dataset with city saved as {output_csv}')
+    matches = CITY_PATTERN.findall(text)
+    if not matches:
+        return "Unknown"
+    return min(CITY_PRIORITY[m] for m in matches)[1]
+
+def transform_row(row):
+    hotel_name_original = row.get('Hotel_name') or ''
+    hotel_name = clean_hotel_name(hotel_name_original)
+    address = (row.get('Location') or '').strip()
+    rating_raw = (row.get('Rating') or '').strip()
+    return {
+        'hotelId': generate_hotel_id(hotel_name, address),
+        'Hotel_name': hotel_name,
+        'Address': address,
+        'City': extract_city(hotel_name_original, address),
+        'Latitude': '',
+        'Longitude': '',
+        'Property_type': 'hotel',
+        'Room_status': '',
+        'Price': (row.get('Price') or '').strip(),
+        'Currency': 'INR',
+        'Rating': rating_raw,
+        'Final_rating': convert_rating(rating_raw)
+    }
+
+def transform_chunk(rows):
+    return [transform_row(row) for row in rows]
+
+def read_chunks(path, chunk_size):
+    """Yields lists of up to `chunk_size` input rows without loading the whole file."""
+    with open(path, 'r', encoding='utf-8', newline='') as infile:
+        reader = csv.DictReader(infile)
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+def transformed_chunks(chunks, workers):
+    """
+    Transforms chunks in `workers` processes, yielding results in input order.
+    At most 2 x workers chunks are in flight, which bounds memory use.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield transform_chunk(chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for chunk in chunks:
+            pending.append(pool.submit(transform_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                yield pending.pop(0).result()
+        for fut in pending:
+            yield fut.result()
+
+def run(input_csv, output_path=None, output_csv=None, chunk_size=50000, workers=None):
+    """
+    Runs the pipeline and returns the number of rows written.
+    `output_path` (if given) gets the binary dataset, `output_csv` (if given) the CSV.
+    Both are written to temp paths and renamed into place at the end (removed
+    if anything fails), so a running server never reads a half-written dataset.
+    """
+    workers = workers or os.cpu_count() or 1
+    outputs = [path for path in (output_path, output_csv) if path]
+    writer = csv_file = None
+    total = 0
+    seen_ids = {}
+    completed = False
+    try:
+        if output_path:
+            writer = open_table_writer(f'{output_path}.tmp', OYO_SCHEMA)
+        csv_writer = None
+        if output_csv:
+            csv_file = open(f'{output_csv}.tmp', 'w', newline='', encoding='utf-8')
+            csv_writer = csv.DictWriter(csv_file, fieldnames=FIELDNAMES)
+            csv_writer.writeheader()
+        for rows in transformed_chunks(read_chunks(input_csv, chunk_size), workers):
+            assign_duplicate_ids(rows, seen_ids)
+            if writer:
+                writer.write_table(to_table(rows, OYO_SCHEMA))
+            if csv_writer:
+                csv_writer.writerows(rows)
+            total += len(rows)
+            print(f'Transformed {total} rows...')
+        completed = True
+    finally:
+        if writer:
+            writer.close()
+        if csv_file:
+            csv_file.close()
+        for path in outputs:
+            if completed:
+                os.replace(f'{path}.tmp', path)
+            elif os.path.exists(f'{path}.tmp'):
+                os.remove(f'{path}.tmp')
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Transform a raw OYO hotel dump into the serving dataset.')
+    parser.add_argument('input_csv', nargs='?', default=DEFAULT_INPUT_CSV)
+    parser.add_argument('--csv', default=DEFAULT_OUTPUT_CSV,
+                        help='CSV dataset path read by app.py')
+    parser.add_argument('--output', default='',
+                        help='also write the typed binary (Feather) dataset here')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    if not args.csv and not args.output:
+        parser.error('nothing to write: give --csv and/or --output')
+    total = run(args.input_csv, args.output or None, args.csv or None, args.chunk_size, args.workers)
+    print(f'Transformed dataset with city saved as '
+          + ' and '.join(path for path in (args.csv, args.output) if path))
+    return total
+
+if __name__ == '__main__':
+    main()